@@ -0,0 +1,235 @@
+"""
+Bar Aggregator Engine
+把EVENT_TICK逐笔合成为1m/5m/15m/1h/日线K线，完成的K线推送事件并批量写入bars表和列式存档
+"""
+
+from vnpy.trader.engine import BaseEngine, EventEngine
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.constant import Interval
+from vnpy.event import Event
+from config.database import TradingDatabase
+from config.columnar_store import ColumnarStore
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Thread, Lock, Event as ThreadEvent
+from typing import Deque, Dict, List, Optional, Tuple
+import sqlite3
+
+APP_NAME = "BarAggregator"
+
+# K线事件，完整事件类型为 EVENT_BAR + 周期，或 EVENT_BAR + 周期 + "." + vt_symbol
+# 例如 "eBar.5m" 和 "eBar.5m.rb2410.SHFE"
+EVENT_BAR = "eBar."
+
+# 支持的周期 -> (vnpy周期, 分钟数)，日线按自然日切分
+TIMEFRAMES: Dict[str, Tuple[Interval, int]] = {
+    "1m": (Interval.MINUTE, 1),
+    "5m": (Interval.MINUTE, 5),
+    "15m": (Interval.MINUTE, 15),
+    "1h": (Interval.HOUR, 60),
+    "d": (Interval.DAILY, 1440),
+}
+
+HISTORY_SIZE = 1000         # 每个合约每个周期在内存中保留的已完成K线数量
+FLUSH_INTERVAL = 1.0        # 已完成K线的落库周期（秒）
+
+def get_event_type(timeframe: str, vt_symbol: str = "") -> str:
+    """获取K线事件类型"""
+    if vt_symbol:
+        return f"{EVENT_BAR}{timeframe}.{vt_symbol}"
+    return f"{EVENT_BAR}{timeframe}"
+
+def get_bar_window(dt: datetime, timeframe: str) -> Tuple[datetime, datetime]:
+    """计算时间点所属K线的起止时间"""
+    if timeframe == "d":
+        start = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start, start + timedelta(days=1)
+
+    minutes = TIMEFRAMES[timeframe][1]
+    if minutes == 60:
+        start = dt.replace(minute=0, second=0, microsecond=0)
+    else:
+        start = dt.replace(minute=dt.minute - dt.minute % minutes, second=0, microsecond=0)
+    return start, start + timedelta(minutes=minutes)
+
+class SymbolBars:
+    """单个合约各周期正在合成的K线"""
+
+    __slots__ = ("bars", "ends", "minute_end", "last_volume", "last_turnover")
+
+    def __init__(self):
+        self.bars: Dict[str, BarData] = {}
+        self.ends: Dict[str, datetime] = {}
+        self.minute_end: Optional[datetime] = None
+        self.last_volume: float = 0
+        self.last_turnover: float = 0
+
+class BarAggregator(BaseEngine):
+    """K线合成引擎
+
+    每个tick只和1分钟K线的结束时间比较一次：未跨分钟时直接更新各周期的高低收，
+    跨分钟时才重新计算各周期的起止时间，单个tick的开销与订阅合约数量无关。
+    """
+
+    def __init__(
+        self,
+        main_engine,
+        event_engine: EventEngine,
+        database: TradingDatabase = None,
+        archive: ColumnarStore = None
+    ):
+        super().__init__(main_engine, event_engine, APP_NAME)
+        self.database = database or TradingDatabase()
+        # 外部传入的数据库实例由创建方负责关闭
+        self.owns_database: bool = database is None
+        self.archive = archive or ColumnarStore()
+
+        self.timeframes: List[str] = list(TIMEFRAMES)
+        self.symbols: Dict[str, SymbolBars] = {}
+        self.history: Dict[Tuple[str, str], Deque[BarData]] = {}
+
+        self.pending_bars: List[Tuple[str, BarData]] = []
+        self.lock = Lock()
+
+        self.active = True
+        self.stop_event = ThreadEvent()
+        self.thread = Thread(target=self.run, name=APP_NAME, daemon=True)
+        self.thread.start()
+
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+
+    def process_tick_event(self, event: Event):
+        """处理行情事件"""
+        self.update_tick(event.data)
+
+    def update_tick(self, tick: TickData):
+        """用tick更新各周期K线"""
+        if not tick.last_price:
+            return
+
+        state = self.symbols.get(tick.vt_symbol)
+        if state is None:
+            state = self.symbols[tick.vt_symbol] = SymbolBars()
+            state.last_volume = tick.volume
+            state.last_turnover = tick.turnover
+
+        volume_change = max(tick.volume - state.last_volume, 0)
+        turnover_change = max(tick.turnover - state.last_turnover, 0)
+        state.last_volume = tick.volume
+        state.last_turnover = tick.turnover
+
+        dt = tick.datetime
+        if state.minute_end is None or dt >= state.minute_end:
+            self.roll_bars(state, tick)
+
+        price = tick.last_price
+        for bar in state.bars.values():
+            if price > bar.high_price:
+                bar.high_price = price
+            elif price < bar.low_price:
+                bar.low_price = price
+            bar.close_price = price
+            bar.volume += volume_change
+            bar.turnover += turnover_change
+            bar.open_interest = tick.open_interest
+
+    def roll_bars(self, state: SymbolBars, tick: TickData):
+        """跨分钟时结束到期的K线并开始新K线"""
+        dt = tick.datetime
+        for timeframe in self.timeframes:
+            bar = state.bars.get(timeframe)
+            if bar is not None and dt < state.ends[timeframe]:
+                continue
+
+            if bar is not None:
+                self.on_bar_finished(timeframe, bar)
+
+            start, end = get_bar_window(dt, timeframe)
+            state.bars[timeframe] = BarData(
+                symbol=tick.symbol,
+                exchange=tick.exchange,
+                datetime=start,
+                interval=TIMEFRAMES[timeframe][0],
+                open_price=tick.last_price,
+                high_price=tick.last_price,
+                low_price=tick.last_price,
+                close_price=tick.last_price,
+                open_interest=tick.open_interest,
+                gateway_name=tick.gateway_name
+            )
+            state.ends[timeframe] = end
+
+        state.minute_end = state.ends["1m"] if "1m" in state.ends else min(state.ends.values())
+
+    def on_bar_finished(self, timeframe: str, bar: BarData):
+        """K线完成：缓存、推送事件并等待落库"""
+        key = (bar.vt_symbol, timeframe)
+        history = self.history.get(key)
+        if history is None:
+            history = self.history[key] = deque(maxlen=HISTORY_SIZE)
+        history.append(bar)
+
+        with self.lock:
+            self.pending_bars.append((timeframe, bar))
+
+        self.event_engine.put(Event(get_event_type(timeframe), bar))
+        self.event_engine.put(Event(get_event_type(timeframe, bar.vt_symbol), bar))
+
+    def get_current_bar(self, vt_symbol: str, timeframe: str) -> Optional[BarData]:
+        """获取正在合成的K线"""
+        state = self.symbols.get(vt_symbol)
+        if state is None:
+            return None
+        return state.bars.get(timeframe)
+
+    def get_bars(self, vt_symbol: str, timeframe: str) -> List[BarData]:
+        """获取内存中已完成的K线"""
+        return list(self.history.get((vt_symbol, timeframe), []))
+
+    def run(self):
+        """写入线程主循环"""
+        while not self.stop_event.wait(FLUSH_INTERVAL):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """批量写入已完成的K线"""
+        with self.lock:
+            bars = self.pending_bars
+            self.pending_bars = []
+
+        rows = [
+            (
+                bar.symbol, timeframe, bar.datetime, bar.open_price, bar.high_price,
+                bar.low_price, bar.close_price, bar.volume, bar.open_interest
+            )
+            for timeframe, bar in bars
+        ]
+        try:
+            self.database.save_bars(rows)
+        except sqlite3.Error as e:
+            self.main_engine.write_log(f"K线数据保存失败: {e}", APP_NAME)
+
+        grouped: Dict[Tuple[str, str], List[tuple]] = {}
+        for timeframe, bar in bars:
+            grouped.setdefault((bar.symbol, timeframe), []).append((
+                bar.datetime, bar.open_price, bar.high_price, bar.low_price,
+                bar.close_price, bar.volume, bar.turnover, bar.open_interest
+            ))
+        try:
+            for (symbol, timeframe), records in grouped.items():
+                self.archive.append_bars(symbol, timeframe, records)
+        except OSError as e:
+            self.main_engine.write_log(f"K线数据存档失败: {e}", APP_NAME)
+
+    def close(self):
+        """停止写入线程，写完已完成的K线"""
+        if not self.active:
+            return
+        self.active = False
+        self.event_engine.unregister(EVENT_TICK, self.process_tick_event)
+        self.stop_event.set()
+        self.thread.join()
+        if self.owns_database:
+            self.database.close()
@@ -0,0 +1,166 @@
+"""
+Columnar tick/bar archive
+按合约、按自然日存放定长结构化记录文件，读取时通过np.memmap直接映射，不经过SQLite
+"""
+
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+
+# 默认存放目录
+ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "archive"
+
+FILE_SUFFIX = ".dat"
+DAY_FORMAT = "%Y%m%d"
+
+# 时间统一存为纳秒时间戳，便于searchsorted按时间范围切片
+TICK_DTYPE = np.dtype([
+    ("datetime", "i8"),
+    ("last_price", "f8"),
+    ("volume", "f8"),
+    ("turnover", "f8"),
+    ("open_interest", "f8"),
+    ("bid_price", "f8"),
+    ("ask_price", "f8"),
+    ("bid_volume", "f8"),
+    ("ask_volume", "f8"),
+])
+
+# 字段名与CSV历史数据保持一致，回测代码可以按同样的键读取
+BAR_DTYPE = np.dtype([
+    ("datetime", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("turnover", "f8"),
+    ("open_interest", "f8"),
+])
+
+def to_timestamp(dt: datetime) -> int:
+    """datetime转纳秒时间戳"""
+    return int(dt.timestamp() * 1_000_000_000)
+
+class ColumnarStore:
+    """列式行情存档
+
+    目录结构: <root>/ticks/<symbol>/<YYYYMMDD>.dat 与 <root>/bars/<interval>/<symbol>/<YYYYMMDD>.dat。
+    文件只追加不修改，同一文件内的记录按时间递增写入。
+    """
+
+    def __init__(self, root: Path = None):
+        self.root = Path(root) if root else ARCHIVE_DIR
+        self.lock = Lock()
+
+    def get_tick_dir(self, symbol: str) -> Path:
+        return self.root / "ticks" / symbol
+
+    def get_bar_dir(self, symbol: str, interval: str) -> Path:
+        return self.root / "bars" / interval / symbol
+
+    def append_ticks(self, symbol: str, records: Iterable[tuple]):
+        """追加行情
+
+        records中每个元素为(datetime, last_price, volume, turnover, open_interest,
+        bid_price, ask_price, bid_volume, ask_volume)。
+        """
+        self.append(self.get_tick_dir(symbol), records, TICK_DTYPE)
+
+    def append_bars(self, symbol: str, interval: str, records: Iterable[tuple]):
+        """追加K线
+
+        records中每个元素为(datetime, open, high, low, close, volume, turnover, open_interest)。
+        """
+        self.append(self.get_bar_dir(symbol, interval), records, BAR_DTYPE)
+
+    def append(self, folder: Path, records: Iterable[tuple], dtype: np.dtype):
+        """按自然日分组后追加写入"""
+        days: Dict[date, List[tuple]] = {}
+        for record in records:
+            dt = record[0]
+            days.setdefault(dt.date(), []).append((to_timestamp(dt),) + tuple(record[1:]))
+
+        if not days:
+            return
+
+        with self.lock:
+            folder.mkdir(parents=True, exist_ok=True)
+            for day, rows in days.items():
+                data = np.array(rows, dtype=dtype)
+                path = folder / (day.strftime(DAY_FORMAT) + FILE_SUFFIX)
+                with open(path, "ab") as f:
+                    data.tofile(f)
+
+    def iter_ticks(self, symbol: str, start: datetime, end: datetime) -> Iterator[np.ndarray]:
+        """逐日返回时间范围内的行情（内存映射视图，不复制数据）"""
+        return self.iter_range(self.get_tick_dir(symbol), start, end, TICK_DTYPE)
+
+    def iter_bars(self, symbol: str, interval: str, start: datetime, end: datetime) -> Iterator[np.ndarray]:
+        """逐日返回时间范围内的K线（内存映射视图，不复制数据）"""
+        return self.iter_range(self.get_bar_dir(symbol, interval), start, end, BAR_DTYPE)
+
+    def load_ticks(self, symbol: str, start: datetime, end: datetime) -> np.ndarray:
+        """读取时间范围内的行情，跨日时才拼接复制"""
+        return self.join(self.iter_ticks(symbol, start, end), TICK_DTYPE)
+
+    def load_bars(self, symbol: str, interval: str, start: datetime, end: datetime) -> np.ndarray:
+        """读取时间范围内的K线，跨日时才拼接复制"""
+        return self.join(self.iter_bars(symbol, interval, start, end), BAR_DTYPE)
+
+    def iter_range(self, folder: Path, start: datetime, end: datetime, dtype: np.dtype) -> Iterator[np.ndarray]:
+        """遍历范围内的日文件并按时间切片"""
+        if not folder.exists():
+            return
+
+        first_day = start.strftime(DAY_FORMAT)
+        last_day = end.strftime(DAY_FORMAT)
+        start_ts = to_timestamp(start)
+        end_ts = to_timestamp(end)
+
+        for path in sorted(folder.glob("*" + FILE_SUFFIX)):
+            day = path.stem
+            if day < first_day or day > last_day:
+                continue
+
+            data = self.map_file(path, dtype)
+            if data is None:
+                continue
+
+            times = data["datetime"]
+            left = np.searchsorted(times, start_ts, side="left")
+            right = np.searchsorted(times, end_ts, side="right")
+            if right > left:
+                yield data[left:right]
+
+    def map_file(self, path: Path, dtype: np.dtype):
+        """只读映射文件，忽略正在写入的不完整记录"""
+        count = path.stat().st_size // dtype.itemsize
+        if not count:
+            return None
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+    def join(self, chunks: Iterator[np.ndarray], dtype: np.dtype) -> np.ndarray:
+        chunks = list(chunks)
+        if not chunks:
+            return np.empty(0, dtype=dtype)
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.concatenate(chunks)
+
+    def get_days(self, symbol: str, interval: str = "") -> List[str]:
+        """获取已存档的交易日列表，interval为空时查询行情"""
+        folder = self.get_bar_dir(symbol, interval) if interval else self.get_tick_dir(symbol)
+        if not folder.exists():
+            return []
+        return sorted(path.stem for path in folder.glob("*" + FILE_SUFFIX))
+
+def parse_date_range(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """把回测参数中的日期字符串转换为时间范围，结束日期只有日期时包含当天全部数据"""
+    start = datetime.fromisoformat(start_date)
+    end = datetime.fromisoformat(end_date)
+    if len(end_date) <= 10:
+        end = end + timedelta(days=1) - timedelta(microseconds=1)
+    return start, end
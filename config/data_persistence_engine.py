@@ -5,19 +5,114 @@ Phase 1.1.2: Auto-save trading data and manage historical data
 
 from vnpy.trader.engine import BaseEngine, EventEngine
 from vnpy.trader.event import EVENT_TRADE, EVENT_ORDER, EVENT_POSITION, EVENT_ACCOUNT
-from vnpy.event import Event
+from vnpy.event import Event, EVENT_TIMER
 from config.database import TradingDatabase, TradeRecord, OrderRecord, PositionRecord, AccountFlow
 from datetime import datetime
+from queue import Queue, Empty, Full
+from threading import Thread, Lock
+from typing import Dict, List, Any, Hashable, Tuple
+import time
 import uuid
 
 APP_NAME = "DataPersistenceEngine"
 
+# 写入队列参数
+QUEUE_MAX_SIZE = 10000      # 队列上限，写满时丢弃新记录并计数，事件线程不阻塞
+BATCH_SIZE = 200            # 累计记录数达到该值立即落库
+FLUSH_INTERVAL = 0.5        # 距上次落库超过该秒数即落库
+
+# 持仓/资金快照参数
+SNAPSHOT_INTERVAL = 5       # 快照落库周期（秒，按EVENT_TIMER计数）
+SNAPSHOT_TOLERANCE = 1e-6   # 数值变化不超过该容差视为未变化，不重复落库
+
+# 记录类型 -> TradingDatabase.save_batch 参数名
+RECORD_TRADE = "trades"
+RECORD_ORDER = "orders"
+RECORD_POSITION = "positions"
+RECORD_ACCOUNT = "account_flows"
+
+class SnapshotCoalescer:
+    """快照合并器
+
+    每个键只保留最新一次快照，周期性输出与上次落库值相比变化超过容差的快照。
+    """
+    
+    def __init__(self, tolerance: float = SNAPSHOT_TOLERANCE):
+        self.tolerance = tolerance
+        self.latest: Dict[Hashable, Tuple[Any, Tuple[float, ...]]] = {}
+        self.persisted: Dict[Hashable, Tuple[float, ...]] = {}
+        self.lock = Lock()
+        
+        self.received = 0
+        self.emitted = 0
+    
+    def update(self, key: Hashable, record, values: Tuple[float, ...]):
+        """更新某个键的最新快照"""
+        with self.lock:
+            self.latest[key] = (record, values)
+            self.received += 1
+    
+    def is_changed(self, key: Hashable, values: Tuple[float, ...]) -> bool:
+        """与上次落库的值比较是否超出容差"""
+        persisted = self.persisted.get(key)
+        if persisted is None or len(persisted) != len(values):
+            return True
+        return any(abs(new - old) > self.tolerance for new, old in zip(values, persisted))
+    
+    def drain(self) -> List[Any]:
+        """取出所有需要落库的快照"""
+        with self.lock:
+            latest = self.latest
+            self.latest = {}
+        
+        records = []
+        for key, (record, values) in latest.items():
+            if self.is_changed(key, values):
+                self.persisted[key] = values
+                records.append(record)
+        
+        with self.lock:
+            self.emitted += len(records)
+        return records
+
 class DataPersistenceEngine(BaseEngine):
-    """自动数据持久化引擎"""
+    """自动数据持久化引擎
     
-    def __init__(self, main_engine, event_engine: EventEngine):
+    事件线程只负责把事件转换成记录并放入队列，由独立的写入线程批量落库。
+    """
+    
+    def __init__(self, main_engine, event_engine: EventEngine, database: TradingDatabase = None):
         super().__init__(main_engine, event_engine, APP_NAME)
-        self.database = TradingDatabase()
+        self.database = database or TradingDatabase()
+        # 外部传入的数据库实例由创建方负责关闭
+        self.owns_database: bool = database is None
+        
+        self.queue: Queue = Queue(maxsize=QUEUE_MAX_SIZE)
+        self.batch_size: int = BATCH_SIZE
+        self.flush_interval: float = FLUSH_INTERVAL
+        
+        self.position_coalescer = SnapshotCoalescer()
+        self.account_coalescer = SnapshotCoalescer()
+        self.snapshot_interval: int = SNAPSHOT_INTERVAL
+        self.timer_count: int = 0
+        
+        self.stats_lock = Lock()
+        self.stats: Dict[str, Any] = {
+            "queued": 0,
+            "written": 0,
+            "failed": 0,
+            "dropped": 0,
+            "flush_count": 0,
+            "max_queue_depth": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+            "total_flush_latency": 0.0,
+        }
+        
+        self.active = True
+        self.thread = Thread(target=self.run, name=APP_NAME, daemon=True)
+        self.thread.start()
+        
         self.register_events()
         self.main_engine.write_log("数据持久化引擎初始化完成")
     
@@ -27,9 +122,27 @@ class DataPersistenceEngine(BaseEngine):
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_ACCOUNT, self.process_account_event)
+        self.event_engine.register(EVENT_TIMER, self.process_timer_event)
+    
+    def put_record(self, record_type: str, record):
+        """放入写入队列，队列已满时丢弃并计数"""
+        if not self.active:
+            return
+        try:
+            self.queue.put_nowait((record_type, record))
+        except Full:
+            with self.stats_lock:
+                self.stats["dropped"] += 1
+            return
+        
+        depth = self.queue.qsize()
+        with self.stats_lock:
+            self.stats["queued"] += 1
+            if depth > self.stats["max_queue_depth"]:
+                self.stats["max_queue_depth"] = depth
     
     def process_trade_event(self, event: Event):
-        """处理成交事件并保存到数据库"""
+        """处理成交事件并放入写入队列"""
         trade = event.data
         trade_record = TradeRecord(
             trade_id=trade.tradeid,
@@ -38,15 +151,14 @@ class DataPersistenceEngine(BaseEngine):
             volume=trade.volume,
             price=trade.price,
             trade_time=trade.datetime,
-            commission=trade.commission,
+            commission=getattr(trade, 'commission', 0.0),
             strategy_name=getattr(trade, 'strategy_name', ''),
             order_id=trade.orderid
         )
-        self.database.save_trade(trade_record)
-        self.main_engine.write_log(f"成交数据已保存: {trade.symbol} {trade.direction.value} {trade.volume}手 @{trade.price}")
+        self.put_record(RECORD_TRADE, trade_record)
     
     def process_order_event(self, event: Event):
-        """处理订单事件并保存到数据库"""
+        """处理订单事件并放入写入队列"""
         order = event.data
         order_record = OrderRecord(
             order_id=order.orderid,
@@ -60,54 +172,182 @@ class DataPersistenceEngine(BaseEngine):
             filled_price=order.price,
             strategy_name=getattr(order, 'strategy_name', '')
         )
-        self.database.save_order(order_record)
-        self.main_engine.write_log(f"订单数据已保存: {order.symbol} {order.direction.value} {order.volume}手 @{order.price}")
+        self.put_record(RECORD_ORDER, order_record)
     
     def process_position_event(self, event: Event):
-        """处理持仓事件并保存到数据库"""
+        """处理持仓事件，合并为最新快照"""
         position = event.data
+        direction = position.direction.value
+        if direction not in ('多', '空'):
+            # 净持仓按数量方向区分
+            direction = '多' if position.volume > 0 else '空'
         position_record = PositionRecord(
             symbol=position.symbol,
-            direction='多' if position.volume > 0 else '空',
+            direction=direction,
             volume=abs(position.volume),
             price=position.price,
             position_time=datetime.now(),
             pnl=position.pnl,
             strategy_name=getattr(position, 'strategy_name', '')
         )
-        self.database.save_position(position_record)
-        self.main_engine.write_log(f"持仓数据已保存: {position.symbol} {position.volume}手")
+        self.position_coalescer.update(
+            (position.symbol, direction),
+            position_record,
+            (position_record.volume, position_record.price, position_record.pnl)
+        )
     
     def process_account_event(self, event: Event):
-        """处理账户事件并保存到数据库"""
+        """处理账户事件，合并为最新快照"""
         account = event.data
         account_flow = AccountFlow(
             flow_id=str(uuid.uuid4()),
             account_id=account.accountid,
             balance=account.balance,
             available=account.available,
-            margin=account.margin,
+            margin=getattr(account, 'margin', account.frozen),
             pnl=getattr(account, 'pnl', 0.0),
-            commission=account.commission,
+            commission=getattr(account, 'commission', 0.0),
             record_time=datetime.now()
         )
-        self.database.save_account_flow(account_flow)
-        self.main_engine.write_log(f"账户数据已保存: 余额{account.balance}, 可用{account.available}, 盈亏{getattr(account, 'pnl', 0.0)}")
+        self.account_coalescer.update(
+            account.accountid,
+            account_flow,
+            (
+                account_flow.balance, account_flow.available, account_flow.margin,
+                account_flow.pnl, account_flow.commission
+            )
+        )
+    
+    def process_timer_event(self, event: Event):
+        """按周期输出持仓/资金快照"""
+        self.timer_count += 1
+        if self.timer_count < self.snapshot_interval:
+            return
+        self.timer_count = 0
+        self.flush_snapshots()
+    
+    def flush_snapshots(self):
+        """把变化的快照放入写入队列"""
+        for record in self.position_coalescer.drain():
+            self.put_record(RECORD_POSITION, record)
+        for record in self.account_coalescer.drain():
+            self.put_record(RECORD_ACCOUNT, record)
+    
+    def run(self):
+        """写入线程主循环：按数量或时间阈值批量落库"""
+        batch: Dict[str, List] = {}
+        pending = 0
+        last_flush = time.monotonic()
+        
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except Empty:
+                item = None
+            else:
+                if item is None:
+                    # 收到停止信号，写完剩余数据后退出
+                    self.safe_flush(batch)
+                    break
+                record_type, record = item
+                batch.setdefault(record_type, []).append(record)
+                pending += 1
+            
+            if pending >= self.batch_size or (
+                pending and time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self.safe_flush(batch)
+                batch = {}
+                pending = 0
+                last_flush = time.monotonic()
+            elif not pending:
+                last_flush = time.monotonic()
+    
+    def safe_flush(self, batch: Dict[str, List]):
+        """落库出现任何异常都只记录日志并计为失败，写入线程继续运行"""
+        try:
+            self.flush(batch)
+        except Exception as e:
+            count = sum(len(records) for records in batch.values())
+            with self.stats_lock:
+                self.stats["failed"] += count
+            self.main_engine.write_log(f"数据批量保存异常，丢弃{count}条记录: {e}")
+    
+    def flush(self, batch: Dict[str, List]):
+        """在单个事务中写入一批记录"""
+        count = sum(len(records) for records in batch.values())
+        if not count:
+            return
+        
+        start = time.perf_counter()
+        failed = 0
+        try:
+            self.database.save_batch(**batch)
+        except Exception:
+            # 批量写入失败时逐条重试，避免一条坏数据（约束冲突、超出SQLite范围的整数等）拖累整批
+            failed = self.save_one_by_one(batch)
+        latency = time.perf_counter() - start
+        
+        with self.stats_lock:
+            self.stats["written"] += count - failed
+            self.stats["failed"] += failed
+            self.stats["flush_count"] += 1
+            self.stats["last_flush_latency"] = latency
+            self.stats["total_flush_latency"] += latency
+            if latency > self.stats["max_flush_latency"]:
+                self.stats["max_flush_latency"] = latency
+    
+    def save_one_by_one(self, batch: Dict[str, List]) -> int:
+        """逐条写入，返回失败条数"""
+        failed = 0
+        for record_type, records in batch.items():
+            for record in records:
+                try:
+                    self.database.save_batch(**{record_type: [record]})
+                except Exception as e:
+                    failed += 1
+                    self.main_engine.write_log(f"数据保存失败: {record_type} {e}")
+        return failed
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取写入队列统计：队列深度、落库次数与延迟"""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        stats["snapshots_received"] = self.position_coalescer.received + self.account_coalescer.received
+        stats["snapshots_written"] = self.position_coalescer.emitted + self.account_coalescer.emitted
+        total_latency = stats.pop("total_flush_latency")
+        stats["avg_flush_latency"] = total_latency / stats["flush_count"] if stats["flush_count"] else 0.0
+        return stats
+    
+    def close(self):
+        """停止写入线程，写完队列中剩余的数据"""
+        if not self.active:
+            return
+        self.flush_snapshots()
+        self.active = False
+        self.queue.put(None)
+        self.thread.join()
+        if self.owns_database:
+            self.database.close()
     
     def get_trading_summary(self, days: int = 30) -> dict:
-        """获取交易汇总统计"""
+        """获取交易汇总统计（读取每日汇总表，开销与天数成正比）"""
         from datetime import timedelta
         start_date = datetime.now() - timedelta(days=days)
         
-        trades = self.database.get_trades(start_date=start_date)
-        total_trades = len(trades)
+        daily_stats = self.database.get_daily_stats(start_date=start_date)
+        total_trades = sum(day["trade_count"] for day in daily_stats)
         win_rate = self.database.get_win_rate()
-        total_pnl = sum(trade.commission for trade in trades)
+        total_pnl = sum(day["pnl"] for day in daily_stats)
+        total_commission = sum(day["commission"] for day in daily_stats)
         
         return {
             'total_trades': total_trades,
             'win_rate': win_rate,
             'total_pnl': total_pnl,
+            'total_commission': total_commission,
             'start_date': start_date,
             'end_date': datetime.now()
         }
@@ -116,11 +356,3 @@ class DataPersistenceEngine(BaseEngine):
         """清理过期数据"""
         self.database.clear_old_data(days_to_keep)
         self.main_engine.write_log(f"已清理{days_to_keep}天前的历史数据")
-
-# 数据库初始化检查
-try:
-    # 测试数据库连接
-    db = TradingDatabase()
-    print("数据库初始化成功")
-except Exception as e:
-    print(f"数据库初始化失败: {e}")
\ No newline at end of file
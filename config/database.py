@@ -4,9 +4,10 @@ Phase 1.1.1: SQLite database structure implementation
 """
 
 import sqlite3
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 import json
 from dataclasses import dataclass
 
@@ -68,21 +69,236 @@ class TickData:
     bid_volume: int
     ask_volume: int
 
+# 写入语句（模块级常量，保证sqlite3语句缓存按相同SQL文本复用预编译语句）
+INSERT_TRADE_SQL = '''
+    INSERT OR REPLACE INTO trades 
+    (trade_id, symbol, direction, volume, price, trade_time, commission, strategy_name, order_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ORDER_SQL = '''
+    INSERT OR REPLACE INTO orders 
+    (order_id, symbol, direction, volume, price, order_time, status, filled_volume, filled_price, strategy_name)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_POSITION_SQL = '''
+    INSERT INTO positions 
+    (symbol, direction, volume, price, position_time, pnl, strategy_name)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ACCOUNT_FLOW_SQL = '''
+    INSERT INTO account_flow 
+    (flow_id, account_id, balance, available, margin, pnl, commission, record_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# 行情按自然日分表存放（ticks_YYYYMMDD），清理过期数据时直接删除整张表
+TICK_PARTITION_PREFIX = "ticks_"
+TICK_PARTITION_FORMAT = "%Y%m%d"
+
+CREATE_TICK_PARTITION_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL,
+        datetime DATETIME NOT NULL,
+        last_price REAL NOT NULL,
+        volume INTEGER NOT NULL,
+        open_interest INTEGER NOT NULL,
+        bid_price REAL NOT NULL,
+        ask_price REAL NOT NULL,
+        bid_volume INTEGER NOT NULL,
+        ask_volume INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+INSERT_TICK_SQL = '''
+    INSERT INTO {table} 
+    (symbol, datetime, last_price, volume, open_interest, bid_price, ask_price, bid_volume, ask_volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_BAR_SQL = '''
+    INSERT INTO bars 
+    (symbol, interval, datetime, open_price, high_price, low_price, close_price, volume, open_interest)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# 每日汇总表，由触发器随trades/positions的写入和删除增量维护
+# 日期取时间字符串的前10位（本地日期），与写入时的时间保持一致
+DAILY_STATS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_positions_insert_stats AFTER INSERT ON positions
+    BEGIN
+        INSERT INTO daily_stats (date, pnl, win_count, loss_count)
+        VALUES (substr(NEW.position_time, 1, 10), NEW.pnl, NEW.pnl > 0, NEW.pnl < 0)
+        ON CONFLICT(date) DO UPDATE SET
+            pnl = pnl + excluded.pnl,
+            win_count = win_count + excluded.win_count,
+            loss_count = loss_count + excluded.loss_count;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_positions_delete_stats AFTER DELETE ON positions
+    BEGIN
+        UPDATE daily_stats SET
+            pnl = pnl - OLD.pnl,
+            win_count = win_count - (OLD.pnl > 0),
+            loss_count = loss_count - (OLD.pnl < 0)
+        WHERE date = substr(OLD.position_time, 1, 10);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_trades_insert_stats AFTER INSERT ON trades
+    BEGIN
+        INSERT INTO daily_stats (date, trade_count, trade_volume, commission)
+        VALUES (substr(NEW.trade_time, 1, 10), 1, NEW.volume, NEW.commission)
+        ON CONFLICT(date) DO UPDATE SET
+            trade_count = trade_count + 1,
+            trade_volume = trade_volume + excluded.trade_volume,
+            commission = commission + excluded.commission;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_trades_delete_stats AFTER DELETE ON trades
+    BEGIN
+        UPDATE daily_stats SET
+            trade_count = trade_count - 1,
+            trade_volume = trade_volume - OLD.volume,
+            commission = commission - OLD.commission
+        WHERE date = substr(OLD.trade_time, 1, 10);
+    END
+    ''',
+]
+
+# 首次创建daily_stats时根据已有数据回填
+BACKFILL_DAILY_STATS_SQL = '''
+    INSERT INTO daily_stats (date, pnl, win_count, loss_count, trade_count, trade_volume, commission)
+    SELECT date, SUM(pnl), SUM(win_count), SUM(loss_count), SUM(trade_count), SUM(trade_volume), SUM(commission)
+    FROM (
+        SELECT substr(position_time, 1, 10) AS date, pnl, pnl > 0 AS win_count, pnl < 0 AS loss_count,
+               0 AS trade_count, 0 AS trade_volume, 0 AS commission
+        FROM positions
+        UNION ALL
+        SELECT substr(trade_time, 1, 10), 0, 0, 0, 1, volume, commission
+        FROM trades
+    )
+    GROUP BY date
+'''
+
+# 成交记录查询列（与TradeRecord字段顺序一致，首列为自增id，用于游标分页）
+TRADE_COLUMNS = "id, trade_id, symbol, direction, volume, price, trade_time, commission, strategy_name, order_id"
+DEFAULT_PAGE_SIZE = 1000
+
+# output="numpy"时的结构化数组类型，时间保持数据库中的ISO字符串
+TRADE_DTYPE = [
+    ("id", "i8"),
+    ("trade_id", "U64"),
+    ("symbol", "U32"),
+    ("direction", "U8"),
+    ("volume", "i8"),
+    ("price", "f8"),
+    ("trade_time", "U32"),
+    ("commission", "f8"),
+    ("strategy_name", "U64"),
+    ("order_id", "U64"),
+]
+
+# 表结构版本，修改建表/索引/触发器语句时需要加1，已是最新版本的数据库启动时跳过全部DDL
+# 版本2：已有数据库切换为增量vacuum
+SCHEMA_VERSION = 2
+
+AUTO_VACUUM_INCREMENTAL = 2         # PRAGMA auto_vacuum的INCREMENTAL模式取值
+
+# 连接参数
+STATEMENT_CACHE_SIZE = 128          # 每个连接缓存的预编译语句数量
+CACHE_SIZE_KB = 16384               # 页缓存大小(KB)
+BUSY_TIMEOUT_MS = 5000              # 多连接并发写入时的等待时间
+
 class TradingDatabase:
-    """SQLite database manager for trading data persistence"""
+    """SQLite database manager for trading data persistence
+    
+    每个线程持有一个长连接（WAL模式），避免每次写入都重新打开数据库。
+    """
     
     def __init__(self, db_path: str = None):
         if db_path is None:
             db_path = Path(__file__).parent.parent / "data" / "trading.db"
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._tick_partitions: set = set()
+        
         self.init_database()
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建并调优一个新连接"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        # 新建数据库启用增量vacuum，删除分表后可以逐步归还磁盘空间
+        # 必须在写入任何页之前设置，已有数据库在init_database的版本升级中切换
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        # INSERT OR REPLACE删除旧行时也触发DELETE触发器，保证daily_stats不重复累计
+        conn.execute('PRAGMA recursive_triggers=ON')
+        return conn
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的长连接，首次调用时创建"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # 其他线程创建的连接可能已被关闭
+                pass
+        self._local = threading.local()
+    
     def init_database(self):
         """Initialize database with required tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self.create_schema(cursor)
+            cursor.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+            conn.commit()
+            
+            # 已有数据页的数据库设置auto_vacuum不生效，需要执行一次VACUUM重建后才切换
+            if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                cursor.execute('VACUUM')
+        
+        self._tick_partitions.update(self.get_tick_partitions())
+    
+    def create_schema(self, cursor: sqlite3.Cursor):
+        """创建表、索引和触发器"""
         # 交易记录表
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS trades (
@@ -149,7 +365,7 @@ class TradingDatabase:
             )
         ''')
         
-        # 行情数据表
+        # 行情数据表（旧版单表，新数据写入按日分表）
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS ticks (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -178,159 +394,376 @@ class TradingDatabase:
                 close_price REAL NOT NULL,
                 volume INTEGER NOT NULL,
                 open_interest INTEGER NOT NULL,
+                interval TEXT NOT NULL DEFAULT '1m',
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # 旧版bars表没有周期字段
+        bar_columns = [row[1] for row in cursor.execute('PRAGMA table_info(bars)')]
+        if 'interval' not in bar_columns:
+            cursor.execute("ALTER TABLE bars ADD COLUMN interval TEXT NOT NULL DEFAULT '1m'")
+        
+        # 每日汇总表
+        has_daily_stats = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_stats'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_stats (
+                date TEXT PRIMARY KEY,
+                pnl REAL NOT NULL DEFAULT 0.0,
+                win_count INTEGER NOT NULL DEFAULT 0,
+                loss_count INTEGER NOT NULL DEFAULT 0,
+                trade_count INTEGER NOT NULL DEFAULT 0,
+                trade_volume INTEGER NOT NULL DEFAULT 0,
+                commission REAL NOT NULL DEFAULT 0.0
+            )
+        ''')
+        if not has_daily_stats:
+            cursor.execute(BACKFILL_DAILY_STATS_SQL)
+        for trigger_sql in DAILY_STATS_TRIGGERS:
+            cursor.execute(trigger_sql)
+        
         # 创建索引优化查询性能
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades(symbol)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_time ON trades(trade_time)')
+        # 索引隐含rowid(id)，可直接支持(trade_time, id)游标分页
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_symbol_time ON trades(symbol, trade_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_strategy_time ON trades(strategy_name, trade_time)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_symbol ON orders(symbol)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_time ON orders(order_time)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_positions_symbol ON positions(symbol)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_ticks_symbol_time ON ticks(symbol, datetime)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_bars_symbol_time ON bars(symbol, datetime)')
-        
-        conn.commit()
-        conn.close()
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_bars_symbol_interval_time ON bars(symbol, interval, datetime)')
+        # 清理过期数据按时间删除
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_positions_time ON positions(position_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_account_flow_time ON account_flow(record_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_bars_time ON bars(datetime)')
     
     def save_trade(self, trade: TradeRecord):
         """保存交易记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO trades 
-            (trade_id, symbol, direction, volume, price, trade_time, commission, strategy_name, order_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        conn = self.get_connection()
+        conn.execute(INSERT_TRADE_SQL, (
             trade.trade_id, trade.symbol, trade.direction, trade.volume, trade.price,
             trade.trade_time, trade.commission, trade.strategy_name, trade.order_id
         ))
         conn.commit()
-        conn.close()
     
     def save_order(self, order: OrderRecord):
         """保存订单记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO orders 
-            (order_id, symbol, direction, volume, price, order_time, status, filled_volume, filled_price, strategy_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        conn = self.get_connection()
+        conn.execute(INSERT_ORDER_SQL, (
             order.order_id, order.symbol, order.direction, order.volume, order.price,
             order.order_time, order.status, order.filled_volume, order.filled_price, order.strategy_name
         ))
         conn.commit()
-        conn.close()
     
     def save_position(self, position: PositionRecord):
         """保存持仓记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO positions 
-            (symbol, direction, volume, price, position_time, pnl, strategy_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        conn = self.get_connection()
+        conn.execute(INSERT_POSITION_SQL, (
             position.symbol, position.direction, position.volume, position.price,
             position.position_time, position.pnl, position.strategy_name
         ))
         conn.commit()
-        conn.close()
     
     def save_account_flow(self, account_flow: AccountFlow):
         """保存资金流水"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO account_flow 
-            (flow_id, account_id, balance, available, margin, pnl, commission, record_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        conn = self.get_connection()
+        conn.execute(INSERT_ACCOUNT_FLOW_SQL, (
             account_flow.flow_id, account_flow.account_id, account_flow.balance,
             account_flow.available, account_flow.margin, account_flow.pnl,
             account_flow.commission, account_flow.record_time
         ))
         conn.commit()
-        conn.close()
+    
+    def save_batch(
+        self,
+        trades: List[TradeRecord] = None,
+        orders: List[OrderRecord] = None,
+        positions: List[PositionRecord] = None,
+        account_flows: List[AccountFlow] = None
+    ):
+        """在单个事务中批量保存多类记录"""
+        conn = self.get_connection()
+        with conn:
+            if trades:
+                conn.executemany(INSERT_TRADE_SQL, [
+                    (
+                        trade.trade_id, trade.symbol, trade.direction, trade.volume, trade.price,
+                        trade.trade_time, trade.commission, trade.strategy_name, trade.order_id
+                    )
+                    for trade in trades
+                ])
+            if orders:
+                conn.executemany(INSERT_ORDER_SQL, [
+                    (
+                        order.order_id, order.symbol, order.direction, order.volume, order.price,
+                        order.order_time, order.status, order.filled_volume, order.filled_price, order.strategy_name
+                    )
+                    for order in orders
+                ])
+            if positions:
+                conn.executemany(INSERT_POSITION_SQL, [
+                    (
+                        position.symbol, position.direction, position.volume, position.price,
+                        position.position_time, position.pnl, position.strategy_name
+                    )
+                    for position in positions
+                ])
+            if account_flows:
+                conn.executemany(INSERT_ACCOUNT_FLOW_SQL, [
+                    (
+                        flow.flow_id, flow.account_id, flow.balance,
+                        flow.available, flow.margin, flow.pnl,
+                        flow.commission, flow.record_time
+                    )
+                    for flow in account_flows
+                ])
+    
+    def get_tick_partition(self, dt: datetime) -> str:
+        """获取时间点所属的行情分表名"""
+        return TICK_PARTITION_PREFIX + dt.strftime(TICK_PARTITION_FORMAT)
+    
+    def get_tick_partitions(self) -> List[str]:
+        """获取所有行情分表名（按日期升序）"""
+        conn = self.get_connection()
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        prefix_length = len(TICK_PARTITION_PREFIX)
+        return sorted(
+            name for (name,) in rows
+            if name.startswith(TICK_PARTITION_PREFIX) and name[prefix_length:].isdigit()
+        )
+    
+    def ensure_tick_partition(self, conn: sqlite3.Connection, table: str) -> bool:
+        """分表不存在时创建，返回是否执行了建表
+        
+        建表在调用方的事务中执行，由调用方在事务提交后把分表加入缓存
+        """
+        if table in self._tick_partitions:
+            return False
+        conn.execute(CREATE_TICK_PARTITION_SQL.format(table=table))
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_symbol_time ON {table}(symbol, datetime)')
+        return True
+    
+    def save_ticks(self, rows: List[tuple]):
+        """在单个事务中批量保存行情数据，按行情时间写入对应的日分表
+        
+        rows中每个元素按INSERT_TICK_SQL的列顺序排列，调用方直接构造元组以避免创建中间对象。
+        """
+        if not rows:
+            return
+        
+        partitions: Dict[str, List[tuple]] = {}
+        for row in rows:
+            partitions.setdefault(self.get_tick_partition(row[1]), []).append(row)
+        
+        conn = self.get_connection()
+        created = []
+        with conn:
+            for table, table_rows in partitions.items():
+                if self.ensure_tick_partition(conn, table):
+                    created.append(table)
+                conn.executemany(INSERT_TICK_SQL.format(table=table), table_rows)
+        
+        # 写入失败时建表随事务一起回滚，不能提前加入缓存，否则之后写入该日分表会报no such table
+        with self._lock:
+            self._tick_partitions.update(created)
+    
+    def get_ticks(self, symbol: str, start: datetime, end: datetime) -> List[tuple]:
+        """查询时间范围内的行情，只扫描范围内的日分表"""
+        first = self.get_tick_partition(start)
+        last = self.get_tick_partition(end)
+        conn = self.get_connection()
+        
+        rows = []
+        for table in self.get_tick_partitions():
+            if first <= table <= last:
+                rows.extend(conn.execute(
+                    f'''SELECT symbol, datetime, last_price, volume, open_interest,
+                              bid_price, ask_price, bid_volume, ask_volume
+                       FROM {table} WHERE symbol = ? AND datetime >= ? AND datetime <= ?
+                       ORDER BY datetime''',
+                    (symbol, start, end)
+                ).fetchall())
+        return rows
+    
+    def save_bars(self, rows: List[tuple]):
+        """在单个事务中批量保存K线数据，rows按INSERT_BAR_SQL的列顺序排列"""
+        if not rows:
+            return
+        conn = self.get_connection()
+        with conn:
+            conn.executemany(INSERT_BAR_SQL, rows)
     
     def get_trades(self, symbol: str = None, start_date: datetime = None, end_date: datetime = None, limit: int = None) -> List[TradeRecord]:
         """获取交易记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        query = "SELECT * FROM trades WHERE 1=1"
-        params = []
+        conn = self.get_connection()
+        clauses, params = self._build_trade_filter(symbol, None, start_date, end_date)
+        query = f"SELECT {TRADE_COLUMNS} FROM trades WHERE {clauses} ORDER BY trade_time DESC, id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        
+        rows = conn.execute(query, params).fetchall()
+        return self._convert_trades(rows, "record")
+    
+    def get_trades_page(
+        self,
+        symbol: str = None,
+        strategy_name: str = None,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        cursor: Optional[Tuple[str, int]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        output: str = "record",
+        ascending: bool = False
+    ) -> Tuple[Any, Optional[Tuple[str, int]]]:
+        """按(trade_time, id)游标分页查询成交记录
+        
+        cursor为上一页返回的游标，返回(本页数据, 下一页游标)，没有更多数据时游标为None。
+        output可选"record"(TradeRecord列表)、"tuple"(原始元组列表)、"numpy"(结构化数组)。
+        """
+        clauses, params = self._build_trade_filter(symbol, strategy_name, start_date, end_date)
+        
+        operator = ">" if ascending else "<"
+        order = "ASC" if ascending else "DESC"
+        if cursor:
+            clauses += f" AND (trade_time, id) {operator} (?, ?)"
+            params.extend(cursor)
+        
+        query = (
+            f"SELECT {TRADE_COLUMNS} FROM trades WHERE {clauses} "
+            f"ORDER BY trade_time {order}, id {order} LIMIT ?"
+        )
+        params.append(int(page_size))
+        rows = self.get_connection().execute(query, params).fetchall()
         
+        next_cursor = (rows[-1][6], rows[-1][0]) if len(rows) == page_size else None
+        return self._convert_trades(rows, output), next_cursor
+    
+    def iter_trade_pages(self, page_size: int = DEFAULT_PAGE_SIZE, output: str = "record", **filters) -> Iterator[Any]:
+        """逐页遍历成交记录，filters与get_trades_page的过滤参数相同"""
+        cursor = None
+        while True:
+            page, cursor = self.get_trades_page(cursor=cursor, page_size=page_size, output=output, **filters)
+            if len(page):
+                yield page
+            if cursor is None:
+                break
+    
+    def iter_trades(self, page_size: int = DEFAULT_PAGE_SIZE, output: str = "record", **filters) -> Iterator[Any]:
+        """逐条遍历成交记录，内存中最多保留一页数据"""
+        for page in self.iter_trade_pages(page_size, output, **filters):
+            yield from page
+    
+    def _build_trade_filter(
+        self,
+        symbol: Optional[str],
+        strategy_name: Optional[str],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Tuple[str, list]:
+        """生成成交记录查询条件"""
+        clauses = ["1=1"]
+        params = []
         if symbol:
-            query += " AND symbol = ?"
+            clauses.append("symbol = ?")
             params.append(symbol)
+        if strategy_name:
+            clauses.append("strategy_name = ?")
+            params.append(strategy_name)
         if start_date:
-            query += " AND trade_time >= ?"
+            clauses.append("trade_time >= ?")
             params.append(start_date)
         if end_date:
-            query += " AND trade_time <= ?"
+            clauses.append("trade_time <= ?")
             params.append(end_date)
-        query += " ORDER BY trade_time DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-        
-        trades = []
-        for row in rows:
-            trades.append(TradeRecord(
+        return " AND ".join(clauses), params
+    
+    def _convert_trades(self, rows: List[tuple], output: str):
+        """把查询结果转换为指定格式"""
+        if output == "tuple":
+            return rows
+        if output == "numpy":
+            import numpy as np
+            return np.array(rows, dtype=TRADE_DTYPE).view(np.recarray)
+        return [
+            TradeRecord(
                 trade_id=row[1], symbol=row[2], direction=row[3], volume=row[4],
                 price=row[5], trade_time=datetime.fromisoformat(row[6]),
                 commission=row[7], strategy_name=row[8], order_id=row[9]
-            ))
-        return trades
+            )
+            for row in rows
+        ]
     
     def get_daily_pnl(self, date: datetime) -> float:
         """获取某日盈亏"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT COALESCE(SUM(pnl), 0) FROM positions 
-            WHERE DATE(position_time) = DATE(?)
-        ''', (date,))
-        result = cursor.fetchone()
-        conn.close()
+        conn = self.get_connection()
+        result = conn.execute(
+            'SELECT pnl FROM daily_stats WHERE date = ?', (date.strftime('%Y-%m-%d'),)
+        ).fetchone()
         return result[0] if result else 0.0
     
     def get_total_trades(self) -> int:
         """获取总交易次数"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM trades')
-        result = cursor.fetchone()
-        conn.close()
+        conn = self.get_connection()
+        result = conn.execute('SELECT COALESCE(SUM(trade_count), 0) FROM daily_stats').fetchone()
         return result[0] if result else 0
     
-    def get_win_rate(self) -> float:
-        """计算胜率"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) as wins,
-                COUNT(*) as total
-            FROM positions WHERE pnl != 0
-        ''')
-        result = cursor.fetchone()
-        conn.close()
-        if result and result[1] > 0:
+    def get_win_rate(self, start_date: datetime = None, end_date: datetime = None) -> float:
+        """计算胜率（盈亏不为零的持仓记录中盈利的比例）"""
+        clauses, params = self._build_date_filter(start_date, end_date)
+        conn = self.get_connection()
+        result = conn.execute(f'''
+            SELECT SUM(win_count), SUM(win_count + loss_count)
+            FROM daily_stats WHERE {clauses}
+        ''', params).fetchone()
+        if result and result[1]:
             return result[0] / result[1]
         return 0.0
     
+    def get_daily_stats(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
+        """获取每日汇总（按日期升序）"""
+        clauses, params = self._build_date_filter(start_date, end_date)
+        conn = self.get_connection()
+        rows = conn.execute(f'''
+            SELECT date, pnl, win_count, loss_count, trade_count, trade_volume, commission
+            FROM daily_stats WHERE {clauses} ORDER BY date
+        ''', params).fetchall()
+        keys = ("date", "pnl", "win_count", "loss_count", "trade_count", "trade_volume", "commission")
+        return [dict(zip(keys, row)) for row in rows]
+    
+    def _build_date_filter(self, start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[str, list]:
+        """生成daily_stats日期查询条件"""
+        clauses = ["1=1"]
+        params = []
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(start_date.strftime('%Y-%m-%d'))
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date.strftime('%Y-%m-%d'))
+        return " AND ".join(clauses), params
+    
     def clear_old_data(self, days_to_keep: int = 30):
-        """清理过期数据"""
-        conn = sqlite3.connect(self.db_path)
+        """清理过期数据：行情直接删除过期日分表，其余表按时间删除，最后增量回收空间
+        
+        K线不分表：每个合约每个周期每分钟最多一行，数据量比行情小几个数量级，按datetime索引删除开销很小；
+        图表和回测按(symbol, interval, datetime)跨多日查询，放在一张表中只需一次索引范围扫描
+        """
+        conn = self.get_connection()
         cursor = conn.cursor()
         cutoff_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        cutoff_date = cutoff_date.replace(day=cutoff_date.day - days_to_keep)
+        cutoff_date = cutoff_date - timedelta(days=days_to_keep)
+        cutoff_partition = self.get_tick_partition(cutoff_date)
+        
+        for table in self.get_tick_partitions():
+            if table < cutoff_partition:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+                with self._lock:
+                    self._tick_partitions.discard(table)
         
         cursor.execute('DELETE FROM trades WHERE trade_time < ?', (cutoff_date,))
         cursor.execute('DELETE FROM orders WHERE order_time < ?', (cutoff_date,))
@@ -338,9 +771,31 @@ class TradingDatabase:
         cursor.execute('DELETE FROM ticks WHERE datetime < ?', (cutoff_date,))
         cursor.execute('DELETE FROM bars WHERE datetime < ?', (cutoff_date,))
         cursor.execute('DELETE FROM account_flow WHERE record_time < ?', (cutoff_date,))
+        cursor.execute(
+            'DELETE FROM daily_stats WHERE date < ?', (cutoff_date.strftime('%Y-%m-%d'),)
+        )
         
         conn.commit()
-        conn.close()
+        
+        # auto_vacuum=INCREMENTAL时归还空闲页，其余模式下为空操作
+        cursor.execute('PRAGMA incremental_vacuum')
+        cursor.fetchall()
+
+# 全局数据库实例，首次使用时创建，避免导入模块时打开数据库
+_trading_db: Optional[TradingDatabase] = None
+_trading_db_lock = threading.Lock()
+
+def get_trading_db() -> TradingDatabase:
+    """获取全局数据库实例"""
+    global _trading_db
+    if _trading_db is None:
+        with _trading_db_lock:
+            if _trading_db is None:
+                _trading_db = TradingDatabase()
+    return _trading_db
 
-# 创建全局数据库实例
-trading_db = TradingDatabase()
\ No newline at end of file
+def __getattr__(name: str):
+    """兼容旧代码中的 from config.database import trading_db"""
+    if name == "trading_db":
+        return get_trading_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,366 @@
+"""
+Technical Indicators
+SMA/EMA/RSI/BOLL/MACD/ATR的批量计算（NumPy，回测和图表加载历史时使用）和O(1)流式更新（实盘逐根K线使用），
+两条路径按同一定义计算，结果在浮点误差范围内一致。流式对象可以先用load批量计算历史，再逐根update
+"""
+
+from collections import deque
+from math import nan, sqrt
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 约定：
+# - 输入为按时间正序的一维数组，输出与输入等长，预热期内为NaN
+# - EMA以前n个值的简单平均为初值，之后 ema = ema + alpha * (x - ema)，alpha = 2 / (n + 1)
+# - RSI和ATR使用Wilder平滑（alpha = 1 / n），从第二根K线开始计算变化量，第n根（序号n）起有值
+# - BOLL的标准差为总体标准差
+# - MACD柱为 dif - dea
+
+
+def _ewm(values: np.ndarray, alpha: float, window: int) -> np.ndarray:
+    """从第一个非NaN值开始，以前window个值的平均为初值做指数平滑"""
+    result = np.full(len(values), nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid) or len(values) - valid[0] < window:
+        return result
+
+    start = valid[0] + window - 1
+    seeded = values[start:].copy()
+    seeded[0] = values[valid[0]:start + 1].mean()
+
+    # 递推在pandas的Cython实现中完成，pandas较重，只在用到时导入
+    import pandas as pd
+    result[start:] = pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return result
+
+
+def sma(close: np.ndarray, window: int) -> np.ndarray:
+    """简单移动平均"""
+    return SMA(window).load(close)
+
+
+def ema(close: np.ndarray, window: int) -> np.ndarray:
+    """指数移动平均"""
+    return EMA(window).load(close)
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """相对强弱指标"""
+    return RSI(window).load(close)
+
+
+def boll(close: np.ndarray, window: int = 20, dev: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """布林带，返回(中轨, 上轨, 下轨)"""
+    return BOLL(window, dev).load(close)
+
+
+def macd(
+    close: np.ndarray,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD，返回(dif, dea, 柱)"""
+    return MACD(fast, slow, signal).load(close)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """平均真实波幅"""
+    return ATR(window).load(high, low, close)
+
+
+class SMA:
+    """简单移动平均的流式计算
+
+    维护窗口内的和，每次更新O(1)；每过window次用窗口内的值重新求和，避免长时间运行的累计误差。
+    """
+
+    __slots__ = ("window", "values", "total", "count")
+
+    def __init__(self, window: int):
+        self.window: int = window
+        self.values: Deque[float] = deque(maxlen=window)
+        self.total: float = 0.0
+        self.count: int = 0
+
+    def load(self, values: np.ndarray) -> np.ndarray:
+        """在新建的对象上批量计算整段序列，返回各位置的指标值，之后可继续逐根update"""
+        values = np.asarray(values, dtype=float)
+        result = np.full(len(values), nan)
+        if len(values) >= self.window:
+            result[self.window - 1:] = sliding_window_view(values, self.window).mean(axis=1)
+
+        self.values.extend(values[-self.window:].tolist())
+        self.total = sum(self.values)
+        self.count = len(values)
+        return result
+
+    def update(self, value: float) -> float:
+        """加入一根已完成K线的值，返回最新指标值"""
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        self.count += 1
+        if self.count % self.window == 0:
+            self.total = sum(self.values)
+        return self.get_value()
+
+    def peek(self, value: float) -> float:
+        """假设下一根K线的值为value时的指标值，不改变状态（用于正在形成的K线）"""
+        if len(self.values) < self.window - 1:
+            return nan
+        oldest = self.values[0] if len(self.values) == self.window else 0.0
+        return (self.total - oldest + value) / self.window
+
+    def get_value(self) -> float:
+        if len(self.values) < self.window:
+            return nan
+        return self.total / self.window
+
+
+class EMA:
+    """指数移动平均的流式计算"""
+
+    __slots__ = ("window", "alpha", "value", "seed")
+
+    def __init__(self, window: int, alpha: Optional[float] = None):
+        self.window: int = window
+        self.alpha: float = alpha if alpha is not None else 2 / (window + 1)
+        self.value: float = nan
+        self.seed: list = []
+
+    def load(self, values: np.ndarray) -> np.ndarray:
+        """在新建的对象上批量计算整段序列，返回各位置的指标值，之后可继续逐根update"""
+        values = np.asarray(values, dtype=float)
+        result = _ewm(values, self.alpha, self.window)
+
+        valid = values[~np.isnan(values)]
+        if len(valid) >= self.window:
+            self.value = float(result[-1])
+            self.seed = None
+        else:
+            self.seed = valid.tolist()
+        return result
+
+    def update(self, value: float) -> float:
+        """加入一根已完成K线的值，返回最新指标值，输入为NaN时忽略"""
+        if value != value:
+            return self.value
+
+        if self.seed is not None:
+            self.seed.append(value)
+            if len(self.seed) == self.window:
+                self.value = sum(self.seed) / self.window
+                self.seed = None
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def peek(self, value: float) -> float:
+        """假设下一根K线的值为value时的指标值，不改变状态"""
+        if value != value:
+            return self.value
+        if self.seed is not None:
+            if len(self.seed) == self.window - 1:
+                return (sum(self.seed) + value) / self.window
+            return nan
+        return self.value + self.alpha * (value - self.value)
+
+
+class RSI:
+    """相对强弱指标的流式计算"""
+
+    __slots__ = ("prev", "gain", "loss")
+
+    def __init__(self, window: int = 14):
+        self.prev: float = nan
+        self.gain: EMA = EMA(window, 1 / window)
+        self.loss: EMA = EMA(window, 1 / window)
+
+    def load(self, values: np.ndarray) -> np.ndarray:
+        """在新建的对象上批量计算整段序列，返回各位置的指标值，之后可继续逐根update"""
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return np.full(0, nan)
+
+        change = np.diff(values, prepend=nan)
+        up = np.where(change > 0, change, 0.0)
+        down = np.where(change < 0, -change, 0.0)
+        up[0] = down[0] = nan
+        gain = self.gain.load(up)
+        loss = self.loss.load(down)
+        self.prev = float(values[-1])
+
+        total = gain + loss
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = np.where(total > 0, 100 * gain / total, 50.0)
+        result[np.isnan(total)] = nan
+        return result
+
+    def update(self, value: float) -> float:
+        prev, self.prev = self.prev, value
+        if prev != prev:
+            return nan
+        change = value - prev
+        return self.calculate(self.gain.update(max(change, 0.0)), self.loss.update(max(-change, 0.0)))
+
+    def peek(self, value: float) -> float:
+        if self.prev != self.prev:
+            return nan
+        change = value - self.prev
+        return self.calculate(self.gain.peek(max(change, 0.0)), self.loss.peek(max(-change, 0.0)))
+
+    @staticmethod
+    def calculate(gain: float, loss: float) -> float:
+        total = gain + loss
+        if total != total:
+            return nan
+        return 100 * gain / total if total > 0 else 50.0
+
+
+class BOLL:
+    """布林带的流式计算
+
+    用滑动窗口的Welford公式更新均值和平方差和，每过window次用窗口内的值重新计算。
+    """
+
+    __slots__ = ("window", "dev", "values", "mean", "m2", "count")
+
+    def __init__(self, window: int = 20, dev: float = 2):
+        self.window: int = window
+        self.dev: float = dev
+        self.values: Deque[float] = deque(maxlen=window)
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.count: int = 0
+
+    def load(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """在新建的对象上批量计算整段序列，返回各位置的(中轨, 上轨, 下轨)，之后可继续逐根update"""
+        values = np.asarray(values, dtype=float)
+        mid = np.full(len(values), nan)
+        std = np.full(len(values), nan)
+        if len(values) >= self.window:
+            windows = sliding_window_view(values, self.window)
+            mid[self.window - 1:] = windows.mean(axis=1)
+            std[self.window - 1:] = windows.std(axis=1)
+
+        self.values.extend(values[-self.window:].tolist())
+        self.count = len(values)
+        if len(self.values) == self.window:
+            self.resync()
+        return mid, mid + self.dev * std, mid - self.dev * std
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        """加入一根已完成K线的值，返回(中轨, 上轨, 下轨)"""
+        full = len(self.values) == self.window
+        if full:
+            self.mean, self.m2 = self.slide(self.values[0], value)
+        self.values.append(value)
+
+        self.count += 1
+        if (not full and len(self.values) == self.window) or self.count % self.window == 0:
+            self.resync()
+        return self.get_value()
+
+    def peek(self, value: float) -> Tuple[float, float, float]:
+        """假设下一根K线的值为value时的指标值，不改变状态"""
+        if len(self.values) == self.window:
+            mean, m2 = self.slide(self.values[0], value)
+        elif len(self.values) == self.window - 1:
+            window = np.array([*self.values, value])
+            mean, m2 = window.mean(), window.var() * self.window
+        else:
+            return nan, nan, nan
+        return self.calculate(mean, m2)
+
+    def slide(self, old: float, new: float) -> Tuple[float, float]:
+        """窗口中old移出、new移入后的均值和平方差和"""
+        mean = self.mean + (new - old) / self.window
+        m2 = self.m2 + (new - old) * (new - mean + old - self.mean)
+        return mean, m2
+
+    def resync(self) -> None:
+        """用窗口内的值重新计算"""
+        window = np.array(self.values)
+        self.mean = window.mean()
+        self.m2 = window.var() * self.window
+
+    def get_value(self) -> Tuple[float, float, float]:
+        if len(self.values) < self.window:
+            return nan, nan, nan
+        return self.calculate(self.mean, self.m2)
+
+    def calculate(self, mean: float, m2: float) -> Tuple[float, float, float]:
+        width = self.dev * sqrt(max(m2 / self.window, 0.0))
+        return mean, mean + width, mean - width
+
+
+class MACD:
+    """MACD的流式计算"""
+
+    __slots__ = ("fast", "slow", "signal")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast: EMA = EMA(fast)
+        self.slow: EMA = EMA(slow)
+        self.signal: EMA = EMA(signal)
+
+    def load(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """在新建的对象上批量计算整段序列，返回各位置的(dif, dea, 柱)，之后可继续逐根update"""
+        values = np.asarray(values, dtype=float)
+        dif = self.fast.load(values) - self.slow.load(values)
+        dea = self.signal.load(dif)
+        return dif, dea, dif - dea
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        """加入一根已完成K线的值，返回(dif, dea, 柱)"""
+        dif = self.fast.update(value) - self.slow.update(value)
+        dea = self.signal.update(dif)
+        return dif, dea, dif - dea
+
+    def peek(self, value: float) -> Tuple[float, float, float]:
+        dif = self.fast.peek(value) - self.slow.peek(value)
+        dea = self.signal.peek(dif)
+        return dif, dea, dif - dea
+
+
+class ATR:
+    """平均真实波幅的流式计算"""
+
+    __slots__ = ("prev_close", "average")
+
+    def __init__(self, window: int = 14):
+        self.prev_close: float = nan
+        self.average: EMA = EMA(window, 1 / window)
+
+    def load(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """在新建的对象上批量计算整段序列，返回各位置的指标值，之后可继续逐根update"""
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        if not len(close):
+            return np.full(0, nan)
+
+        prev_close = np.concatenate([[nan], close[:-1]])
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        true_range[0] = nan
+        self.prev_close = float(close[-1])
+        return self.average.load(true_range)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        true_range = self.get_true_range(high, low)
+        self.prev_close = close
+        return self.average.update(true_range)
+
+    def peek(self, high: float, low: float, close: float) -> float:
+        return self.average.peek(self.get_true_range(high, low))
+
+    def get_true_range(self, high: float, low: float) -> float:
+        prev = self.prev_close
+        if prev != prev:
+            return nan
+        return max(high - low, abs(high - prev), abs(low - prev))
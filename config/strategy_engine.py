@@ -1,12 +1,17 @@
 
 from vnpy.trader.engine import BaseEngine, EventEngine
 from vnpy.trader.event import EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_POSITION
+from vnpy.trader.constant import Direction, Offset, OrderType
+from vnpy.trader.object import OrderRequest
 from vnpy.event import Event
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any
 import json
 import os
+import traceback
 from datetime import datetime
 
+from config.strategy_template import StrategyTemplate, get_strategy_class
+
 APP_NAME = "StrategyEngine"
 
 class StrategyEngine(BaseEngine):
@@ -15,11 +20,16 @@ class StrategyEngine(BaseEngine):
     def __init__(self, main_engine, event_engine: EventEngine):
         super().__init__(main_engine, event_engine, APP_NAME)
         
-        self.strategies: Dict[str, Dict[str, Any]] = {}
-        self.active_strategies: Dict[str, Dict[str, Any]] = {}
+        self.strategies: Dict[str, StrategyTemplate] = {}
+        self.active_strategies: Dict[str, StrategyTemplate] = {}
         self.strategy_data: Dict[str, Dict[str, Any]] = {}
         self.strategy_results: Dict[str, List[Dict[str, Any]]] = {}
         
+        # 事件分发表：合约 -> 订阅该合约的运行中策略，委托号 -> 发出委托的策略
+        # 合约按策略配置中的写法索引，代码和vt_symbol两种写法都可以
+        self.symbol_strategies: Dict[str, List[StrategyTemplate]] = {}
+        self.order_strategies: Dict[str, StrategyTemplate] = {}
+        
         self.data_path = os.path.join(os.path.dirname(__file__), "..", "data")
         os.makedirs(self.data_path, exist_ok=True)
 
@@ -42,87 +52,142 @@ class StrategyEngine(BaseEngine):
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
 
     def process_tick_event(self, event: Event):
-        """处理行情事件"""
+        """处理行情事件，只分发给订阅了该合约的策略"""
         tick = event.data
-        for strategy in self.active_strategies.values():
-            if strategy.get("symbols") and tick.symbol in strategy["symbols"]:
-                self.on_strategy_tick(strategy, tick)
+        for strategy in self.get_symbol_strategies(tick.symbol, tick.vt_symbol):
+            self.on_strategy_tick(strategy, tick)
 
     def process_order_event(self, event: Event):
         """处理订单事件"""
         order = event.data
-        for strategy in self.active_strategies.values():
-            if strategy.get("orders") and order.order_id in strategy["orders"]:
-                self.on_strategy_order(strategy, order)
+        strategy = self.order_strategies.get(order.vt_orderid)
+        if strategy:
+            self.on_strategy_order(strategy, order)
 
     def process_trade_event(self, event: Event):
         """处理成交事件"""
         trade = event.data
-        for strategy in self.active_strategies.values():
-            if strategy.get("trades") and trade.order_id in strategy.get("orders", []):
-                self.on_strategy_trade(strategy, trade)
+        strategy = self.order_strategies.get(trade.vt_orderid)
+        if strategy:
+            self.on_strategy_trade(strategy, trade)
 
     def process_position_event(self, event: Event):
         """处理持仓事件"""
         position = event.data
-        for strategy in self.active_strategies.values():
-            if strategy.get("positions") and position.symbol in strategy["positions"]:
-                self.on_strategy_position(strategy, position)
-
-    def add_strategy(self, name: str, strategy_type: str, parameters: Dict[str, Any], symbols: List[str]):
-        """添加策略"""
+        for strategy in self.get_symbol_strategies(position.symbol, position.vt_symbol):
+            self.on_strategy_position(strategy, position)
+
+    def get_symbol_strategies(self, symbol: str, vt_symbol: str) -> List[StrategyTemplate]:
+        """订阅了合约的运行中策略"""
+        strategies = self.symbol_strategies.get(symbol)
+        vt_strategies = self.symbol_strategies.get(vt_symbol)
+        if not vt_strategies:
+            return strategies or []
+        if not strategies:
+            return vt_strategies
+        # 同时有按代码和按vt_symbol订阅的策略时合并，同一策略只分发一次
+        return list({id(strategy): strategy for strategy in strategies + vt_strategies}.values())
+
+    def index_strategy(self, strategy: StrategyTemplate):
+        """把策略加入行情分发表"""
+        # 分发表中的列表只整体替换不原地修改，分发过程中启停策略不影响正在遍历的列表
+        for symbol in dict.fromkeys(strategy.symbols):
+            self.symbol_strategies[symbol] = self.symbol_strategies.get(symbol, []) + [strategy]
+
+    def unindex_strategy(self, strategy: StrategyTemplate):
+        """把策略移出行情分发表"""
+        for symbol in dict.fromkeys(strategy.symbols):
+            strategies = [s for s in self.symbol_strategies.get(symbol, []) if s is not strategy]
+            if strategies:
+                self.symbol_strategies[symbol] = strategies
+            else:
+                self.symbol_strategies.pop(symbol, None)
+
+    def add_strategy_order(self, strategy_id: str, vt_orderid: str):
+        """记录策略发出的委托，之后该委托的订单和成交事件分发给策略
+
+        策略停止后仍然收到已发委托的回报，停止前发出的委托成交时持仓和绩效照常更新
+        """
+        strategy = self.strategies.get(strategy_id)
+        if not strategy:
+            return
+        strategy.orderids.add(vt_orderid)
+        self.order_strategies[vt_orderid] = strategy
+
+    def create_strategy(self, data: Dict[str, Any]) -> StrategyTemplate:
+        """按保存的策略信息创建策略对象"""
+        parameters = data.get("parameters", {})
+        strategy_class = get_strategy_class(data.get("class_name", ""), parameters)
+        strategy = strategy_class(
+            self, data["id"], data["name"], data.get("type", ""), parameters,
+            data.get("symbols", []), data.get("created_at", "")
+        )
+        strategy.performance.from_dict(data.get("performance", {}))
+        strategy.trades.extend(data.get("trades", []))
+        return strategy
+
+    def add_strategy(self, name: str, strategy_type: str, parameters: Dict[str, Any], symbols: List[str],
+                     class_name: str = ""):
+        """添加策略，未指定策略类时按参数推断"""
         strategy_id = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        strategy = {
+        self.strategies[strategy_id] = self.create_strategy({
             "id": strategy_id,
             "name": name,
             "type": strategy_type,
+            "class_name": class_name,
             "parameters": parameters,
-            "symbols": symbols,
-            "status": "stopped",
-            "created_at": datetime.now().isoformat(),
-            "orders": [],
-            "trades": [],
-            "positions": {},
-            "performance": {
-                "total_trades": 0,
-                "win_rate": 0.0,
-                "profit": 0.0,
-                "max_drawdown": 0.0
-            }
-        }
-        self.strategies[strategy_id] = strategy
+            "symbols": symbols
+        })
         self.save_strategies()
         return strategy_id
 
     def start_strategy(self, strategy_id: str):
         """启动策略"""
-        if strategy_id in self.strategies:
-            self.strategies[strategy_id]["status"] = "running"
-            self.active_strategies[strategy_id] = self.strategies[strategy_id]
-            self.write_log(f"策略 {strategy_id} 已启动")
+        strategy = self.strategies.get(strategy_id)
+        if not strategy or strategy_id in self.active_strategies:
+            return
+
+        if not strategy.inited:
+            if not self.call_strategy_func(strategy, strategy.on_init):
+                return
+            strategy.inited = True
+
+        strategy.trading = True
+        self.active_strategies[strategy_id] = strategy
+        self.index_strategy(strategy)
+        self.call_strategy_func(strategy, strategy.on_start)
+        self.write_log(f"策略 {strategy_id} 已启动")
 
     def stop_strategy(self, strategy_id: str):
-        """停止策略"""
-        if strategy_id in self.active_strategies:
-            self.strategies[strategy_id]["status"] = "stopped"
-            del self.active_strategies[strategy_id]
-            self.write_log(f"策略 {strategy_id} 已停止")
+        """停止策略，撤销未结束的委托"""
+        strategy = self.active_strategies.pop(strategy_id, None)
+        if not strategy:
+            return
+
+        self.unindex_strategy(strategy)
+        self.call_strategy_func(strategy, strategy.on_stop)
+        strategy.cancel_all()
+        strategy.trading = False
+        self.write_log(f"策略 {strategy_id} 已停止")
 
     def remove_strategy(self, strategy_id: str):
         """移除策略"""
         self.stop_strategy(strategy_id)
-        if strategy_id in self.strategies:
-            del self.strategies[strategy_id]
+        strategy = self.strategies.pop(strategy_id, None)
+        if strategy:
+            for vt_orderid in strategy.orderids:
+                if self.order_strategies.get(vt_orderid) is strategy:
+                    del self.order_strategies[vt_orderid]
             self.save_strategies()
             self.write_log(f"策略 {strategy_id} 已移除")
 
     def get_strategies(self) -> List[Dict[str, Any]]:
         """获取所有策略"""
-        return list(self.strategies.values())
+        return [strategy.get_data() for strategy in self.strategies.values()]
 
     def get_active_strategies(self) -> List[Dict[str, Any]]:
         """获取活跃策略"""
-        return list(self.active_strategies.values())
+        return [strategy.get_data() for strategy in self.active_strategies.values()]
 
     def load_strategies(self):
         """加载策略配置"""
@@ -130,7 +195,11 @@ class StrategyEngine(BaseEngine):
         if os.path.exists(strategies_file):
             try:
                 with open(strategies_file, 'r', encoding='utf-8') as f:
-                    self.strategies = json.load(f)
+                    data = json.load(f)
+                self.strategies = {
+                    strategy_id: self.create_strategy(strategy_data)
+                    for strategy_id, strategy_data in data.items()
+                }
             except Exception as e:
                 self.write_log(f"加载策略配置失败: {e}")
 
@@ -138,53 +207,93 @@ class StrategyEngine(BaseEngine):
         """保存策略配置"""
         strategies_file = os.path.join(self.data_path, "strategies.json")
         try:
+            data = {strategy_id: strategy.get_data() for strategy_id, strategy in self.strategies.items()}
             with open(strategies_file, 'w', encoding='utf-8') as f:
-                json.dump(self.strategies, f, indent=2, ensure_ascii=False)
+                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
         except Exception as e:
             self.write_log(f"保存策略配置失败: {e}")
 
-    def on_strategy_tick(self, strategy: Dict[str, Any], tick):
+    def call_strategy_func(self, strategy: StrategyTemplate, func: Callable, *args) -> bool:
+        """调用策略回调，策略代码出错时记录日志并停止策略，避免影响事件引擎和其他策略"""
+        try:
+            func(*args)
+            return True
+        except Exception:
+            self.write_log(f"策略 {strategy.strategy_id} 触发异常已停止\n{traceback.format_exc()}")
+            if strategy.strategy_id in self.active_strategies:
+                self.unindex_strategy(self.active_strategies.pop(strategy.strategy_id))
+            strategy.trading = False
+            return False
+
+    def send_order(self, strategy: StrategyTemplate, vt_symbol: str, direction: Direction, offset: Offset,
+                   price: float, volume: float) -> List[str]:
+        """策略下单，经MainEngine发出限价委托
+
+        上期所和能源中心平今仓需要用平今指令，委托先经过开平转换，一笔委托可能拆成平今和平昨两笔
+        """
+        contract = self.main_engine.get_contract(vt_symbol)
+        if not contract:
+            self.write_log(f"策略 {strategy.strategy_id} 下单失败，找不到合约 {vt_symbol}")
+            return []
+
+        req = OrderRequest(
+            symbol=contract.symbol,
+            exchange=contract.exchange,
+            direction=direction,
+            type=OrderType.LIMIT,
+            volume=volume,
+            price=price,
+            offset=offset,
+            reference=f"{APP_NAME}_{strategy.strategy_id}"
+        )
+        vt_orderids = []
+        for converted in self.main_engine.convert_order_request(req, contract.gateway_name, lock=False):
+            vt_orderid = self.main_engine.send_order(converted, contract.gateway_name)
+            if not vt_orderid:
+                continue
+            self.main_engine.update_order_request(converted, vt_orderid, contract.gateway_name)
+            self.add_strategy_order(strategy.strategy_id, vt_orderid)
+            vt_orderids.append(vt_orderid)
+        return vt_orderids
+
+    def cancel_order(self, strategy: StrategyTemplate, vt_orderid: str):
+        """策略撤单"""
+        order = self.main_engine.get_order(vt_orderid)
+        if not order:
+            strategy.active_orderids.discard(vt_orderid)
+            return
+        self.main_engine.cancel_order(order.create_cancel_request(), order.gateway_name)
+
+    def on_strategy_tick(self, strategy: StrategyTemplate, tick):
         """处理策略行情"""
-        pass
+        self.call_strategy_func(strategy, strategy.on_tick, tick)
 
-    def on_strategy_order(self, strategy: Dict[str, Any], order):
+    def on_strategy_order(self, strategy: StrategyTemplate, order):
         """处理策略订单"""
-        pass
-
-    def on_strategy_trade(self, strategy: Dict[str, Any], trade):
-        """处理策略成交"""
-        strategy["trades"].append({
-            "trade_id": trade.trade_id,
-            "symbol": trade.symbol,
-            "direction": trade.direction,
-            "volume": trade.volume,
-            "price": trade.price,
-            "time": datetime.now().isoformat()
-        })
-        strategy["performance"]["total_trades"] += 1
-        self.calculate_performance(strategy)
+        strategy.update_order(order)
+        self.call_strategy_func(strategy, strategy.on_order, order)
+
+    def on_strategy_trade(self, strategy: StrategyTemplate, trade):
+        """处理策略成交，持仓和绩效按成交增量更新"""
+        contract = self.main_engine.get_contract(trade.vt_symbol)
+        size = contract.size if contract else 1
+        strategy.update_trade(trade, size)
+        self.call_strategy_func(strategy, strategy.on_trade, trade)
 
-    def on_strategy_position(self, strategy: Dict[str, Any], position):
+    def on_strategy_position(self, strategy: StrategyTemplate, position):
         """处理策略持仓"""
-        strategy["positions"][position.symbol] = {
+        strategy.positions[position.symbol] = {
             "volume": position.volume,
             "price": position.price,
-            "direction": position.direction
+            "direction": position.direction.value if position.direction else ""
         }
 
-    def calculate_performance(self, strategy: Dict[str, Any]):
-        """计算策略绩效"""
-        trades = strategy["trades"]
-        if len(trades) > 0:
-            profitable_trades = [t for t in trades if t.get("profit", 0) > 0]
-            strategy["performance"]["win_rate"] = len(profitable_trades) / len(trades)
-
     def backtest_strategy(self, strategy_id: str, start_date: str, end_date: str, data_source: str = "csv") -> Dict[str, Any]:
         """回测策略"""
         if strategy_id not in self.strategies:
             return {"error": "策略不存在"}
         
-        strategy = self.strategies[strategy_id]
+        strategy = self.strategies[strategy_id].get_data()
         symbols = strategy["symbols"]
         parameters = strategy["parameters"]
         
@@ -210,6 +319,8 @@ class StrategyEngine(BaseEngine):
                 data = self.load_csv_data(symbol, start_date, end_date)
             elif data_source == "database":
                 data = self.load_database_data(symbol, start_date, end_date)
+            elif data_source == "archive":
+                data = self.load_archive_data(symbol, start_date, end_date)
             else:
                 data = []
             
@@ -241,8 +352,32 @@ class StrategyEngine(BaseEngine):
         # 这里可以添加数据库查询逻辑
         return []
 
+    def load_archive_data(self, symbol: str, start_date: str, end_date: str, interval: str = "1m"):
+        """从列式存档加载K线，返回结构化数组（字段与CSV数据一致）
+
+        存档中的datetime为纳秒时间戳，转换为当地时间的datetime64[ns]，与CSV读入的时间一致
+        """
+        import numpy as np
+        from config.columnar_store import ColumnarStore, parse_date_range
+        
+        try:
+            start, end = parse_date_range(start_date, end_date)
+            bars = ColumnarStore().load_bars(symbol, interval, start, end)
+            dtype = np.dtype([
+                (name, "M8[ns]" if name == "datetime" else bars.dtype[name]) for name in bars.dtype.names
+            ])
+            data = bars.astype(dtype)
+            data["datetime"] += np.timedelta64(int(start.astimezone().utcoffset().total_seconds()), "s")
+            return data
+        except Exception as e:
+            self.write_log(f"加载存档数据失败: {e}")
+            return []
+
     def run_backtest(self, strategy: Dict[str, Any], historical_data: Dict[str, List[Dict[str, Any]]], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """运行回测"""
+        import pandas as pd
+        
+        # CSV数据的时间为pandas Timestamp，存档数据为numpy datetime64，统一为Timestamp
         trades = []
         positions = {}
         total_profit = 0
@@ -250,7 +385,7 @@ class StrategyEngine(BaseEngine):
         
         # 模拟回测逻辑
         for symbol, data in historical_data.items():
-            if not data:
+            if len(data) == 0:
                 continue
             
             # 这里可以添加具体的策略逻辑
@@ -262,7 +397,7 @@ class StrategyEngine(BaseEngine):
                         "direction": "BUY",
                         "volume": parameters.get("trade_volume", 1),
                         "price": tick["close"],
-                        "time": tick["datetime"]
+                        "time": pd.Timestamp(tick["datetime"])
                     }
                     trades.append(trade)
                 elif self.should_sell(tick, parameters):
@@ -271,7 +406,7 @@ class StrategyEngine(BaseEngine):
                         "direction": "SELL",
                         "volume": parameters.get("trade_volume", 1),
                         "price": tick["close"],
-                        "time": tick["datetime"]
+                        "time": pd.Timestamp(tick["datetime"])
                     }
                     trades.append(trade)
         
@@ -285,8 +420,8 @@ class StrategyEngine(BaseEngine):
         
         return {
             "strategy_id": strategy["id"],
-            "start_date": min(d["datetime"] for data in historical_data.values() for d in data),
-            "end_date": max(d["datetime"] for data in historical_data.values() for d in data),
+            "start_date": pd.Timestamp(min(d["datetime"] for data in historical_data.values() for d in data)),
+            "end_date": pd.Timestamp(max(d["datetime"] for data in historical_data.values() for d in data)),
             "total_trades": len(trades),
             "total_profit": total_profit,
             "win_rate": win_rate,
@@ -311,7 +446,9 @@ class StrategyEngine(BaseEngine):
         backtest_file = os.path.join(self.data_path, f"backtest_{strategy_id}.json")
         try:
             with open(backtest_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+                # 存档数据为numpy结构化数组，其标量通过item()转换为Python类型
+                json.dump(result, f, indent=2, ensure_ascii=False,
+                          default=lambda o: o.item() if hasattr(o, "item") else str(o))
         except Exception as e:
             self.write_log(f"保存回测结果失败: {e}")
 
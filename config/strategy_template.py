@@ -0,0 +1,398 @@
+"""
+Strategy Template
+策略模板和增量绩效统计。StrategyEngine为每个策略创建一个模板对象，行情、委托、成交事件通过回调
+分发给策略，策略通过buy/sell/short/cover下单，委托经StrategyEngine交给MainEngine发出
+"""
+
+from collections import deque
+from datetime import datetime
+from math import isnan
+from typing import Any, Deque, Dict, List, Optional, Set, Type
+
+from vnpy.trader.constant import Direction, Offset
+from vnpy.trader.object import BarData, OrderData, TickData, TradeData
+from vnpy.trader.utility import BarGenerator
+
+from config.indicators import SMA, RSI, BOLL, MACD
+
+# 内存中保留的最近成交数，绩效按成交增量更新，不依赖完整成交记录
+MAX_TRADES = 1000
+
+
+class StrategyPerformance:
+    """策略绩效，每笔成交O(1)更新
+
+    按合约记录净持仓和持仓均价，平仓部分按均价计算已实现盈亏；
+    胜率为盈利的平仓成交占全部平仓成交的比例，最大回撤按已实现盈亏曲线计算
+    """
+
+    __slots__ = ("total_trades", "closed_trades", "win_trades", "profit", "peak", "max_drawdown", "holdings")
+
+    def __init__(self):
+        self.total_trades: int = 0
+        self.closed_trades: int = 0
+        self.win_trades: int = 0
+        self.profit: float = 0.0
+        self.peak: float = 0.0
+        self.max_drawdown: float = 0.0
+        # 合约 -> [净持仓, 持仓均价]
+        self.holdings: Dict[str, List[float]] = {}
+
+    def update_trade(self, vt_symbol: str, direction: Direction, price: float, volume: float, size: float = 1) -> float:
+        """记录一笔成交，返回该笔成交的已实现盈亏，成交量为0时忽略"""
+        if not volume:
+            return 0.0
+        self.total_trades += 1
+        signed = volume if direction == Direction.LONG else -volume
+
+        holding = self.holdings.setdefault(vt_symbol, [0.0, 0.0])
+        pos, cost = holding
+        new_pos = pos + signed
+
+        if not pos or (pos > 0) == (signed > 0):
+            # 开仓或加仓，更新持仓均价
+            holding[0] = new_pos
+            holding[1] = (cost * abs(pos) + price * volume) / abs(new_pos)
+            return 0.0
+
+        # 平仓，超出原持仓的部分按成交价反向开仓
+        closed = min(abs(pos), volume)
+        pnl = (price - cost) * closed * size if pos > 0 else (cost - price) * closed * size
+        holding[0] = new_pos
+        if not new_pos:
+            holding[1] = 0.0
+        elif (new_pos > 0) != (pos > 0):
+            holding[1] = price
+
+        self.closed_trades += 1
+        if pnl > 0:
+            self.win_trades += 1
+        self.profit += pnl
+        self.peak = max(self.peak, self.profit)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.profit)
+        return pnl
+
+    @property
+    def win_rate(self) -> float:
+        return self.win_trades / self.closed_trades if self.closed_trades else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_trades": self.total_trades,
+            "win_rate": self.win_rate,
+            "profit": self.profit,
+            "max_drawdown": self.max_drawdown,
+            "closed_trades": self.closed_trades,
+            "win_trades": self.win_trades,
+            "peak": self.peak
+        }
+
+    def from_dict(self, data: Dict[str, Any]):
+        """恢复保存的统计值，持仓均价不保存，重启后从空仓开始"""
+        self.total_trades = int(data.get("total_trades", 0))
+        self.closed_trades = int(data.get("closed_trades", 0))
+        self.win_trades = int(data.get("win_trades", 0))
+        self.profit = float(data.get("profit", 0.0))
+        self.peak = float(data.get("peak", max(self.profit, 0.0)))
+        self.max_drawdown = float(data.get("max_drawdown", 0.0))
+
+
+class StrategyTemplate:
+    """策略模板
+
+    子类重写on_init/on_start/on_stop/on_tick/on_bar/on_order/on_trade，
+    默认的on_tick把行情按合约合成1分钟K线后调用on_bar
+    """
+
+    __slots__ = (
+        "engine", "strategy_id", "name", "strategy_type", "parameters", "symbols", "created_at",
+        "inited", "trading", "pos", "orderids", "active_orderids", "performance", "trades",
+        "positions", "bar_generators"
+    )
+
+    # 用于从参数推断策略类，见get_strategy_class
+    parameter_keys: tuple = ()
+
+    def __init__(self, engine: Any, strategy_id: str, name: str, strategy_type: str,
+                 parameters: Dict[str, Any], symbols: List[str], created_at: str = ""):
+        self.engine = engine
+        self.strategy_id: str = strategy_id
+        self.name: str = name
+        self.strategy_type: str = strategy_type
+        self.parameters: Dict[str, Any] = parameters
+        self.symbols: List[str] = symbols
+        self.created_at: str = created_at or datetime.now().isoformat()
+
+        self.inited: bool = False
+        self.trading: bool = False
+        # 合约 -> 策略净持仓，按策略自己的成交计算
+        self.pos: Dict[str, float] = {}
+        # 本次运行发出的全部委托和其中未结束的委托
+        self.orderids: Set[str] = set()
+        self.active_orderids: Set[str] = set()
+        self.performance = StrategyPerformance()
+        self.trades: Deque[Dict[str, Any]] = deque(maxlen=MAX_TRADES)
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.bar_generators: Dict[str, BarGenerator] = {}
+
+    @property
+    def status(self) -> str:
+        return "running" if self.trading else "stopped"
+
+    def get_parameter(self, key: str, default: Any) -> Any:
+        """按默认值的类型读取参数，参数缺失或格式错误时使用默认值"""
+        try:
+            return type(default)(self.parameters.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def on_init(self):
+        """策略初始化，首次启动前调用一次"""
+        pass
+
+    def on_start(self):
+        """策略启动"""
+        pass
+
+    def on_stop(self):
+        """策略停止"""
+        pass
+
+    def on_tick(self, tick: TickData):
+        """行情推送，默认合成1分钟K线"""
+        generator = self.bar_generators.get(tick.vt_symbol)
+        if not generator:
+            generator = self.bar_generators[tick.vt_symbol] = BarGenerator(self.on_bar)
+        generator.update_tick(tick)
+
+    def on_bar(self, bar: BarData):
+        """K线推送"""
+        pass
+
+    def on_order(self, order: OrderData):
+        """委托推送"""
+        pass
+
+    def on_trade(self, trade: TradeData):
+        """成交推送，调用前pos和performance已更新"""
+        pass
+
+    def update_order(self, order: OrderData):
+        """维护未结束的委托"""
+        if order.is_active():
+            self.active_orderids.add(order.vt_orderid)
+        else:
+            self.active_orderids.discard(order.vt_orderid)
+
+    def update_trade(self, trade: TradeData, size: float = 1) -> float:
+        """按成交更新持仓、绩效和最近成交记录，返回已实现盈亏"""
+        volume = trade.volume if trade.direction == Direction.LONG else -trade.volume
+        self.pos[trade.vt_symbol] = self.pos.get(trade.vt_symbol, 0) + volume
+
+        pnl = self.performance.update_trade(trade.vt_symbol, trade.direction, trade.price, trade.volume, size)
+        self.trades.append({
+            "tradeid": trade.vt_tradeid,
+            "orderid": trade.vt_orderid,
+            "symbol": trade.vt_symbol,
+            "direction": trade.direction.value if trade.direction else "",
+            "offset": trade.offset.value,
+            "volume": trade.volume,
+            "price": trade.price,
+            "profit": pnl,
+            "time": trade.datetime.isoformat() if trade.datetime else datetime.now().isoformat()
+        })
+        return pnl
+
+    def buy(self, vt_symbol: str, price: float, volume: float) -> List[str]:
+        """买入开仓"""
+        return self.send_order(vt_symbol, Direction.LONG, Offset.OPEN, price, volume)
+
+    def sell(self, vt_symbol: str, price: float, volume: float) -> List[str]:
+        """卖出平仓"""
+        return self.send_order(vt_symbol, Direction.SHORT, Offset.CLOSE, price, volume)
+
+    def short(self, vt_symbol: str, price: float, volume: float) -> List[str]:
+        """卖出开仓"""
+        return self.send_order(vt_symbol, Direction.SHORT, Offset.OPEN, price, volume)
+
+    def cover(self, vt_symbol: str, price: float, volume: float) -> List[str]:
+        """买入平仓"""
+        return self.send_order(vt_symbol, Direction.LONG, Offset.CLOSE, price, volume)
+
+    def send_order(self, vt_symbol: str, direction: Direction, offset: Offset, price: float, volume: float) -> List[str]:
+        """发出限价委托，只在运行中有效"""
+        if not self.trading:
+            return []
+        vt_orderids = self.engine.send_order(self, vt_symbol, direction, offset, price, volume)
+        self.orderids.update(vt_orderids)
+        self.active_orderids.update(vt_orderids)
+        return vt_orderids
+
+    def cancel_order(self, vt_orderid: str):
+        """撤销委托"""
+        self.engine.cancel_order(self, vt_orderid)
+
+    def cancel_all(self):
+        """撤销全部未结束的委托"""
+        for vt_orderid in list(self.active_orderids):
+            self.cancel_order(vt_orderid)
+
+    def set_target_pos(self, vt_symbol: str, target: float, price: float):
+        """把净持仓调整到目标值，有未结束的委托时先撤单，下一根K线再调整"""
+        if self.active_orderids:
+            self.cancel_all()
+            return
+
+        pos = self.pos.get(vt_symbol, 0)
+        if target == pos:
+            return
+        if target > pos:
+            if pos < 0:
+                self.cover(vt_symbol, price, min(-pos, target - pos))
+            if target > 0:
+                self.buy(vt_symbol, price, target - max(pos, 0))
+        else:
+            if pos > 0:
+                self.sell(vt_symbol, price, min(pos, pos - target))
+            if target < 0:
+                self.short(vt_symbol, price, min(pos, 0) - target)
+
+    def write_log(self, message: str):
+        self.engine.write_log(f"[{self.name}] {message}")
+
+    def get_data(self) -> Dict[str, Any]:
+        """策略信息，界面显示和保存使用"""
+        return {
+            "id": self.strategy_id,
+            "name": self.name,
+            "type": self.strategy_type,
+            "class_name": type(self).__name__,
+            "parameters": self.parameters,
+            "symbols": self.symbols,
+            "status": self.status,
+            "created_at": self.created_at,
+            "pos": dict(self.pos),
+            "trades": list(self.trades),
+            "positions": self.positions,
+            "performance": self.performance.to_dict()
+        }
+
+
+class DoubleMaStrategy(StrategyTemplate):
+    """双均线策略：快线上穿慢线做多，下穿做空"""
+
+    __slots__ = ("fast", "slow", "last_diff")
+
+    parameter_keys = ("fast_ma_period", "slow_ma_period")
+
+    def on_init(self):
+        self.fast = SMA(self.get_parameter("fast_ma_period", 5))
+        self.slow = SMA(self.get_parameter("slow_ma_period", 20))
+        self.last_diff = float("nan")
+
+    def on_bar(self, bar: BarData):
+        diff = self.fast.update(bar.close_price) - self.slow.update(bar.close_price)
+        last_diff, self.last_diff = self.last_diff, diff
+        if isnan(diff) or isnan(last_diff):
+            return
+
+        volume = self.get_parameter("trade_volume", 1)
+        if last_diff <= 0 < diff:
+            self.set_target_pos(bar.vt_symbol, volume, bar.close_price)
+        elif last_diff >= 0 > diff:
+            self.set_target_pos(bar.vt_symbol, -volume, bar.close_price)
+
+
+class RsiStrategy(StrategyTemplate):
+    """RSI策略：超卖做多，超买做空，回到50平仓"""
+
+    __slots__ = ("rsi",)
+
+    parameter_keys = ("rsi_period",)
+
+    def on_init(self):
+        self.rsi = RSI(self.get_parameter("rsi_period", 14))
+
+    def on_bar(self, bar: BarData):
+        value = self.rsi.update(bar.close_price)
+        if isnan(value):
+            return
+
+        volume = self.get_parameter("trade_volume", 1)
+        pos = self.pos.get(bar.vt_symbol, 0)
+        if value <= self.get_parameter("rsi_oversold", 30.0):
+            self.set_target_pos(bar.vt_symbol, volume, bar.close_price)
+        elif value >= self.get_parameter("rsi_overbought", 70.0):
+            self.set_target_pos(bar.vt_symbol, -volume, bar.close_price)
+        elif (pos > 0 and value >= 50) or (pos < 0 and value <= 50):
+            self.set_target_pos(bar.vt_symbol, 0, bar.close_price)
+
+
+class BollStrategy(StrategyTemplate):
+    """布林带策略：跌破下轨做多，突破上轨做空，回到中轨平仓"""
+
+    __slots__ = ("boll",)
+
+    parameter_keys = ("bb_period", "bb_std")
+
+    def on_init(self):
+        self.boll = BOLL(self.get_parameter("bb_period", 20), self.get_parameter("bb_std", 2.0))
+
+    def on_bar(self, bar: BarData):
+        mid, up, down = self.boll.update(bar.close_price)
+        if isnan(mid):
+            return
+
+        volume = self.get_parameter("trade_volume", 1)
+        pos = self.pos.get(bar.vt_symbol, 0)
+        price = bar.close_price
+        if price < down:
+            self.set_target_pos(bar.vt_symbol, volume, price)
+        elif price > up:
+            self.set_target_pos(bar.vt_symbol, -volume, price)
+        elif (pos > 0 and price >= mid) or (pos < 0 and price <= mid):
+            self.set_target_pos(bar.vt_symbol, 0, price)
+
+
+class MacdStrategy(StrategyTemplate):
+    """MACD策略：MACD柱由负转正做多，由正转负做空"""
+
+    __slots__ = ("macd", "last_hist")
+
+    parameter_keys = ("macd_fast", "macd_slow", "macd_signal")
+
+    def on_init(self):
+        self.macd = MACD(
+            self.get_parameter("macd_fast", 12),
+            self.get_parameter("macd_slow", 26),
+            self.get_parameter("macd_signal", 9)
+        )
+        self.last_hist = float("nan")
+
+    def on_bar(self, bar: BarData):
+        _, _, hist = self.macd.update(bar.close_price)
+        last_hist, self.last_hist = self.last_hist, hist
+        if isnan(hist) or isnan(last_hist):
+            return
+
+        volume = self.get_parameter("trade_volume", 1)
+        if last_hist <= 0 < hist:
+            self.set_target_pos(bar.vt_symbol, volume, bar.close_price)
+        elif last_hist >= 0 > hist:
+            self.set_target_pos(bar.vt_symbol, -volume, bar.close_price)
+
+
+STRATEGY_CLASSES: Dict[str, Type[StrategyTemplate]] = {
+    cls.__name__: cls
+    for cls in [StrategyTemplate, DoubleMaStrategy, RsiStrategy, BollStrategy, MacdStrategy]
+}
+
+
+def get_strategy_class(class_name: str = "", parameters: Optional[Dict[str, Any]] = None) -> Type[StrategyTemplate]:
+    """按类名查找策略类，没有类名时按参数推断（与strategy_config中的模板参数对应），都不匹配时使用空模板"""
+    if class_name in STRATEGY_CLASSES:
+        return STRATEGY_CLASSES[class_name]
+    for cls in STRATEGY_CLASSES.values():
+        if cls.parameter_keys and all(key in (parameters or {}) for key in cls.parameter_keys):
+            return cls
+    return StrategyTemplate
@@ -1,12 +1,33 @@
+import atexit
 import json
-from typing import List, Set
+import os
+import traceback
+from threading import Lock, Timer
+from typing import Callable, FrozenSet, Iterable, List, Optional, Set
+from config.log_manager import log_manager
 from config.paths import SUBSCRIBED_SYMBOLS_PATH
 
+SAVE_DELAY = 0.5    # 合并写入的延迟（秒）
+
 class SubscribedSymbols:
-    """订阅合约管理类"""
+    """订阅合约管理类
+
+    每次订阅列表变化时生成新的不可变快照snapshot并递增版本号version，再通知监听者。
+    行情热路径直接缓存快照做O(1)判断，不需要每次复制列表。
+    
+    修改后不立即写文件，而是在SAVE_DELAY秒后由后台定时器写入一次，期间的所有修改合并为
+    一次写入；文件先写到临时文件再原子替换，中途退出不会留下半个文件。
+    """
     
-    def __init__(self) -> None:
+    def __init__(self, save_delay: float = SAVE_DELAY) -> None:
         self.symbols: Set[str] = set()
+        self.snapshot: FrozenSet[str] = frozenset()
+        self.version: int = 0
+        self.listeners: List[Callable[[FrozenSet[str]], None]] = []
+        self.lock = Lock()
+        self.save_lock = Lock()
+        self.save_delay = save_delay
+        self.save_timer: Optional[Timer] = None
         self.config_path = SUBSCRIBED_SYMBOLS_PATH
         # print(f"订阅配置文件路径: {self.config_path}")
         self.load()
@@ -25,48 +46,122 @@ class SubscribedSymbols:
         except Exception as e:
             # print(f"加载订阅配置失败: {e}")
             self.symbols = set()
+        self.on_changed()
     
     def save(self) -> None:
-        """保存订阅列表到文件"""
-        try:
-            data = {"symbols": list(self.symbols)}
-            with open(SUBSCRIBED_SYMBOLS_PATH, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-            # print(f"已保存订阅合约: {self.symbols}")
-        except Exception as e:
-            # print(f"保存订阅配置失败: {e}")
-            pass
+        """立即保存订阅列表到文件（临时文件写完后原子替换）"""
+        with self.lock:
+            if self.save_timer:
+                self.save_timer.cancel()
+                self.save_timer = None
+        
+        with self.save_lock:
+            temp_path = SUBSCRIBED_SYMBOLS_PATH.with_name(SUBSCRIBED_SYMBOLS_PATH.name + ".tmp")
+            try:
+                data = {"symbols": sorted(self.snapshot)}
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, SUBSCRIBED_SYMBOLS_PATH)
+                # print(f"已保存订阅合约: {self.symbols}")
+            except Exception as e:
+                # print(f"保存订阅配置失败: {e}")
+                pass
+    
+    def schedule_save(self) -> None:
+        """延迟保存，已有待写入时直接合并"""
+        with self.lock:
+            if self.save_timer:
+                return
+            self.save_timer = Timer(self.save_delay, self.save)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+    
+    def flush(self) -> None:
+        """有待写入的修改时立即保存（退出前调用）"""
+        if self.save_timer:
+            self.save()
     
     def add(self, symbol: str) -> None:
         """添加订阅合约"""
         # print(f"[DEBUG] SubscribedSymbols: 添加订阅合约 - {symbol}")
-        # print(f"[DEBUG] SubscribedSymbols: 添加前订阅列表: {self.symbols}")
+        if symbol in self.symbols:
+            return
         self.symbols.add(symbol)
-        # print(f"[DEBUG] SubscribedSymbols: 添加后订阅列表: {self.symbols}")
-        self.save()
+        self.on_changed()
+        self.schedule_save()
     
     def remove(self, symbol: str) -> None:
         """移除订阅合约"""
         # print(f"[DEBUG] SubscribedSymbols: 移除订阅合约 - {symbol}")
-        # print(f"[DEBUG] SubscribedSymbols: 移除前订阅列表: {self.symbols}")
         if symbol in self.symbols:
             self.symbols.remove(symbol)
-            # print(f"[DEBUG] SubscribedSymbols: 移除后订阅列表: {self.symbols}")
-            self.save()
+            self.on_changed()
+            self.schedule_save()
+    
+    def add_many(self, symbols: Iterable[str]) -> None:
+        """批量添加订阅合约，只通知和写入一次"""
+        count = len(self.symbols)
+        self.symbols.update(symbols)
+        if len(self.symbols) != count:
+            self.on_changed()
+            self.schedule_save()
+    
+    def remove_many(self, symbols: Iterable[str]) -> None:
+        """批量移除订阅合约，只通知和写入一次"""
+        count = len(self.symbols)
+        self.symbols.difference_update(symbols)
+        if len(self.symbols) != count:
+            self.on_changed()
+            self.schedule_save()
     
     def clear(self) -> None:
         """清空订阅列表"""
         # print(f"[DEBUG] SubscribedSymbols: 清空订阅列表")
-        # print(f"[DEBUG] SubscribedSymbols: 清空前订阅列表: {self.symbols}")
-        self.symbols.clear()
-        # print(f"[DEBUG] SubscribedSymbols: 清空后订阅列表: {self.symbols}")
-        self.save()
+        if self.symbols:
+            self.symbols.clear()
+            self.on_changed()
+            self.schedule_save()
     
     def get_symbols(self) -> List[str]:
         """获取所有订阅的合约列表"""
         symbols = list(self.symbols)
         # print(f"[DEBUG] SubscribedSymbols: 获取订阅列表: {symbols}")
         return symbols
+    
+    def get_snapshot(self) -> FrozenSet[str]:
+        """获取当前订阅列表的不可变快照，可以直接缓存使用"""
+        return self.snapshot
+    
+    def add_listener(self, listener: Callable[[FrozenSet[str]], None]) -> None:
+        """注册订阅变化监听，参数为新的快照（在修改订阅的线程中回调）"""
+        with self.lock:
+            if listener not in self.listeners:
+                self.listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[FrozenSet[str]], None]) -> None:
+        """注销订阅变化监听"""
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+    
+    def on_changed(self) -> None:
+        """订阅列表变化：更新快照和版本号，通知监听者"""
+        with self.lock:
+            snapshot = frozenset(self.symbols)
+            if snapshot == self.snapshot and self.version:
+                return
+            self.snapshot = snapshot
+            self.version += 1
+            listeners = list(self.listeners)
+        
+        # 单个监听者出错不影响其他监听者，但要记录日志，否则该监听者的快照会一直过期
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                log_manager.log(f"订阅变化监听者 {listener!r} 出错:\n{traceback.format_exc()}")
 
 # 这里添加您想要订阅的期货合约代码
 SUBSCRIBED_SYMBOLS = [
@@ -77,4 +172,5 @@ SUBSCRIBED_SYMBOLS = [
 ]
 
 # 创建全局实例
-subscribed_symbols = SubscribedSymbols() 
\ No newline at end of file
+subscribed_symbols = SubscribedSymbols()
+atexit.register(subscribed_symbols.flush)
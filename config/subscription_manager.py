@@ -0,0 +1,206 @@
+"""
+Subscription Manager Engine
+在后台线程按前置限速分批发送订阅请求，记录每个合约的发送和首笔行情延迟并推送进度事件
+"""
+
+from vnpy.trader.engine import BaseEngine, EventEngine
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import SubscribeRequest
+from vnpy.trader.constant import Exchange
+from vnpy.event import Event
+from collections import deque
+from threading import Thread, Lock, Event as ThreadEvent
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+import time
+
+APP_NAME = "SubscriptionManager"
+
+# 订阅进度事件，data为get_progress()的结果
+EVENT_SUBSCRIPTION = "eSubscription"
+
+REQUESTS_PER_SECOND = 200       # 前置允许的订阅请求速率
+BATCH_SIZE = 50                 # 每批发送的订阅请求数量
+
+class SymbolStatus:
+    """单个合约的订阅状态，时间均为time.perf_counter()"""
+
+    __slots__ = ("queued_time", "sent_time", "tick_time", "error")
+
+    def __init__(self, queued_time: float):
+        self.queued_time: float = queued_time
+        self.sent_time: Optional[float] = None
+        self.tick_time: Optional[float] = None
+        self.error: str = ""
+
+class SubscriptionManager(BaseEngine):
+    """订阅管理引擎
+
+    subscribe只把合约放入队列，后台线程每次取出BATCH_SIZE个合约调用主引擎订阅，
+    每批之间按REQUESTS_PER_SECOND等待，GUI线程不会被阻塞。
+    请求交给已存在的网关计为确认（ack），收到该合约的第一笔行情计为首笔行情（first tick）。
+    """
+
+    def __init__(
+        self,
+        main_engine,
+        event_engine: EventEngine,
+        rate: float = REQUESTS_PER_SECOND,
+        batch_size: int = BATCH_SIZE
+    ):
+        super().__init__(main_engine, event_engine, APP_NAME)
+        self.rate: float = rate
+        self.batch_size: int = batch_size
+
+        self.queue: Deque[Tuple[str, str]] = deque()      # (vt_symbol, gateway_name)
+        self.status: Dict[str, SymbolStatus] = {}
+        self.waiting: Dict[str, SymbolStatus] = {}        # 已发送、等待首笔行情的合约
+        self.lock = Lock()
+
+        self.active = True
+        self.wake_event = ThreadEvent()
+        self.stop_event = ThreadEvent()
+        self.thread = Thread(target=self.run, name=APP_NAME, daemon=True)
+        self.thread.start()
+
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+
+    def subscribe(self, vt_symbols: Iterable[str], gateway_name: str) -> int:
+        """批量加入订阅队列，已排队或已发送的合约被跳过，返回新加入的数量"""
+        now = time.perf_counter()
+        count = 0
+        with self.lock:
+            for vt_symbol in vt_symbols:
+                status = self.status.get(vt_symbol)
+                if status and not status.error:
+                    continue
+                self.status[vt_symbol] = SymbolStatus(now)
+                self.queue.append((vt_symbol, gateway_name))
+                count += 1
+
+        if count:
+            self.wake_event.set()
+        return count
+
+    def run(self):
+        """发送线程主循环"""
+        while self.active:
+            self.wake_event.wait()
+            self.wake_event.clear()
+
+            while self.active:
+                with self.lock:
+                    batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+                if not batch:
+                    break
+
+                start = time.perf_counter()
+                self.send_batch(batch)
+                self.put_progress_event()
+
+                # 按速率限制等待，停止时立即退出
+                delay = len(batch) / self.rate - (time.perf_counter() - start)
+                if delay > 0 and self.stop_event.wait(delay):
+                    break
+
+    def send_batch(self, batch: List[Tuple[str, str]]):
+        """发送一批订阅请求"""
+        gateways: Dict[str, bool] = {}
+        for vt_symbol, gateway_name in batch:
+            error = ""
+            try:
+                # MainEngine.subscribe在网关不存在时直接返回，不报错，需要先检查网关
+                if gateway_name not in gateways:
+                    gateways[gateway_name] = bool(self.main_engine.get_gateway(gateway_name))
+                if not gateways[gateway_name]:
+                    raise LookupError(f"找不到网关 {gateway_name}")
+
+                symbol, exchange_str = vt_symbol.rsplit(".", 1)
+                req = SubscribeRequest(symbol=symbol, exchange=Exchange(exchange_str))
+                self.main_engine.subscribe(req, gateway_name)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+
+            now = time.perf_counter()
+            with self.lock:
+                status = self.status.get(vt_symbol)
+                if not status:      # 发送期间被reset
+                    continue
+                if error:
+                    status.error = error
+                else:
+                    status.sent_time = now
+                    self.waiting[vt_symbol] = status
+
+            if error:
+                self.main_engine.write_log(f"订阅失败 {vt_symbol}: {error}", APP_NAME)
+
+    def reset(self):
+        """清空队列和订阅记录（网关重连后需要重新订阅时调用）"""
+        with self.lock:
+            self.queue.clear()
+            self.status.clear()
+            self.waiting.clear()
+
+    def process_tick_event(self, event: Event):
+        """记录已发送合约的首笔行情时间"""
+        if not self.waiting:
+            return
+
+        tick = event.data
+        with self.lock:
+            status = self.waiting.pop(tick.vt_symbol, None)
+            if status:
+                status.tick_time = time.perf_counter()
+                finished = not self.waiting and not self.queue
+            else:
+                finished = False
+
+        if finished:
+            self.put_progress_event()
+
+    def put_progress_event(self):
+        """推送订阅进度事件"""
+        self.event_engine.put(Event(EVENT_SUBSCRIPTION, self.get_progress()))
+
+    def get_latency(self, vt_symbol: str) -> Tuple[Optional[float], Optional[float]]:
+        """获取合约的确认延迟和首笔行情延迟（秒，从加入队列开始计），未完成时为None"""
+        with self.lock:
+            status = self.status.get(vt_symbol)
+            if not status:
+                return None, None
+            ack = status.sent_time - status.queued_time if status.sent_time else None
+            first_tick = status.tick_time - status.queued_time if status.tick_time else None
+        return ack, first_tick
+
+    def get_progress(self) -> Dict[str, Any]:
+        """获取订阅进度：总数、已确认、已收到行情、失败、排队数量和平均/最大延迟"""
+        with self.lock:
+            statuses = list(self.status.values())
+            pending = len(self.queue)
+
+        ack_latencies = [s.sent_time - s.queued_time for s in statuses if s.sent_time]
+        tick_latencies = [s.tick_time - s.queued_time for s in statuses if s.tick_time]
+        failed = sum(1 for s in statuses if s.error)
+
+        return {
+            "total": len(statuses),
+            "acked": len(ack_latencies),
+            "ticked": len(tick_latencies),
+            "failed": failed,
+            "pending": pending,
+            "finished": pending == 0 and len(ack_latencies) + failed == len(statuses),
+            "avg_ack_latency": sum(ack_latencies) / len(ack_latencies) if ack_latencies else 0.0,
+            "max_ack_latency": max(ack_latencies, default=0.0),
+            "avg_tick_latency": sum(tick_latencies) / len(tick_latencies) if tick_latencies else 0.0,
+            "max_tick_latency": max(tick_latencies, default=0.0),
+        }
+
+    def close(self):
+        """停止发送线程，未发送的请求被丢弃"""
+        if not self.active:
+            return
+        self.active = False
+        self.event_engine.unregister(EVENT_TICK, self.process_tick_event)
+        self.stop_event.set()
+        self.wake_event.set()
+        self.thread.join()
@@ -0,0 +1,153 @@
+"""
+Tick Recorder Engine
+订阅EVENT_TICK，按合约缓存行情，由后台线程定时批量写入ticks表和列式存档
+"""
+
+from vnpy.trader.engine import BaseEngine, EventEngine
+from vnpy.trader.event import EVENT_TICK
+from vnpy.event import Event
+from config.database import TradingDatabase
+from config.columnar_store import ColumnarStore
+from threading import Thread, Lock, Event as ThreadEvent
+from typing import Dict, List, Any
+import sqlite3
+import time
+
+APP_NAME = "TickRecorder"
+
+FLUSH_INTERVAL_MS = 500         # 落库周期（毫秒）
+MAX_BUFFER_SIZE = 200000        # 内存中最多缓存的行情条数，超过后丢弃新行情并计数
+
+class TickRecorder(BaseEngine):
+    """行情录制引擎
+    
+    事件线程只把行情转换成元组追加到内存缓冲区，写入线程每FLUSH_INTERVAL_MS毫秒
+    交换缓冲区并在单个事务中executemany写入。
+    """
+    
+    def __init__(
+        self,
+        main_engine,
+        event_engine: EventEngine,
+        database: TradingDatabase = None,
+        archive: ColumnarStore = None
+    ):
+        super().__init__(main_engine, event_engine, APP_NAME)
+        self.database = database or TradingDatabase()
+        # 外部传入的数据库实例由创建方负责关闭
+        self.owns_database: bool = database is None
+        self.archive = archive or ColumnarStore()
+        
+        self.flush_interval: float = FLUSH_INTERVAL_MS / 1000
+        self.max_buffer_size: int = MAX_BUFFER_SIZE
+        
+        self.buffers: Dict[str, List[tuple]] = {}
+        self.buffer_size: int = 0
+        self.lock = Lock()
+        
+        self.stats: Dict[str, Any] = {
+            "received": 0,
+            "written": 0,
+            "dropped": 0,
+            "flush_count": 0,
+            "last_flush_size": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+        }
+        self.start_time = time.monotonic()
+        
+        self.active = True
+        self.stop_event = ThreadEvent()
+        self.thread = Thread(target=self.run, name=APP_NAME, daemon=True)
+        self.thread.start()
+        
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+    
+    def process_tick_event(self, event: Event):
+        """缓存行情"""
+        tick = event.data
+        # 按列式存档的字段顺序缓存，写库时再转换为ticks表的列顺序
+        row = (
+            tick.datetime, tick.last_price, tick.volume, tick.turnover, tick.open_interest,
+            tick.bid_price_1, tick.ask_price_1, tick.bid_volume_1, tick.ask_volume_1
+        )
+        
+        with self.lock:
+            self.stats["received"] += 1
+            if self.buffer_size >= self.max_buffer_size:
+                self.stats["dropped"] += 1
+                return
+            
+            buffer = self.buffers.get(tick.symbol)
+            if buffer is None:
+                buffer = self.buffers[tick.symbol] = []
+            buffer.append(row)
+            self.buffer_size += 1
+    
+    def run(self):
+        """写入线程主循环"""
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+    
+    def flush(self):
+        """交换缓冲区并批量写入"""
+        with self.lock:
+            buffers = self.buffers
+            self.buffers = {}
+            self.buffer_size = 0
+        
+        if not buffers:
+            return
+        
+        # 按合约连续写入，保持(symbol, datetime)索引的局部性
+        rows = []
+        for symbol, symbol_rows in buffers.items():
+            rows.extend(
+                (symbol, r[0], r[1], r[2], r[4], r[5], r[6], r[7], r[8])
+                for r in symbol_rows
+            )
+        
+        start = time.perf_counter()
+        try:
+            self.database.save_ticks(rows)
+        except sqlite3.Error as e:
+            self.main_engine.write_log(f"行情数据保存失败: {e}", APP_NAME)
+            with self.lock:
+                self.stats["dropped"] += len(rows)
+            return
+        
+        try:
+            for symbol, symbol_rows in buffers.items():
+                self.archive.append_ticks(symbol, symbol_rows)
+        except OSError as e:
+            self.main_engine.write_log(f"行情数据存档失败: {e}", APP_NAME)
+        latency = time.perf_counter() - start
+        
+        with self.lock:
+            self.stats["written"] += len(rows)
+            self.stats["flush_count"] += 1
+            self.stats["last_flush_size"] = len(rows)
+            self.stats["last_flush_latency"] = latency
+            if latency > self.stats["max_flush_latency"]:
+                self.stats["max_flush_latency"] = latency
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取录制统计，ticks_per_second为启动以来的平均写入速度"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["buffered"] = self.buffer_size
+        elapsed = time.monotonic() - self.start_time
+        stats["ticks_per_second"] = stats["written"] / elapsed if elapsed > 0 else 0.0
+        return stats
+    
+    def close(self):
+        """停止写入线程，写完缓冲区中的行情"""
+        if not self.active:
+            return
+        self.active = False
+        self.event_engine.unregister(EVENT_TICK, self.process_tick_event)
+        self.stop_event.set()
+        self.thread.join()
+        if self.owns_database:
+            self.database.close()
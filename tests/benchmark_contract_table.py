@@ -0,0 +1,88 @@
+"""
+合约表格加载基准
+模拟全市场合约列表，统计写入模型和首次绘制的耗时
+
+运行: python tests/benchmark_contract_table.py [合约数]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore, QtWidgets
+from vnpy.trader.constant import Exchange, Product
+from vnpy.trader.object import ContractData
+from ui.widgets.contract_table import (
+    ContractTableModel, ContractFilterProxyModel, SubscribeButtonDelegate, COLUMN_SUBSCRIBE
+)
+from ui.widgets.contract_search import ContractSearchIndex
+
+
+def make_contracts(count: int):
+    exchanges = [Exchange.SHFE, Exchange.DCE, Exchange.CZCE, Exchange.CFFEX, Exchange.INE]
+    return [
+        ContractData(
+            symbol=f"c{i:05d}",
+            exchange=exchanges[i % len(exchanges)],
+            name=f"合约{i}",
+            product=Product.OPTION if i % 3 else Product.FUTURES,
+            size=10,
+            pricetick=1,
+            gateway_name="CTP"
+        )
+        for i in range(count)
+    ]
+
+
+def run_benchmark(count: int = 5000):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    contracts = make_contracts(count)
+
+    model = ContractTableModel()
+    proxy = ContractFilterProxyModel()
+    proxy.setSourceModel(model)
+    index = ContractSearchIndex()
+
+    view = QtWidgets.QTableView()
+    view.setModel(proxy)
+    view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    view.setItemDelegateForColumn(COLUMN_SUBSCRIBE, SubscribeButtonDelegate(view))
+    view.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+    view.resize(1000, 600)
+    view.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    model.set_contracts(contracts)
+    loaded = time.perf_counter()
+    view.viewport().repaint()
+    painted = time.perf_counter()
+
+    print(f"合约数量: {count}")
+    print(f"写入模型: {(loaded - start) * 1000:.1f} ms")
+    print(f"首次绘制: {(painted - loaded) * 1000:.1f} ms")
+    print(f"合计: {(painted - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    index.set_contracts(contracts)
+    print(f"建立搜索索引: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # 逐字输入，每个按键只在上一次结果中收窄
+    query = ""
+    for char in "c0123":
+        query += char
+        start = time.perf_counter()
+        proxy.set_rows(index.search(query))
+        elapsed = time.perf_counter() - start
+        print(f"输入 {query:<6} {elapsed * 1000:6.2f} ms, 剩余 {proxy.rowCount()} 个")
+
+    start = time.perf_counter()
+    proxy.set_rows(index.search("hy"))
+    print(f"拼音首字母 hy: {(time.perf_counter() - start) * 1000:.2f} ms, 剩余 {proxy.rowCount()} 个")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
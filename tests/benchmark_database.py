@@ -0,0 +1,81 @@
+"""
+TradingDatabase写入性能基准
+对比每次写入都重新连接（旧实现）与线程长连接+WAL（当前实现）的插入速度
+
+运行: python tests/benchmark_database.py [记录数]
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import TradingDatabase, TradeRecord, INSERT_TRADE_SQL
+
+
+def make_trades(count: int):
+    """生成测试成交记录"""
+    now = datetime.now()
+    return [
+        TradeRecord(
+            trade_id=f"T{i}", symbol="rb2410", direction="多", volume=1,
+            price=3500.0 + i % 100, trade_time=now, commission=1.5, order_id=f"O{i}"
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_save_trade(db_path: Path, trade: TradeRecord):
+    """旧实现：每次写入打开、提交并关闭连接"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(INSERT_TRADE_SQL, (
+        trade.trade_id, trade.symbol, trade.direction, trade.volume, trade.price,
+        trade.trade_time, trade.commission, trade.strategy_name, trade.order_id
+    ))
+    conn.commit()
+    conn.close()
+
+
+def run_benchmark(count: int = 2000):
+    temp_dir = Path(tempfile.mkdtemp())
+    trades = make_trades(count)
+    try:
+        # 旧实现（默认rollback journal + synchronous=FULL）
+        legacy_path = temp_dir / "legacy.db"
+        TradingDatabase(legacy_path).close()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+        start = time.perf_counter()
+        for trade in trades:
+            legacy_save_trade(legacy_path, trade)
+        legacy_elapsed = time.perf_counter() - start
+
+        # 当前实现
+        db = TradingDatabase(temp_dir / "pooled.db")
+        start = time.perf_counter()
+        for trade in trades:
+            db.save_trade(trade)
+        pooled_elapsed = time.perf_counter() - start
+        db.close()
+
+        legacy_rate = count / legacy_elapsed
+        pooled_rate = count / pooled_elapsed
+        print(f"记录数: {count}")
+        print(f"每次重新连接: {legacy_rate:10.0f} 条/秒")
+        print(f"线程长连接:   {pooled_rate:10.0f} 条/秒")
+        print(f"提升倍数:     {pooled_rate / legacy_rate:10.1f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
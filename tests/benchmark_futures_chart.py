@@ -0,0 +1,140 @@
+"""
+K线图表刷新基准
+加载10000根K线后模拟行情更新最后一根K线和新增K线，统计首次绘制与每帧（更新图形项并重绘画布）的耗时，
+以及缩小显示全部K线、在缩小状态下平移和切换周期的耗时
+
+运行: python tests/benchmark_futures_chart.py [K线数量] [帧数]
+      python tests/benchmark_futures_chart.py 90000      # 约一年的1分钟K线
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt5 import QtWidgets
+
+from vnpy.trader.constant import Exchange, Interval, Product
+from vnpy.trader.object import BarData, ContractData
+
+
+def make_bars(count: int) -> list:
+    start = datetime(2024, 1, 1, 9)
+    closes = 3500 + np.cumsum(np.random.normal(0, 2, count))
+    bars = []
+    for i, close in enumerate(closes):
+        open_price = close + np.random.normal(0, 2)
+        bars.append(BarData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            datetime=start + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            volume=float(np.random.randint(100, 1000)),
+            open_price=open_price,
+            high_price=max(open_price, close) + abs(np.random.normal(0, 2)),
+            low_price=min(open_price, close) - abs(np.random.normal(0, 2)),
+            close_price=close,
+            gateway_name="CTP"
+        ))
+    return bars
+
+
+def run_benchmark(bar_count: int = 10000, frames: int = 200):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    from ui.widgets.futures_chart import FuturesChart
+
+    contract = ContractData(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        name="螺纹钢2410",
+        product=Product.FUTURES,
+        size=10,
+        pricetick=1,
+        gateway_name="CTP"
+    )
+    main_engine = MagicMock()
+    main_engine.query_history.return_value = None
+    chart = FuturesChart(main_engine, MagicMock(), contract)
+    chart.resize(1200, 700)
+    chart.show()
+    app.processEvents()
+
+    bars = make_bars(bar_count)
+    start = time.perf_counter()
+    chart.buffer.set_bars(bars)
+    chart.update_chart()
+    chart.canvas.grab()
+    print(f"K线数量: {bar_count}")
+    print(f"首次绘制: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # 每帧更新最后一根K线，每10帧新增一根
+    costs = []
+    bar = bars[-1]
+    for i in range(frames):
+        if i % 10 == 9:
+            bar = BarData(
+                symbol=bar.symbol,
+                exchange=bar.exchange,
+                datetime=bar.datetime + timedelta(minutes=1),
+                interval=bar.interval,
+                volume=100,
+                open_price=bar.close_price,
+                high_price=bar.close_price,
+                low_price=bar.close_price,
+                close_price=bar.close_price,
+                gateway_name=bar.gateway_name
+            )
+        else:
+            bar.close_price += np.random.normal(0, 1)
+            bar.high_price = max(bar.high_price, bar.close_price)
+            bar.low_price = min(bar.low_price, bar.close_price)
+            bar.volume += 10
+
+        start = time.perf_counter()
+        if i % 10 == 9:
+            chart.buffer.append_bar(bar)
+        else:
+            chart.buffer.update_bar(bar)
+        chart.update_chart()
+        chart.canvas.grab()
+        costs.append(time.perf_counter() - start)
+
+    costs = np.array(costs) * 1000
+    print(f"每帧耗时: 平均 {costs.mean():.2f} ms, P95 {np.percentile(costs, 95):.2f} ms, 最大 {costs.max():.2f} ms")
+
+    # 缩小到全部K线
+    start = time.perf_counter()
+    chart.kline_plot.setXRange(0, len(chart.buffer), padding=0)
+    chart.canvas.grab()
+    print(f"显示全部K线: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # 显示五分之一的K线，每帧平移可见宽度的2%
+    width = len(chart.buffer) / 5
+    costs = []
+    for i in range(frames):
+        left = i * width * 0.02
+        start = time.perf_counter()
+        chart.kline_plot.setXRange(left, left + width, padding=0)
+        chart.canvas.grab()
+        costs.append(time.perf_counter() - start)
+
+    costs = np.array(costs) * 1000
+    print(f"平移每帧耗时: 平均 {costs.mean():.2f} ms, P95 {np.percentile(costs, 95):.2f} ms, 最大 {costs.max():.2f} ms")
+
+    # 切换周期：高周期从1分钟K线重采样，不查询历史
+    for timeframe in ["5m", "15m", "1h", "d", "1m"]:
+        start = time.perf_counter()
+        chart.set_timeframe(timeframe)
+        chart.canvas.grab()
+        print(f"切换到{timeframe}: {(time.perf_counter() - start) * 1000:.1f} ms，{len(chart.buffer)} 根")
+    print(f"历史数据查询次数: {main_engine.query_history.call_count}")
+
+    chart.close()
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:3]])
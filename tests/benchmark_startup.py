@@ -0,0 +1,119 @@
+"""
+启动耗时基准
+在全新的解释器中分别统计模块导入耗时和主窗口首次绘制耗时，并检查重量级依赖是否被提前导入
+
+运行: python tests/benchmark_startup.py [重复次数]
+"""
+
+import sys
+import os
+import json
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 启动阶段不应导入的模块（打开对应窗口时才导入）
+DEFERRED_MODULES = ["matplotlib", "pyqtgraph", "ui.widgets.futures_chart"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+# 登录对话框是模态的，基准中直接显示主窗口代替
+# 数据引擎默认打开data/trading.db，基准中改为临时目录下的数据库，不修改仓库中的文件
+PAINT_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+from PyQt5 import QtCore, QtWidgets
+from ui.new_main_window import NewMainWindow
+imported = time.perf_counter()
+
+from config.database import TradingDatabase
+default_init = TradingDatabase.__init__
+TradingDatabase.__init__ = lambda self, db_path=None: default_init(self, db_path or os.environ["BENCHMARK_DB_PATH"])
+
+app = QtWidgets.QApplication(sys.argv)
+result = {}
+
+class PaintFilter(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint and "paint" not in result:
+            result["paint"] = time.perf_counter()
+            QtCore.QTimer.singleShot(0, on_painted)
+        return False
+
+def on_painted():
+    window.init_data_engines()
+    result["engines"] = time.perf_counter()
+    window.main_engine.close()
+    app.quit()
+
+NewMainWindow.show_login_dialog = lambda self: self.show()
+paint_filter = PaintFilter()
+app.installEventFilter(paint_filter)
+window = NewMainWindow()
+constructed = time.perf_counter()
+app.exec_()
+
+print(json.dumps({
+    "import": imported - start,
+    "construct": constructed - imported,
+    "first_paint": result["paint"] - start,
+    "data_engines": result["engines"] - result["paint"],
+}))
+"""
+
+
+def run_script(script: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = ROOT
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env["BENCHMARK_DB_PATH"] = os.path.join(temp_dir, "trading.db")
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark_import(module: str, repeat: int):
+    script = IMPORT_SCRIPT.format(module=module, deferred=DEFERRED_MODULES)
+    results = [run_script(script) for _ in range(repeat)]
+    median = statistics.median(r["elapsed"] for r in results)
+    loaded = ", ".join(results[0]["loaded"]) or "无"
+    print(f"import {module:<30} {median * 1000:8.1f} ms  提前导入: {loaded}")
+
+
+def benchmark_first_paint(repeat: int):
+    results = [run_script(PAINT_SCRIPT) for _ in range(repeat)]
+    for key, name in [
+        ("import", "导入主窗口模块"),
+        ("construct", "构造主窗口"),
+        ("first_paint", "启动到首次绘制"),
+        ("data_engines", "首次绘制后创建数据引擎"),
+    ]:
+        median = statistics.median(r[key] for r in results)
+        print(f"{name:<20} {median * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print(f"模块导入耗时（{repeat}次中位数）")
+    for module in [
+        "config.data_persistence_engine",
+        "ui.market_monitor",
+        "ui.new_main_window",
+    ]:
+        benchmark_import(module, repeat)
+
+    print(f"\n主窗口首次绘制（{repeat}次中位数）")
+    benchmark_first_paint(repeat)
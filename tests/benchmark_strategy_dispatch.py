@@ -0,0 +1,121 @@
+"""
+策略事件分发基准
+200个运行中的策略订阅500个合约中的若干个，对比原来逐个策略检查合约列表的分发方式
+和按合约索引的分发表的单笔行情耗时，以及委托事件按委托号查找的耗时
+
+运行: python tests/benchmark_strategy_dispatch.py [策略数] [合约数]
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Exchange
+from vnpy.trader.event import EVENT_TICK, EVENT_ORDER
+from vnpy.trader.object import OrderData, TickData
+from config.strategy_engine import StrategyEngine
+
+SYMBOLS_PER_STRATEGY = 5    # 每个策略订阅的合约数
+ORDERS_PER_STRATEGY = 20    # 每个策略的历史委托数
+TICK_COUNT = 100000
+
+
+def linear_dispatch(engine: StrategyEngine, event: Event) -> int:
+    """原来的分发方式：逐个策略检查合约列表"""
+    tick = event.data
+    count = 0
+    for strategy in engine.active_strategies.values():
+        if tick.symbol in strategy.symbols:
+            count += 1
+    return count
+
+
+def linear_order_dispatch(order_lists: List[List[str]], event: Event) -> int:
+    """原来的分发方式：逐个策略检查委托列表（原来每个策略的委托号保存在列表中）"""
+    order = event.data
+    count = 0
+    for orders in order_lists:
+        if order.vt_orderid in orders:
+            count += 1
+    return count
+
+
+def run_benchmark(strategy_count: int = 200, symbol_count: int = 500):
+    rng = random.Random(1)
+    symbols = [f"rb{i:04d}" for i in range(symbol_count)]
+
+    with tempfile.TemporaryDirectory() as data_path:
+        engine = StrategyEngine(MagicMock(), EventEngine())
+        engine.data_path = data_path
+        engine.write_log = lambda msg: None
+        engine.save_strategies = lambda: None
+
+        for i in range(strategy_count):
+            strategy_id = engine.add_strategy(f"s{i}", "double_ma", {}, rng.sample(symbols, SYMBOLS_PER_STRATEGY))
+            for j in range(ORDERS_PER_STRATEGY):
+                engine.add_strategy_order(strategy_id, f"CTP.{i}_{j}")
+            engine.start_strategy(strategy_id)
+
+        # 对照组按原来的方式保存委托列表，在计时前准备好
+        order_lists = [list(strategy.orderids) for strategy in engine.active_strategies.values()]
+
+        calls = []
+        engine.on_strategy_tick = lambda strategy, tick: calls.append(1)
+        engine.on_strategy_order = lambda strategy, order: calls.append(1)
+
+        ticks = [
+            Event(EVENT_TICK, TickData(
+                symbol=rng.choice(symbols), exchange=Exchange.SHFE,
+                datetime=datetime.now(), last_price=3500, gateway_name="CTP"
+            ))
+            for _ in range(TICK_COUNT)
+        ]
+        orders = [
+            Event(EVENT_ORDER, OrderData(
+                symbol="rb0000", exchange=Exchange.SHFE,
+                orderid=f"{rng.randrange(strategy_count)}_{rng.randrange(ORDERS_PER_STRATEGY)}",
+                gateway_name="CTP"
+            ))
+            for _ in range(TICK_COUNT // 10)
+        ]
+
+        print(f"{strategy_count} 个策略 x {symbol_count} 个合约，每个策略订阅 {SYMBOLS_PER_STRATEGY} 个合约")
+
+        start = time.perf_counter()
+        expected = sum(linear_dispatch(engine, event) for event in ticks)
+        linear = (time.perf_counter() - start) / len(ticks)
+
+        start = time.perf_counter()
+        for event in ticks:
+            engine.process_tick_event(event)
+        indexed = (time.perf_counter() - start) / len(ticks)
+        assert len(calls) == expected
+
+        print(f"行情分发: 逐个策略检查 {linear * 1e6:.2f} us/笔，分发表 {indexed * 1e6:.2f} us/笔，"
+              f"平均每笔分发给 {expected / len(ticks):.2f} 个策略")
+
+        calls.clear()
+        start = time.perf_counter()
+        expected = sum(linear_order_dispatch(order_lists, event) for event in orders)
+        linear = (time.perf_counter() - start) / len(orders)
+
+        start = time.perf_counter()
+        for event in orders:
+            engine.process_order_event(event)
+        indexed = (time.perf_counter() - start) / len(orders)
+        assert len(calls) == expected
+
+        print(f"委托分发: 逐个策略检查 {linear * 1e6:.2f} us/笔，分发表 {indexed * 1e6:.2f} us/笔")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run_benchmark(*args)
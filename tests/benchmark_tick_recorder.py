@@ -0,0 +1,72 @@
+"""
+TickRecorder录制吞吐基准
+模拟500个订阅合约的行情推送，统计事件线程单次处理耗时与写入线程的持续落库速度
+
+运行: python tests/benchmark_tick_recorder.py [合约数] [每合约行情数]
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.event import Event
+from vnpy.trader.constant import Exchange
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import TickData
+from config.database import TradingDatabase
+from config.tick_recorder import TickRecorder
+
+
+def run_benchmark(symbol_count: int = 500, ticks_per_symbol: int = 200):
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        database = TradingDatabase(temp_dir / "ticks.db")
+        recorder = TickRecorder(MagicMock(), MagicMock(), database)
+
+        now = datetime.now()
+        events = [
+            Event(EVENT_TICK, TickData(
+                symbol=f"rb{2400 + s}",
+                exchange=Exchange.SHFE,
+                datetime=now,
+                last_price=3500.0 + i,
+                volume=i,
+                open_interest=1000,
+                bid_price_1=3499.0,
+                ask_price_1=3501.0,
+                bid_volume_1=5,
+                ask_volume_1=5,
+                gateway_name="CTP"
+            ))
+            for i in range(ticks_per_symbol)
+            for s in range(symbol_count)
+        ]
+
+        start = time.perf_counter()
+        for event in events:
+            recorder.process_tick_event(event)
+        handler_elapsed = time.perf_counter() - start
+
+        recorder.close()
+        total_elapsed = time.perf_counter() - start
+        stats = recorder.get_statistics()
+
+        count = len(events)
+        print(f"合约数: {symbol_count}, 行情数: {count}")
+        print(f"事件线程处理:   {handler_elapsed / count * 1e6:8.2f} 微秒/条")
+        print(f"端到端录制速度: {stats['written'] / total_elapsed:8.0f} 条/秒")
+        print(f"落库批次: {stats['flush_count']}, 最大批次耗时: {stats['max_flush_latency'] * 1000:.1f} 毫秒")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run_benchmark(*args)
@@ -25,6 +25,8 @@ class MockGateway:
         self.gateway_name = "MockCTP"
         self.connected = False
         self.subscribed_symbols = set()
+        self.subscribed_snapshot = frozenset()  # 全局订阅列表快照
+        self.subscribed_version = -1            # 快照对应的版本号
         self.tick_thread = None
         self.running = False
         self._timer = None
@@ -134,11 +136,15 @@ class MockGateway:
                 # print(f"[DEBUG] MockGateway: 生成 {len(ticks)} 个tick数据")
                 generated_count = len(ticks)
                 pushed_count = 0
-                self.subscribed_symbols = subscribed_symbols.get_symbols()
-                # print(f"[DEBUG] MockGateway: 已订阅合约: {self.subscribed_symbols}")
+                # 订阅版本变化时才更新快照
+                if subscribed_symbols.version != self.subscribed_version:
+                    self.subscribed_version = subscribed_symbols.version
+                    self.subscribed_snapshot = subscribed_symbols.snapshot
+                snapshot = self.subscribed_snapshot
+                # print(f"[DEBUG] MockGateway: 已订阅合约: {snapshot}")
                 
                 for vt_symbol, tick in ticks.items():
-                    if vt_symbol in self.subscribed_symbols:
+                    if vt_symbol in snapshot:
                         # print(f"[DEBUG] MockGateway: 推送tick数据 - {vt_symbol}, 价格: {tick.last_price}, 时间: {tick.datetime}")
                         event = Event(EVENT_TICK, tick)
                         self.event_engine.put(event)
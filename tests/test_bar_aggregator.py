@@ -0,0 +1,93 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import TickData
+from config.database import TradingDatabase
+from config.columnar_store import ColumnarStore
+from config.bar_aggregator import BarAggregator, get_bar_window, get_event_type
+
+
+class TestBarAggregator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.database = TradingDatabase(Path(self.temp_dir) / "trading.db")
+        self.event_engine = MagicMock()
+        self.aggregator = BarAggregator(MagicMock(), self.event_engine, self.database,
+            ColumnarStore(Path(self.temp_dir) / "archive"))
+
+    def tearDown(self):
+        self.aggregator.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_tick(self, dt: datetime, price: float, volume: float) -> TickData:
+        return TickData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            datetime=dt,
+            last_price=price,
+            volume=volume,
+            open_interest=100,
+            gateway_name="CTP"
+        )
+
+    def test_bar_window(self):
+        """测试各周期K线起止时间"""
+        dt = datetime(2024, 5, 6, 9, 17, 42)
+        self.assertEqual(get_bar_window(dt, "1m")[0], datetime(2024, 5, 6, 9, 17))
+        self.assertEqual(get_bar_window(dt, "5m")[0], datetime(2024, 5, 6, 9, 15))
+        self.assertEqual(get_bar_window(dt, "15m")[1], datetime(2024, 5, 6, 9, 30))
+        self.assertEqual(get_bar_window(dt, "1h")[0], datetime(2024, 5, 6, 9))
+        self.assertEqual(get_bar_window(dt, "d")[1], datetime(2024, 5, 7))
+
+    def test_aggregate(self):
+        """测试逐笔合成1分钟和5分钟K线"""
+        start = datetime(2024, 5, 6, 9, 0)
+        prices = [3500, 3505, 3495, 3502, 3510, 3490]
+        volume = 1000
+        for minute in range(6):
+            for i, price in enumerate(prices):
+                volume += 10
+                dt = start + timedelta(minutes=minute, seconds=i * 10)
+                self.aggregator.update_tick(self.make_tick(dt, price + minute, volume))
+
+        bars = self.aggregator.get_bars("rb2410.SHFE", "1m")
+        self.assertEqual(len(bars), 5)
+        bar = bars[1]
+        self.assertEqual(bar.datetime, start + timedelta(minutes=1))
+        self.assertEqual(bar.interval, Interval.MINUTE)
+        self.assertEqual(
+            (bar.open_price, bar.high_price, bar.low_price, bar.close_price),
+            (3501, 3511, 3491, 3491)
+        )
+        self.assertEqual(bar.volume, 60)
+
+        five_minute = self.aggregator.get_bars("rb2410.SHFE", "5m")
+        self.assertEqual(len(five_minute), 1)
+        self.assertEqual(five_minute[0].high_price, 3514)
+        self.assertEqual(five_minute[0].low_price, 3490)
+        # 第一笔只作为成交量基准
+        self.assertEqual(five_minute[0].volume, 290)
+
+        current = self.aggregator.get_current_bar("rb2410.SHFE", "1m")
+        self.assertEqual(current.datetime, start + timedelta(minutes=5))
+
+        event_types = [call.args[0].type for call in self.event_engine.put.call_args_list]
+        self.assertIn(get_event_type("5m", "rb2410.SHFE"), event_types)
+
+        self.aggregator.close()
+        conn = TradingDatabase(self.database.db_path).get_connection()
+        rows = conn.execute("SELECT interval, COUNT(*) FROM bars GROUP BY interval ORDER BY interval").fetchall()
+        self.assertEqual(rows, [("1m", 5), ("5m", 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from ui.widgets.bar_cache import BarCache, resample, TICK
+from ui.widgets.chart_buffer import CLOSE, VOLUME
+
+CHINA_TZ = timezone(timedelta(hours=8))
+VT_SYMBOL = "rb2410.SHFE"
+
+
+def make_bars(count: int, start: datetime = datetime(2024, 1, 1, 21, tzinfo=CHINA_TZ)) -> list:
+    rng = np.random.default_rng(7)
+    closes = 3500 + np.cumsum(rng.normal(0, 2, count))
+    bars = []
+    for i, close in enumerate(closes):
+        open_price = close + rng.normal(0, 2)
+        bars.append(BarData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            datetime=start + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            volume=float(rng.integers(100, 1000)),
+            open_price=open_price,
+            high_price=max(open_price, close) + 1,
+            low_price=min(open_price, close) - 1,
+            close_price=close,
+            gateway_name="CTP"
+        ))
+    return bars
+
+
+def make_tick(dt: datetime, price: float, volume: float) -> TickData:
+    return TickData(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        datetime=dt,
+        last_price=price,
+        volume=volume,
+        gateway_name="CTP"
+    )
+
+
+def resample_python(bars: list, minutes: int) -> list:
+    """逐根按当地时间分组合并，作为对照"""
+    groups = {}
+    for bar in bars:
+        dt = bar.datetime
+        if minutes == 1440:
+            key = dt.replace(hour=0, minute=0)
+        else:
+            total = dt.hour * 60 + dt.minute
+            key = dt.replace(hour=total // minutes * minutes // 60, minute=total // minutes * minutes % 60)
+        groups.setdefault(key, []).append(bar)
+
+    return [
+        [
+            group[0].open_price, max(b.high_price for b in group), min(b.low_price for b in group),
+            group[-1].close_price, sum(b.volume for b in group), key.timestamp()
+        ]
+        for key, group in groups.items()
+    ]
+
+
+class TestBarCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = BarCache()
+        self.bars = make_bars(3000)
+
+    def test_resample(self):
+        """测试重采样与逐根分组结果一致，日线按当地自然日切分"""
+        data = np.array([
+            [bar.open_price, bar.high_price, bar.low_price, bar.close_price, bar.volume, bar.datetime.timestamp()]
+            for bar in self.bars
+        ]).T
+        for minutes in [5, 15, 60, 1440]:
+            result, starts = resample(data, minutes * 60, 8 * 3600)
+            np.testing.assert_allclose(result.T, resample_python(self.bars, minutes))
+            self.assertEqual(starts[0], 0)
+
+    def test_load_history(self):
+        """测试历史数据只查询一次，查询前合成的K线保留"""
+        tick_time = self.bars[-1].datetime + timedelta(seconds=30)
+        self.cache.update_tick(make_tick(tick_time, 3600, 10))
+
+        query = MagicMock(return_value=self.bars)
+        self.assertEqual(self.cache.load_history(VT_SYMBOL, query), len(self.bars))
+        self.assertEqual(self.cache.load_history(VT_SYMBOL, query), 0)
+        query.assert_called_once()
+        self.assertTrue(self.cache.is_loaded(VT_SYMBOL))
+
+        # 同一分钟的历史K线被行情合成的K线代替
+        buffer = self.cache.get_buffer(VT_SYMBOL, "1m")
+        self.assertEqual(len(buffer), len(self.bars))
+        self.assertEqual(buffer.view(len(buffer) - 1)[:, 0].tolist(), [3600, 3600, 3600, 3600, 0, self.bars[-1].datetime.timestamp()])
+        self.assertEqual(buffer.get_datetime(0), self.bars[0].datetime)
+
+    def test_update_tick(self):
+        """测试行情合成1分钟K线和tick序列，成交量取增量"""
+        start = datetime(2024, 1, 2, 9, 0, 10, tzinfo=CHINA_TZ)
+        for i, (price, volume) in enumerate([(3500, 100), (3510, 105), (3495, 112), (3502, 120)]):
+            self.cache.update_tick(make_tick(start + timedelta(seconds=20 * i), price, volume))
+
+        minute = self.cache.get_buffer(VT_SYMBOL, "1m")
+        self.assertEqual(minute.view().T.tolist(), [
+            [3500, 3510, 3495, 3495, 12, start.replace(second=0).timestamp()],
+            [3502, 3502, 3502, 3502, 8, start.replace(minute=1, second=0).timestamp()],
+        ])
+
+        ticks = self.cache.get_buffer(VT_SYMBOL, TICK)
+        self.assertEqual(ticks.view()[CLOSE].tolist(), [3500, 3510, 3495, 3502])
+        self.assertEqual(ticks.view()[VOLUME].tolist(), [0, 5, 7, 8])
+
+    def test_incremental(self):
+        """测试高周期增量同步与全量重采样一致，并共享同一缓冲区"""
+        self.cache.load_history(VT_SYMBOL, lambda: self.bars[:2000])
+        buffer = self.cache.get_buffer(VT_SYMBOL, "15m")
+        self.assertIs(self.cache.get_buffer(VT_SYMBOL, "15m"), buffer)
+        generation = buffer.generation
+
+        minute = self.cache.get_buffer(VT_SYMBOL, "1m")
+        for bar in self.bars[2000:]:
+            minute.append_bar(bar)
+            self.cache.get_buffer(VT_SYMBOL, "15m")
+            bar.close_price += 1
+            minute.update_bar(bar)
+            self.cache.get_buffer(VT_SYMBOL, "15m")
+        self.assertEqual(buffer.generation, generation)
+
+        np.testing.assert_allclose(buffer.view().T, resample_python(self.bars, 15))
+
+        # 1分钟K线整体替换后全量重算
+        minute.set_bars(self.bars[:100])
+        self.assertEqual(len(self.cache.get_buffer(VT_SYMBOL, "15m")), len(resample_python(self.bars[:100], 15)))
+
+
+if __name__ == '__main__':
+    unittest.main()
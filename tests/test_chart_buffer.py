@@ -0,0 +1,95 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from ui.widgets.chart_buffer import ArrayBuffer, BarBuffer, CLOSE, TIMESTAMP, VOLUME
+
+
+def make_bar(ix: int, tz=None) -> BarData:
+    return BarData(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        datetime=datetime(2024, 1, 1, 9, tzinfo=tz) + timedelta(minutes=ix),
+        interval=Interval.MINUTE,
+        volume=100 + ix,
+        open_price=3500 + ix,
+        high_price=3505 + ix,
+        low_price=3495 + ix,
+        close_price=3501 + ix,
+        gateway_name="CTP"
+    )
+
+
+class TestArrayBuffer(unittest.TestCase):
+    def test_append(self):
+        """测试追加、覆盖最后一条和视图不复制数据"""
+        buffer = ArrayBuffer(2, 10)
+        for i in range(5):
+            buffer.append((i, i * 10))
+        buffer.update_last((4, 99))
+
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(buffer.view().tolist(), [[0, 1, 2, 3, 4], [0, 10, 20, 30, 99]])
+        self.assertEqual(buffer.view(3, 100).tolist(), [[3, 4], [30, 99]])
+        self.assertTrue(np.shares_memory(buffer.view(), buffer.data))
+        self.assertEqual(buffer.generation, 0)
+
+    def test_trim(self):
+        """测试写满后丢弃余量部分，保留最新的capacity条后再追加"""
+        buffer = ArrayBuffer(1, 10)
+        for i in range(11):
+            buffer.append((i,))
+        self.assertEqual(buffer.dropped, 0)
+
+        buffer.append((11,))
+        self.assertEqual(buffer.view()[0].tolist(), list(range(1, 12)))
+        self.assertEqual((buffer.dropped, buffer.generation), (1, 1))
+
+        for i in range(12, 100):
+            buffer.append((i,))
+        self.assertLessEqual(len(buffer), 11)
+        self.assertEqual(buffer.view()[0, -1], 99)
+        self.assertEqual(buffer.dropped + len(buffer), 100)
+
+    def test_set_data(self):
+        """测试整体替换，超过容量时只保留最新部分"""
+        buffer = ArrayBuffer(1, 10)
+        buffer.set_data(np.arange(25, dtype=float).reshape(1, 25))
+        self.assertEqual(buffer.view()[0].tolist(), list(range(15, 25)))
+        self.assertEqual(buffer.generation, 1)
+
+        buffer.clear()
+        self.assertEqual((len(buffer), buffer.generation), (0, 2))
+
+
+class TestBarBuffer(unittest.TestCase):
+    def test_bars(self):
+        """测试K线写入和按序号读取时间"""
+        tz = timezone(timedelta(hours=8))
+        buffer = BarBuffer(100)
+        buffer.set_bars([make_bar(i, tz) for i in range(3)])
+        self.assertEqual(buffer.get_datetime(1), make_bar(1, tz).datetime)
+        self.assertIsNone(buffer.get_datetime(3))
+
+        bar = make_bar(3, tz)
+        buffer.append_bar(bar)
+        bar.close_price = 9999
+        bar.volume = 1
+        buffer.update_bar(bar)
+        self.assertEqual(buffer.view(3, 4)[[CLOSE, VOLUME], 0].tolist(), [9999, 1])
+        self.assertEqual(buffer.get_last_timestamp(), bar.datetime.timestamp())
+        self.assertEqual(buffer.data[TIMESTAMP, 0], make_bar(0, tz).datetime.timestamp())
+
+        buffer.set_bars([])
+        self.assertIsNone(buffer.get_last_timestamp())
+
+
+if __name__ == '__main__':
+    unittest.main()
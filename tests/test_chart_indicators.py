@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt5 import QtWidgets
+import pyqtgraph as pg
+from config.indicators import sma, boll, macd
+from ui.widgets.chart_buffer import BarBuffer, CLOSE
+from ui.widgets.chart_indicators import ChartIndicators, MAIN_PANE, MACD_PANE
+
+
+def make_data(count: int) -> np.ndarray:
+    rng = np.random.default_rng(11)
+    close = 3500 + np.cumsum(rng.normal(0, 2, count))
+    return np.vstack([close, close + 1, close - 1, close, np.full(count, 10.0), np.arange(count) * 60.0])
+
+
+class TestChartIndicators(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    def setUp(self):
+        self.plots = {MAIN_PANE: pg.PlotItem(), MACD_PANE: pg.PlotItem()}
+        self.indicators = ChartIndicators(self.plots)
+        self.data = make_data(1000)
+        self.buffer = BarBuffer(2000)
+        self.buffer.set_data(self.data[:, :800])
+
+    def wait_loaded(self):
+        deadline = time.time() + 5
+        while not self.indicators.ready and time.time() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.assertTrue(self.indicators.ready)
+
+    def assert_values(self, close: np.ndarray):
+        """已完成和正在形成的K线的指标值都与整段批量计算一致"""
+        expected = {
+            "MA": np.array([sma(close, window) for window in (5, 10, 20, 60)]),
+            "BOLL": np.array(boll(close, 20, 2)),
+            "MACD": np.array(macd(close, 12, 26, 9)),
+        }
+        for name, values in expected.items():
+            result = self.indicators.get_indicator(name).values.view()
+            np.testing.assert_allclose(result, values, rtol=1e-9, atol=1e-9)
+
+    def test_load(self):
+        """测试后台批量计算后逐根更新，最后一根随行情变化"""
+        self.indicators.update(self.buffer)
+        self.assertFalse(self.indicators.ready)
+        self.wait_loaded()
+        self.assert_values(self.buffer.view()[CLOSE])
+
+        for i in range(800, 1000):
+            self.buffer.append(self.data[:, i])
+            self.indicators.update(self.buffer)
+            self.buffer.data[CLOSE, i] += 5
+            self.indicators.update(self.buffer)
+        self.assert_values(self.buffer.view()[CLOSE])
+
+        # 只有最后一段由图形项每帧重绘
+        tail = self.indicators.tails[MAIN_PANE]
+        self.assertEqual(len(tail.lines), 7)
+        self.assertEqual(len(self.indicators.tails[MACD_PANE].polygons), 1)
+
+    def test_reload(self):
+        """测试缓冲区整体替换后重新计算，旧的计算结果被丢弃"""
+        self.indicators.update(self.buffer)
+        self.buffer.set_data(self.data[:, :300])
+        self.indicators.update(self.buffer)
+        self.wait_loaded()
+        for _ in range(10):
+            self.app.processEvents()
+        self.assertEqual(len(self.indicators.get_indicator("MA").values), 300)
+        self.assert_values(self.data[CLOSE, :300])
+
+    def test_readouts(self):
+        """测试按序号读取指标值，隐藏的指标不计算"""
+        self.indicators.set_enabled("MACD", False)
+        self.indicators.update(self.buffer)
+        self.wait_loaded()
+
+        readouts = {label: value for label, value, _ in self.indicators.get_readouts(100)}
+        self.assertEqual(set(readouts), {"MA5", "MA10", "MA20", "MA60", "BOLL", "UB", "LB"})
+        self.assertAlmostEqual(readouts["MA5"], self.data[CLOSE, 96:101].mean())
+        self.assertNotIn("MA10", {label for label, _, _ in self.indicators.get_readouts(5)})
+
+        self.assertIsNone(self.indicators.get_y_range(MACD_PANE, 0, 800))
+        low, high = self.indicators.get_y_range(MAIN_PANE, 0, 800)
+        self.assertLess(low, self.data[CLOSE, :800].min())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt5 import QtWidgets
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from ui.widgets.chart_items import CandleItem, VolumeItem, CHUNK_SIZE, aggregate
+from ui.widgets.chart_buffer import BarBuffer
+
+
+def make_bar(ix: int, price: float = 3500) -> BarData:
+    return BarData(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        datetime=datetime(2024, 1, 1, 9) + timedelta(minutes=ix),
+        interval=Interval.MINUTE,
+        volume=100 + ix,
+        open_price=price,
+        high_price=price + 5,
+        low_price=price - 5,
+        close_price=price + 1,
+        gateway_name="CTP"
+    )
+
+
+class TestChartItems(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    def setUp(self):
+        self.item = CandleItem()
+        self.bars = [make_bar(i, 3500 + i) for i in range(CHUNK_SIZE * 2 + 10)]
+        self.buffer = BarBuffer(CHUNK_SIZE * 4)
+        self.buffer.set_bars(self.bars)
+        self.item.update_bars(self.buffer)
+
+    def test_cache(self):
+        """测试已完成K线按块缓存，最后一根不缓存"""
+        self.assertEqual(len(self.item.chunks), 2)
+        self.assertEqual(self.item.finished_count, len(self.bars) - 1)
+        self.assertEqual(self.item.chunk_ranges[1], (3500 + CHUNK_SIZE - 5, 3500 + CHUNK_SIZE * 2 - 1 + 5))
+
+        rect = self.item.boundingRect()
+        self.assertEqual((rect.left(), rect.right()), (-0.5, len(self.bars) - 0.5))
+        self.assertEqual((rect.top(), rect.bottom()), (3495, 3500 + len(self.bars) - 1 + 5))
+
+    def test_incremental(self):
+        """测试更新最后一根K线不重录缓存，新增K线只重录尾块"""
+        with patch.object(self.item, "record_picture", wraps=self.item.record_picture) as record:
+            self.bars[-1].high_price = 9999
+            self.buffer.update_bar(self.bars[-1])
+            self.item.update_bars(self.buffer)
+            record.assert_not_called()
+            self.assertEqual(self.item.boundingRect().bottom(), 9999)
+
+            self.buffer.append_bar(make_bar(len(self.bars)))
+            self.item.update_bars(self.buffer)
+            record.assert_called_once_with(CHUNK_SIZE * 2, len(self.buffer) - 1)
+
+    def test_rebuild(self):
+        """测试整体替换K线或丢弃旧K线时重建缓存"""
+        chunks = self.item.chunks
+        self.buffer.set_bars(self.bars[-CHUNK_SIZE:])
+        self.item.update_bars(self.buffer)
+        self.assertIsNot(self.item.chunks, chunks)
+        self.assertEqual(len(self.item.chunks), 0)
+        self.assertEqual(self.item.finished_count, CHUNK_SIZE - 1)
+
+        # 写满后丢弃最旧的K线，数量不减少也要重建
+        buffer = BarBuffer(CHUNK_SIZE)
+        for i in range(CHUNK_SIZE + CHUNK_SIZE // 10):
+            buffer.append_bar(make_bar(i, 3500 + i))
+        self.item.update_bars(buffer)
+        self.assertEqual(self.item.chunk_ranges[0][0], 3495)
+        buffer.append_bar(make_bar(CHUNK_SIZE * 2, 3500))
+        self.item.update_bars(buffer)
+        self.assertEqual(len(buffer), CHUNK_SIZE + 1)
+        self.assertEqual(self.item.chunk_ranges[0][0], 3500 + CHUNK_SIZE // 10 - 5)
+
+        buffer.clear()
+        self.item.update_bars(buffer)
+        self.assertTrue(self.item.boundingRect().isNull())
+
+    def test_y_range(self):
+        """测试区间Y轴范围"""
+        self.assertEqual(self.item.get_y_range(0, len(self.bars)), (3495, 3500 + len(self.bars) - 1 + 5))
+        self.assertEqual(self.item.get_y_range(10, 20), (3505, 3524))
+        self.assertIsNone(self.item.get_y_range(len(self.bars), len(self.bars) + 10))
+
+        volume = VolumeItem()
+        volume.update_bars(self.buffer)
+        self.assertEqual(volume.get_y_range(-5, 3), (0, 102))
+
+    def test_paint(self):
+        """测试在视图中绘制，块在第一次绘制时录制"""
+        self.assertEqual(self.item.chunks, [None, None])
+
+        scene = QtWidgets.QGraphicsScene()
+        scene.addItem(self.item)
+        view = QtWidgets.QGraphicsView(scene)
+        view.resize(400, 300)
+        view.fitInView(self.item.boundingRect())
+        view.grab()
+        self.assertTrue(all(self.item.chunks))
+
+    def test_aggregate(self):
+        """测试合并K线：开取首、高取最大、低取最小、收取尾、量求和，末尾不满一组单独合并"""
+        data = np.array([
+            [1, 2, 3, 4, 5],
+            [6, 9, 7, 8, 5],
+            [0, 1, -1, 2, 3],
+            [2, 3, 4, 5, 6],
+            [10, 20, 30, 40, 50],
+        ], dtype=float)
+        result = aggregate(data, 2)
+        self.assertEqual(result.T.tolist(), [
+            [1, 9, 0, 3, 30],
+            [3, 8, -1, 5, 70],
+            [5, 5, 3, 6, 50],
+        ])
+        self.assertIs(aggregate(data, 1), data)
+
+    def test_lod(self):
+        """测试合并显示：Y轴范围按合并后的K线计算，合并块按缩放级别缓存"""
+        volume = VolumeItem()
+        volume.update_bars(self.buffer)
+        with patch.object(VolumeItem, "get_lod_size", return_value=2):
+            # 覆盖2-3和4-5两组，上限为较大一组的成交量之和
+            self.assertEqual(volume.get_y_range(3, 5), (0, 104 + 105))
+
+            scene = QtWidgets.QGraphicsScene()
+            scene.addItem(volume)
+            view = QtWidgets.QGraphicsView(scene)
+            view.resize(400, 300)
+            view.fitInView(volume.boundingRect())
+            view.grab()
+
+        # 133组中前CHUNK_SIZE组为一个完整的块，其余已完成的组在尾块中，最后一组直接绘制
+        self.assertEqual(list(volume.lod_chunks[2]), [0])
+        self.assertEqual(volume.lod_tails[2][0], (len(self.bars) - 1) // 2)
+        self.assertEqual(volume.chunks, [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
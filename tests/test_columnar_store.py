@@ -0,0 +1,75 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.columnar_store import ColumnarStore, parse_date_range, to_timestamp
+
+
+class TestColumnarStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ColumnarStore(Path(self.temp_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_bars(self, start: datetime, count: int):
+        return [
+            (start + timedelta(minutes=i), 100 + i, 101 + i, 99 + i, 100.5 + i, 10, 1000, 50)
+            for i in range(count)
+        ]
+
+    def test_append_and_load(self):
+        """测试按日分区追加和按时间范围读取"""
+        day1 = datetime(2024, 5, 6, 14, 50)
+        day2 = datetime(2024, 5, 7, 9, 0)
+        self.store.append_bars("rb2410", "1m", self.make_bars(day1, 10))
+        self.store.append_bars("rb2410", "1m", self.make_bars(day2, 10))
+        self.assertEqual(self.store.get_days("rb2410", "1m"), ["20240506", "20240507"])
+
+        data = self.store.load_bars("rb2410", "1m", day1 + timedelta(minutes=5), day2 + timedelta(minutes=2))
+        self.assertEqual(len(data), 8)
+        self.assertEqual(data["close"][0], 105.5)
+        self.assertEqual(data["datetime"][-1], to_timestamp(day2 + timedelta(minutes=2)))
+
+    def test_single_day_is_view(self):
+        """测试单日查询返回内存映射视图"""
+        start = datetime(2024, 5, 6, 9, 0)
+        self.store.append_bars("rb2410", "1m", self.make_bars(start, 5))
+        self.store.append_bars("rb2410", "1m", self.make_bars(start + timedelta(minutes=5), 5))
+
+        data = self.store.load_bars("rb2410", "1m", start, start + timedelta(hours=1))
+        self.assertEqual(len(data), 10)
+        self.assertIsInstance(data.base, np.memmap)
+
+    def test_ticks(self):
+        """测试行情存档"""
+        now = datetime(2024, 5, 6, 9, 0, 0)
+        records = [(now + timedelta(seconds=i), 3500.0 + i, i, 0, 100, 3499, 3501, 1, 2) for i in range(20)]
+        self.store.append_ticks("rb2410", records)
+        data = self.store.load_ticks("rb2410", now, now + timedelta(seconds=9))
+        self.assertEqual(len(data), 10)
+        self.assertEqual(data["ask_volume"].sum(), 20)
+
+    def test_missing_symbol(self):
+        """测试无存档时返回空数组"""
+        data = self.store.load_ticks("xx", datetime(2024, 1, 1), datetime(2024, 1, 2))
+        self.assertEqual(len(data), 0)
+
+    def test_parse_date_range(self):
+        start, end = parse_date_range("2024-05-06", "2024-05-07")
+        self.assertEqual(start, datetime(2024, 5, 6))
+        self.assertEqual(end.date(), datetime(2024, 5, 7).date())
+        self.assertEqual(end.hour, 23)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.trader.constant import Exchange, Product
+from vnpy.trader.object import ContractData
+from ui.widgets.contract_search import ContractSearchIndex, get_initials
+
+
+def make_contract(symbol: str, name: str, exchange: Exchange = Exchange.SHFE, product: Product = Product.FUTURES) -> ContractData:
+    return ContractData(
+        symbol=symbol,
+        exchange=exchange,
+        name=name,
+        product=product,
+        size=10,
+        pricetick=1,
+        gateway_name="MockCTP"
+    )
+
+
+class TestContractSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ContractSearchIndex()
+        self.index.set_contracts([
+            make_contract("rb2410", "螺纹钢2410"),
+            make_contract("hc2410", "热轧卷板2410"),
+            make_contract("m2409", "豆粕2409", Exchange.DCE),
+            make_contract("IF2406", "沪深300股指2406", Exchange.CFFEX),
+            make_contract("m2409-C-3000", "豆粕购3000", Exchange.DCE, Product.OPTION),
+        ])
+
+    def test_initials(self):
+        """测试拼音首字母"""
+        self.assertEqual(get_initials("螺纹钢"), "lwg")
+        self.assertEqual(get_initials("沪深300"), "hs300")
+
+    def test_substring(self):
+        """测试代码、交易所、名称、合约类型的子串匹配"""
+        self.assertEqual(self.index.search("2410"), {0, 1})
+        self.index.search("")
+        self.assertEqual(self.index.search("DCE"), {2, 4})
+        self.index.search("")
+        self.assertEqual(self.index.search("豆粕"), {2, 4})
+        self.index.search("")
+        self.assertEqual(self.index.search("期权"), {4})
+        self.index.search("")
+        self.assertEqual(self.index.search(" if24 "), {3})
+        self.index.search("")
+        self.assertEqual(self.index.search("xyz"), set())
+
+    def test_pinyin(self):
+        """测试按拼音首字母搜索中文名称"""
+        self.assertEqual(self.index.search("lwg"), {0})
+        self.index.search("")
+        self.assertEqual(self.index.search("dp"), {2, 4})
+
+    def test_incremental(self):
+        """测试逐字输入收窄结果，删除字符后重新查询"""
+        expected = {"m": {2, 4}, "m2": {2, 4}, "m24": {2, 4}, "m2409-": {4}}
+        for query in ["m", "m2", "m24", "m2409-"]:
+            self.assertEqual(self.index.search(query), expected[query])
+        self.assertEqual(self.index.search("m2"), {2, 4})
+        self.assertEqual(self.index.search("r"), {0, 1})
+        self.assertIsNone(self.index.search(""))
+
+    def test_add(self):
+        """测试新增和替换合约"""
+        self.assertEqual(self.index.search("rb"), {0})
+        self.index.add(5, make_contract("rb2501", "螺纹钢2501"))
+        self.assertEqual(self.index.search("rb"), {0, 5})
+
+        self.index.add(0, make_contract("ag2412", "白银2412"))
+        self.assertEqual(self.index.search("rb"), {5})
+        self.assertEqual(self.index.search("by"), {0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtTest import QTest
+from vnpy.trader.constant import Exchange, Product
+from vnpy.trader.object import ContractData
+from ui.widgets.contract_table import ContractTableModel, SubscribeButtonDelegate, COLUMN_SUBSCRIBE
+
+
+def make_contract(symbol: str, name: str = "") -> ContractData:
+    return ContractData(
+        symbol=symbol,
+        exchange=Exchange.SHFE,
+        name=name or symbol,
+        product=Product.FUTURES,
+        size=10,
+        pricetick=1,
+        gateway_name="MockCTP"
+    )
+
+
+class TestContractTableModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    def setUp(self):
+        self.model = ContractTableModel()
+        self.model.set_contracts([make_contract(f"rb24{i:02d}", f"螺纹钢24{i:02d}") for i in range(100)])
+
+    def test_set_contracts(self):
+        """测试整体加载合约"""
+        self.assertEqual(self.model.rowCount(), 100)
+        self.assertEqual(self.model.data(self.model.index(5, 0)), "rb2405.SHFE")
+        self.assertEqual(self.model.data(self.model.index(5, 3)), "螺纹钢2405")
+        self.assertIsNone(self.model.data(self.model.index(5, COLUMN_SUBSCRIBE)))
+
+    def test_add_contract(self):
+        """测试新增合约追加行，已有合约原地更新"""
+        self.assertEqual(self.model.add_contract(make_contract("hc2410")), 100)
+        self.assertEqual(self.model.rowCount(), 101)
+
+        self.assertEqual(self.model.add_contract(make_contract("rb2403", "新名称")), 3)
+        self.assertEqual(self.model.rowCount(), 101)
+        self.assertEqual(self.model.data(self.model.index(3, 3)), "新名称")
+
+    def test_delegate_click(self):
+        """测试委托绘制的订阅按钮点击"""
+        view = QtWidgets.QTableView()
+        view.setModel(self.model)
+        delegate = SubscribeButtonDelegate(view)
+        view.setItemDelegateForColumn(COLUMN_SUBSCRIBE, delegate)
+        view.resize(1000, 400)
+        view.show()
+        QTest.qWaitForWindowExposed(view)
+
+        clicked = []
+        delegate.clicked.connect(lambda index: clicked.append(index.row()))
+
+        rect = view.visualRect(self.model.index(2, COLUMN_SUBSCRIBE))
+        QTest.mouseClick(view.viewport(), QtCore.Qt.LeftButton, pos=rect.center())
+        self.assertEqual(clicked, [2])
+
+        # 按下和松开不在同一行时不触发
+        other = view.visualRect(self.model.index(4, COLUMN_SUBSCRIBE))
+        QTest.mousePress(view.viewport(), QtCore.Qt.LeftButton, pos=rect.center())
+        QTest.mouseRelease(view.viewport(), QtCore.Qt.LeftButton, pos=other.center())
+        self.assertEqual(clicked, [2])
+        view.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+from queue import Full
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.event import Event
+from vnpy.trader.constant import Direction, Exchange, Status
+from vnpy.trader.object import TradeData, OrderData, PositionData, AccountData
+from vnpy.trader.event import EVENT_TRADE, EVENT_ORDER, EVENT_POSITION, EVENT_ACCOUNT
+from config.database import TradingDatabase
+from config.data_persistence_engine import DataPersistenceEngine, SnapshotCoalescer
+
+
+class TestDataPersistenceEngine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.database = TradingDatabase(Path(self.temp_dir) / "trading.db")
+        self.engine = DataPersistenceEngine(MagicMock(), MagicMock(), self.database)
+
+    def tearDown(self):
+        self.engine.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_trade_event(self, index: int) -> Event:
+        trade = TradeData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            orderid=f"O{index}",
+            tradeid=f"T{index}",
+            direction=Direction.LONG,
+            price=3500.0,
+            volume=1,
+            datetime=datetime.now(),
+            gateway_name="CTP"
+        )
+        return Event(EVENT_TRADE, trade)
+
+    def test_close_drains_queue(self):
+        """测试关闭时写完队列中的全部数据"""
+        for i in range(500):
+            self.engine.process_trade_event(self.make_trade_event(i))
+        self.engine.close()
+
+        self.assertEqual(TradingDatabase(self.database.db_path).get_total_trades(), 500)
+        stats = self.engine.get_statistics()
+        self.assertEqual(stats["written"], 500)
+        self.assertEqual(stats["queue_depth"], 0)
+        # 500条记录应合并为少量批次写入
+        self.assertLess(stats["flush_count"], 10)
+
+    def test_flush_on_interval(self):
+        """测试未达批量阈值时按时间落库"""
+        self.engine.process_trade_event(self.make_trade_event(1))
+        deadline = time.time() + 5
+        while self.engine.get_statistics()["written"] < 1 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.engine.get_statistics()["written"], 1)
+        self.assertGreater(self.engine.get_statistics()["last_flush_latency"], 0)
+
+    def test_bad_record_does_not_drop_batch(self):
+        """测试违反约束的记录不影响同批其他记录"""
+        order = OrderData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            orderid="O1",
+            direction=Direction.LONG,
+            price=3500.0,
+            volume=1,
+            status=Status.SUBMITTING,
+            datetime=datetime.now(),
+            gateway_name="CTP"
+        )
+        self.engine.process_order_event(Event(EVENT_ORDER, order))
+        self.engine.process_trade_event(self.make_trade_event(1))
+        self.engine.close()
+
+        stats = self.engine.get_statistics()
+        self.assertEqual(stats["written"], 1)
+        self.assertEqual(stats["failed"], 1)
+
+    def test_unexpected_error_keeps_writer(self):
+        """测试非数据库异常（整数超出SQLite范围）只影响该条记录，写入线程继续运行"""
+        event = self.make_trade_event(1)
+        event.data.volume = 2 ** 70
+        self.engine.process_trade_event(event)
+        self.engine.process_trade_event(self.make_trade_event(2))
+        self.engine.close()
+
+        stats = self.engine.get_statistics()
+        self.assertEqual((stats["written"], stats["failed"]), (1, 1))
+
+    def test_full_queue_drops(self):
+        """测试队列已满时丢弃记录并计数，不阻塞事件线程"""
+        self.engine.queue.put_nowait = MagicMock(side_effect=Full)
+        self.engine.process_trade_event(self.make_trade_event(1))
+        stats = self.engine.get_statistics()
+        self.assertEqual((stats["queued"], stats["dropped"]), (0, 1))
+        del self.engine.queue.put_nowait
+
+    def count_rows(self, table: str) -> int:
+        conn = TradingDatabase(self.database.db_path).get_connection()
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_position_snapshots_coalesced(self):
+        """测试同一持仓的多次推送只保存最新快照"""
+        for pnl in range(100):
+            position = PositionData(
+                symbol="rb2410",
+                exchange=Exchange.SHFE,
+                direction=Direction.LONG,
+                volume=2,
+                price=3500.0,
+                pnl=float(pnl),
+                gateway_name="CTP"
+            )
+            self.engine.process_position_event(Event(EVENT_POSITION, position))
+        self.engine.close()
+
+        self.assertEqual(self.count_rows("positions"), 1)
+        conn = TradingDatabase(self.database.db_path).get_connection()
+        self.assertEqual(conn.execute("SELECT pnl FROM positions").fetchone()[0], 99.0)
+
+    def test_unchanged_account_not_rewritten(self):
+        """测试资金未变化时不重复落库"""
+        account = AccountData(accountid="A1", balance=1e6, frozen=0, gateway_name="CTP")
+        for _ in range(3):
+            self.engine.process_account_event(Event(EVENT_ACCOUNT, account))
+            self.engine.flush_snapshots()
+        self.engine.close()
+
+        self.assertEqual(self.count_rows("account_flow"), 1)
+        self.assertEqual(self.engine.get_statistics()["snapshots_received"], 3)
+
+
+class TestSnapshotCoalescer(unittest.TestCase):
+    def test_tolerance(self):
+        """测试容差内的变化被忽略"""
+        coalescer = SnapshotCoalescer(tolerance=0.5)
+        coalescer.update("A", "r1", (1.0,))
+        self.assertEqual(coalescer.drain(), ["r1"])
+        coalescer.update("A", "r2", (1.2,))
+        self.assertEqual(coalescer.drain(), [])
+        coalescer.update("A", "r3", (2.0,))
+        self.assertEqual(coalescer.drain(), ["r3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import TradingDatabase, TradeRecord, OrderRecord, PositionRecord, AccountFlow, SCHEMA_VERSION
+
+
+class TestTradingDatabase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = TradingDatabase(Path(self.temp_dir) / "trading.db")
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_trade(self, index: int) -> TradeRecord:
+        return TradeRecord(
+            trade_id=f"T{index}",
+            symbol="rb2410",
+            direction="多",
+            volume=1,
+            price=3500.0 + index,
+            trade_time=datetime(2024, 5, 6, 9, 0, index % 60),
+            commission=1.5,
+            order_id=f"O{index}"
+        )
+
+    def test_wal_mode(self):
+        """测试连接使用WAL日志模式"""
+        conn = self.db.get_connection()
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_connection_reused(self):
+        """测试同一线程复用长连接"""
+        self.assertIs(self.db.get_connection(), self.db.get_connection())
+
+    def test_connection_per_thread(self):
+        """测试不同线程使用各自的连接"""
+        main_conn = self.db.get_connection()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.db.get_connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(main_conn, other[0])
+
+    def test_save_and_query(self):
+        """测试保存各类记录"""
+        for i in range(10):
+            self.db.save_trade(self.make_trade(i))
+        self.db.save_order(OrderRecord(
+            order_id="O1", symbol="rb2410", direction="多", volume=1,
+            price=3500.0, order_time=datetime.now(), status="待成交"
+        ))
+        self.db.save_position(PositionRecord(
+            symbol="rb2410", direction="多", volume=1, price=3500.0,
+            position_time=datetime.now(), pnl=10.0
+        ))
+        self.db.save_account_flow(AccountFlow(
+            flow_id="F1", account_id="A1", balance=1e6, available=9e5,
+            margin=1e5, pnl=0.0, commission=0.0, record_time=datetime.now()
+        ))
+
+        self.assertEqual(self.db.get_total_trades(), 10)
+        self.assertEqual(len(self.db.get_trades(limit=5)), 5)
+        self.assertEqual(self.db.get_win_rate(), 1.0)
+
+    def test_close_reopens(self):
+        """测试关闭后可以重新获取连接"""
+        self.db.save_trade(self.make_trade(1))
+        self.db.close()
+        self.assertEqual(self.db.get_total_trades(), 1)
+
+
+    def make_tick_row(self, dt: datetime) -> tuple:
+        return ("rb2410", dt, 3500.0, 10, 100, 3499.0, 3501.0, 1, 1)
+
+    def test_tick_partitions(self):
+        """测试行情按日写入分表并跨分表查询"""
+        day1 = datetime(2024, 5, 6, 14, 59)
+        day2 = datetime(2024, 5, 7, 9, 1)
+        self.db.save_ticks([self.make_tick_row(day1), self.make_tick_row(day2), self.make_tick_row(day2)])
+
+        self.assertEqual(self.db.get_tick_partitions(), ["ticks_20240506", "ticks_20240507"])
+        self.assertEqual(len(self.db.get_ticks("rb2410", day1, day2)), 3)
+        self.assertEqual(len(self.db.get_ticks("rb2410", day2, day2 + timedelta(hours=1))), 2)
+
+    def test_tick_partition_rollback(self):
+        """测试跨日批次写入失败回滚后，新分表不留在缓存中，之后可以正常写入"""
+        day1 = datetime(2024, 1, 1, 14, 59)
+        day2 = datetime(2024, 1, 2, 9, 1)
+        self.db.save_ticks([self.make_tick_row(day1)])
+
+        bad_row = self.make_tick_row(day2)[:-1]
+        with self.assertRaises(sqlite3.Error):
+            self.db.save_ticks([self.make_tick_row(day1), bad_row])
+        self.assertEqual(self.db.get_tick_partitions(), ["ticks_20240101"])
+
+        self.db.save_ticks([self.make_tick_row(day2)])
+        self.assertEqual(self.db.get_tick_partitions(), ["ticks_20240101", "ticks_20240102"])
+        self.assertEqual(len(self.db.get_ticks("rb2410", day1, day2)), 2)
+
+    def test_clear_old_data(self):
+        """测试清理过期数据删除整张分表，且跨月计算截止日期正确"""
+        now = datetime.now()
+        old = now - timedelta(days=45)
+        self.db.save_ticks([self.make_tick_row(old), self.make_tick_row(now)])
+        self.db.save_trade(TradeRecord(
+            trade_id="OLD", symbol="rb2410", direction="多", volume=1,
+            price=3500.0, trade_time=old
+        ))
+        self.db.save_trade(TradeRecord(
+            trade_id="NEW", symbol="rb2410", direction="多", volume=1,
+            price=3500.0, trade_time=now
+        ))
+
+        self.db.clear_old_data(days_to_keep=30)
+
+        self.assertEqual(self.db.get_tick_partitions(), [self.db.get_tick_partition(now)])
+        self.assertEqual([t.trade_id for t in self.db.get_trades()], ["NEW"])
+
+    def test_incremental_vacuum_enabled(self):
+        """测试新建数据库启用增量vacuum"""
+        mode = self.db.get_connection().execute("PRAGMA auto_vacuum").fetchone()[0]
+        self.assertEqual(mode, 2)
+
+    def test_incremental_vacuum_upgrade(self):
+        """测试旧版本的已有数据库升级时切换为增量vacuum"""
+        path = Path(self.temp_dir) / "legacy.db"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE legacy (value TEXT)")
+        conn.execute("INSERT INTO legacy VALUES ('x')")
+        conn.execute("PRAGMA user_version=1")
+        conn.commit()
+        conn.close()
+
+        db = TradingDatabase(path)
+        conn = db.get_connection()
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        self.assertEqual(conn.execute("SELECT value FROM legacy").fetchall(), [("x",)])
+        db.close()
+
+
+    def test_keyset_pagination(self):
+        """测试游标分页按(trade_time, id)遍历全部记录且不重复"""
+        for i in range(25):
+            trade = self.make_trade(i)
+            trade.strategy_name = "双均线" if i % 2 else ""
+            self.db.save_trade(trade)
+
+        page, cursor = self.db.get_trades_page(page_size=10)
+        self.assertEqual(len(page), 10)
+        self.assertIsNotNone(cursor)
+
+        ids = [row[1] for row in self.db.iter_trades(page_size=7, output="tuple")]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(ids[0], "T24")
+
+        ascending = [t.trade_id for t in self.db.iter_trades(page_size=4, ascending=True)]
+        self.assertEqual(ascending, list(reversed(ids)))
+
+        pages = list(self.db.iter_trade_pages(page_size=5, output="numpy", strategy_name="双均线"))
+        self.assertEqual(sum(len(page) for page in pages), 12)
+        self.assertEqual(pages[0].price.dtype.kind, "f")
+
+    def test_get_trades_limit_parameterized(self):
+        """测试limit作为参数绑定"""
+        for i in range(3):
+            self.db.save_trade(self.make_trade(i))
+        self.assertEqual(len(self.db.get_trades(limit="2")), 2)
+
+
+    def test_daily_stats_maintained(self):
+        """测试每日汇总随写入增量更新，重复成交不重复累计"""
+        day = datetime(2024, 5, 6, 10, 0)
+        for pnl in (100.0, -40.0, 0.0, 25.0):
+            self.db.save_position(PositionRecord(
+                symbol="rb2410", direction="多", volume=1, price=3500.0,
+                position_time=day, pnl=pnl
+            ))
+        for i in range(3):
+            trade = self.make_trade(i)
+            trade.trade_time = day
+            self.db.save_trade(trade)
+        # 同一成交重复推送
+        duplicate = self.make_trade(0)
+        duplicate.trade_time = day
+        self.db.save_trade(duplicate)
+
+        self.assertEqual(self.db.get_daily_pnl(day), 85.0)
+        self.assertAlmostEqual(self.db.get_win_rate(), 2 / 3)
+        self.assertEqual(self.db.get_total_trades(), 3)
+
+        stats = self.db.get_daily_stats(start_date=day, end_date=day)
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["trade_volume"], 3)
+        self.assertAlmostEqual(stats[0]["commission"], 4.5)
+
+    def test_daily_stats_backfill(self):
+        """测试旧数据库首次升级时回填每日汇总"""
+        self.db.save_position(PositionRecord(
+            symbol="rb2410", direction="多", volume=1, price=3500.0,
+            position_time=datetime(2024, 5, 6, 10, 0), pnl=50.0
+        ))
+        conn = self.db.get_connection()
+        conn.execute("DROP TABLE daily_stats")
+        conn.execute("PRAGMA user_version=0")
+        conn.commit()
+
+        reopened = TradingDatabase(self.db.db_path)
+        self.assertEqual(reopened.get_daily_pnl(datetime(2024, 5, 6)), 50.0)
+        reopened.close()
+
+    def test_schema_version(self):
+        """测试建表后记录表结构版本"""
+        version = self.db.get_connection().execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, SCHEMA_VERSION)
+
+    def test_schema_ddl_skipped(self):
+        """测试版本为最新时启动不再执行DDL，版本落后时重新执行"""
+        conn = self.db.get_connection()
+        conn.execute("DROP INDEX idx_trades_symbol_time")
+        conn.commit()
+
+        query = "SELECT COUNT(*) FROM sqlite_master WHERE name = 'idx_trades_symbol_time'"
+        reopened = TradingDatabase(self.db.db_path)
+        self.assertEqual(reopened.get_connection().execute(query).fetchone()[0], 0)
+        reopened.close()
+
+        conn.execute("PRAGMA user_version=0")
+        conn.commit()
+        reopened = TradingDatabase(self.db.db_path)
+        self.assertEqual(reopened.get_connection().execute(query).fetchone()[0], 1)
+        reopened.close()
+
+    def test_lazy_global_instance(self):
+        """测试导入模块时不创建全局数据库实例"""
+        import config.database as database
+        self.assertIn("get_trading_db", dir(database))
+        self.assertNotIn("trading_db", vars(database))
+
+
+if __name__ == '__main__':
+    unittest.main()
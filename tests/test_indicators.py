@@ -0,0 +1,111 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.indicators import (
+    sma, ema, rsi, boll, macd, atr,
+    SMA, EMA, RSI, BOLL, MACD, ATR
+)
+
+
+def make_prices(count: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    close = 3500 + np.cumsum(rng.normal(0, 2, count))
+    high = close + rng.uniform(0, 3, count)
+    low = close - rng.uniform(0, 3, count)
+    return high, low, close
+
+
+def stream(updater, *columns) -> np.ndarray:
+    """逐根调用流式计算，检查peek与update结果一致"""
+    result = []
+    for values in zip(*columns):
+        peeked = updater.peek(*values)
+        updated = updater.update(*values)
+        np.testing.assert_allclose(peeked, updated, rtol=1e-12)
+        result.append(updated)
+    return np.array(result).T
+
+
+class TestIndicators(unittest.TestCase):
+    def setUp(self):
+        self.high, self.low, self.close = make_prices(3000)
+
+    def assert_same(self, batch, streaming):
+        np.testing.assert_array_equal(np.isnan(batch), np.isnan(streaming))
+        np.testing.assert_allclose(batch, streaming, rtol=1e-9, atol=1e-9)
+
+    def test_reference(self):
+        """测试批量计算与按定义的逐根计算一致"""
+        close = self.close[:100]
+        result = sma(close, 10)
+        self.assertTrue(np.isnan(result[:9]).all())
+        self.assertAlmostEqual(result[50], close[41:51].mean())
+
+        expected = close[:10].mean()
+        for price in close[10:]:
+            expected += 2 / 11 * (price - expected)
+        self.assertAlmostEqual(ema(close, 10)[-1], expected)
+
+        mid, up, down = boll(close, 20, 2)
+        self.assertAlmostEqual(up[-1] - mid[-1], 2 * close[-20:].std())
+
+        self.assertEqual(rsi(np.arange(30.0), 14)[-1], 100)
+        self.assertEqual(rsi(np.full(30, 5.0), 14)[-1], 50)
+        self.assertTrue(np.isnan(rsi(close, 14)[:14]).all())
+        self.assertTrue(np.isnan(atr(self.high, self.low, self.close, 14)[:14]).all())
+
+    def test_streaming(self):
+        """测试流式计算与批量计算一致"""
+        close = self.close
+        self.assert_same(sma(close, 20), stream(SMA(20), close))
+        self.assert_same(ema(close, 20), stream(EMA(20), close))
+        self.assert_same(rsi(close, 14), stream(RSI(14), close))
+        self.assert_same(np.array(boll(close, 20, 2)), stream(BOLL(20, 2), close))
+        self.assert_same(np.array(macd(close, 12, 26, 9)), stream(MACD(12, 26, 9), close))
+        self.assert_same(atr(self.high, self.low, close, 14), stream(ATR(14), self.high, self.low, close))
+
+    def test_load(self):
+        """测试批量加载历史后继续逐根更新，与整段批量计算一致"""
+        close, split = self.close, 2000
+        for updater, expected in [
+            (SMA(20), sma(close, 20)),
+            (EMA(20), ema(close, 20)),
+            (RSI(14), rsi(close, 14)),
+            (BOLL(20, 2), np.array(boll(close, 20, 2))),
+            (MACD(12, 26, 9), np.array(macd(close, 12, 26, 9))),
+        ]:
+            loaded = np.array(updater.load(close[:split]))
+            streamed = stream(updater, close[split:])
+            self.assert_same(expected, np.concatenate([loaded, streamed], axis=-1))
+
+        updater = ATR(14)
+        updater.load(self.high[:10], self.low[:10], close[:10])
+        streamed = stream(updater, self.high[10:], self.low[10:], close[10:])
+        self.assert_same(atr(self.high, self.low, close, 14)[10:], streamed)
+
+    def test_short(self):
+        """测试数据少于窗口时全部为NaN"""
+        close = self.close[:5]
+        for result in [sma(close, 10), ema(close, 10), rsi(close, 10), macd(close)[1], boll(close)[0]]:
+            self.assertEqual(len(result), 5)
+            self.assertTrue(np.isnan(result).all())
+        self.assertEqual(len(atr([], [], [])), 0)
+
+    def test_long_run(self):
+        """测试长时间运行后流式计算没有累计误差"""
+        _, _, close = make_prices(200000, seed=5)
+        window = close[-20:]
+        updater = BOLL(20, 2)
+        for price in close:
+            mid, up, _ = updater.update(price)
+        self.assertAlmostEqual(mid, window.mean(), places=9)
+        self.assertAlmostEqual(up - mid, 2 * window.std(), places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+from ui.widgets.refresh_scheduler import RefreshScheduler, MIN_FPS, MAX_FPS
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    def setUp(self):
+        self.scheduler = RefreshScheduler(fps=30)
+        self.calls = []
+        self.scheduler.register(self.on_refresh)
+
+    def tearDown(self):
+        self.scheduler.unregister(self.on_refresh)
+
+    def on_refresh(self):
+        self.calls.append(time.perf_counter())
+
+    def test_coalesce(self):
+        """测试同一帧内多次标记只刷新一次"""
+        for _ in range(100):
+            self.scheduler.mark_dirty(self.on_refresh)
+        self.scheduler.refresh()
+        self.scheduler.refresh()
+
+        self.assertEqual(len(self.calls), 1)
+        stats = self.scheduler.get_statistics()
+        self.assertEqual(stats["requests"], 100)
+        self.assertEqual(stats["coalesced"], 99)
+        self.assertEqual(stats["frames"], 1)
+
+    def test_timer_refresh(self):
+        """测试定时器按帧率刷新"""
+        self.scheduler.mark_dirty(self.on_refresh)
+        deadline = time.perf_counter() + 1
+        while not self.calls and time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_mark_from_thread(self):
+        """测试在其他线程标记"""
+        thread = threading.Thread(
+            target=lambda: [self.scheduler.mark_dirty(self.on_refresh) for _ in range(1000)]
+        )
+        thread.start()
+        thread.join()
+        self.scheduler.refresh()
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.scheduler.get_statistics()["coalesced"], 999)
+
+    def test_unregistered_ignored(self):
+        """测试未注册或已注销的回调不会被执行"""
+        self.scheduler.unregister(self.on_refresh)
+        self.scheduler.mark_dirty(self.on_refresh)
+        self.scheduler.refresh()
+        self.assertEqual(self.calls, [])
+
+    def test_dropped_frames(self):
+        """测试单帧超时计为丢帧"""
+        slow = lambda: time.sleep(0.1)
+        self.scheduler.register(slow)
+        self.scheduler.mark_dirty(slow)
+        self.scheduler.refresh()
+        self.scheduler.unregister(slow)
+        self.assertGreaterEqual(self.scheduler.get_statistics()["dropped"], 2)
+
+    def test_fps_limits(self):
+        """测试帧率限制在允许范围内"""
+        self.scheduler.set_fps(1000)
+        self.assertEqual(self.scheduler.fps, MAX_FPS)
+        self.scheduler.set_fps(1)
+        self.assertEqual(self.scheduler.fps, MIN_FPS)
+        self.assertEqual(self.scheduler.timer.interval(), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
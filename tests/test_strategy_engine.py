@@ -0,0 +1,337 @@
+import sys
+import os
+import tempfile
+import unittest
+from copy import copy
+from datetime import datetime, timedelta
+from itertools import count
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Direction, Exchange, Offset, Product, Status
+from vnpy.trader.event import EVENT_TICK, EVENT_ORDER, EVENT_TRADE
+from vnpy.trader.object import ContractData, OrderData, TickData, TradeData
+from config.strategy_engine import StrategyEngine
+from config.strategy_template import StrategyPerformance, DoubleMaStrategy, StrategyTemplate
+
+
+def make_tick(symbol: str, price: float = 3500, dt: datetime = None) -> TickData:
+    return TickData(
+        symbol=symbol,
+        exchange=Exchange.SHFE,
+        datetime=dt or datetime.now(),
+        last_price=price,
+        gateway_name="CTP"
+    )
+
+
+def make_main_engine() -> MagicMock:
+    """模拟MainEngine，合约乘数10，委托号依次递增，开平转换不拆分委托"""
+    main_engine = MagicMock()
+    main_engine.convert_order_request.side_effect = lambda req, gateway_name, lock: [req]
+    main_engine.get_contract.return_value = ContractData(
+        symbol="rb2410", exchange=Exchange.SHFE, name="螺纹钢", product=Product.FUTURES,
+        size=10, pricetick=1, gateway_name="CTP"
+    )
+    orderids = count(1)
+    main_engine.send_order.side_effect = lambda req, gateway_name: f"{gateway_name}.{next(orderids)}"
+    return main_engine
+
+
+class FaultyStrategy(StrategyTemplate):
+    __slots__ = ()
+
+    def on_tick(self, tick: TickData):
+        raise ZeroDivisionError
+
+
+class TestStrategyDispatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = StrategyEngine(MagicMock(), EventEngine())
+        self.engine.data_path = self.temp_dir.name
+        self.engine.write_log = MagicMock()
+        self.engine.on_strategy_tick = MagicMock()
+        self.engine.on_strategy_order = MagicMock()
+        self.engine.on_strategy_trade = MagicMock()
+
+        self.first = self.engine.add_strategy("first", "double_ma", {}, ["rb2410", "hc2410"])
+        self.second = self.engine.add_strategy("second", "rsi", {}, ["rb2410.SHFE"])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def dispatched(self, symbol: str) -> list:
+        self.engine.on_strategy_tick.reset_mock()
+        self.engine.process_tick_event(Event(EVENT_TICK, make_tick(symbol)))
+        return [call.args[0].name for call in self.engine.on_strategy_tick.call_args_list]
+
+    def test_tick(self):
+        """测试行情只分发给订阅了该合约的运行中策略，代码和vt_symbol写法都可以"""
+        self.assertEqual(self.dispatched("rb2410"), [])
+
+        self.engine.start_strategy(self.first)
+        self.engine.start_strategy(self.second)
+        self.engine.start_strategy(self.first)
+        self.assertEqual(sorted(self.dispatched("rb2410")), ["first", "second"])
+        self.assertEqual(self.dispatched("hc2410"), ["first"])
+        self.assertEqual(self.dispatched("au2412"), [])
+
+        self.engine.stop_strategy(self.first)
+        self.assertEqual(self.dispatched("rb2410"), ["second"])
+        self.assertNotIn("hc2410", self.engine.symbol_strategies)
+
+        self.engine.remove_strategy(self.second)
+        self.assertEqual(self.engine.symbol_strategies, {})
+
+    def test_order(self):
+        """测试委托和成交按委托号分发，停止的策略仍收到已发委托的回报，移除后不再收到"""
+        self.engine.start_strategy(self.first)
+        self.engine.add_strategy_order(self.first, "CTP.1")
+
+        order = OrderData(symbol="rb2410", exchange=Exchange.SHFE, orderid="1", gateway_name="CTP")
+        trade = TradeData(
+            symbol="rb2410", exchange=Exchange.SHFE, orderid="1", tradeid="t1",
+            direction=Direction.LONG, price=3500, volume=1, gateway_name="CTP"
+        )
+        other = OrderData(symbol="rb2410", exchange=Exchange.SHFE, orderid="2", gateway_name="CTP")
+        self.engine.process_order_event(Event(EVENT_ORDER, order))
+        self.engine.process_order_event(Event(EVENT_ORDER, other))
+        self.engine.process_trade_event(Event(EVENT_TRADE, trade))
+        self.assertEqual(self.engine.on_strategy_order.call_count, 1)
+        self.assertEqual(self.engine.on_strategy_trade.call_count, 1)
+
+        self.engine.stop_strategy(self.first)
+        self.engine.process_order_event(Event(EVENT_ORDER, order))
+        self.assertEqual(self.engine.on_strategy_order.call_count, 2)
+
+        self.engine.remove_strategy(self.first)
+        self.engine.process_order_event(Event(EVENT_ORDER, order))
+        self.assertEqual(self.engine.on_strategy_order.call_count, 2)
+        self.assertEqual(self.engine.order_strategies, {})
+
+
+class TestStrategyPerformance(unittest.TestCase):
+    def test_round_trip(self):
+        """测试按持仓均价计算平仓盈亏，反手后以成交价为新均价"""
+        performance = StrategyPerformance()
+        self.assertEqual(performance.update_trade("rb2410.SHFE", Direction.LONG, 100, 2, 10), 0)
+        self.assertEqual(performance.update_trade("rb2410.SHFE", Direction.SHORT, 110, 1, 10), 100)
+        self.assertEqual(performance.update_trade("rb2410.SHFE", Direction.SHORT, 90, 2, 10), -100)
+        self.assertEqual(performance.holdings["rb2410.SHFE"], [-1, 90])
+        self.assertEqual(performance.update_trade("rb2410.SHFE", Direction.LONG, 95, 1, 10), -50)
+
+        self.assertEqual(performance.to_dict()["total_trades"], 4)
+        self.assertEqual(performance.profit, -50)
+        self.assertEqual(performance.max_drawdown, 150)
+        self.assertAlmostEqual(performance.win_rate, 1 / 3)
+
+    def test_zero_volume(self):
+        """测试成交量为0的成交被忽略，空仓时不会除以0"""
+        performance = StrategyPerformance()
+        self.assertEqual(performance.update_trade("rb2410.SHFE", Direction.LONG, 3500, 0, 10), 0)
+        self.assertEqual(performance.total_trades, 0)
+        self.assertEqual(performance.holdings.get("rb2410.SHFE", [0.0, 0.0]), [0.0, 0.0])
+
+    def test_mark_to_market(self):
+        """测试随机成交后已实现盈亏加持仓浮动盈亏等于按现金流计算的总盈亏"""
+        rng = np.random.default_rng(11)
+        performance = StrategyPerformance()
+        cash, pos = 0.0, 0.0
+        for _ in range(5000):
+            direction = Direction.LONG if rng.random() < 0.5 else Direction.SHORT
+            price, volume = float(rng.integers(3400, 3600)), float(rng.integers(1, 5))
+            performance.update_trade("rb2410.SHFE", direction, price, volume, 10)
+            signed = volume if direction == Direction.LONG else -volume
+            cash -= signed * price * 10
+            pos += signed
+
+        mark = 3500
+        holding, cost = performance.holdings["rb2410.SHFE"]
+        self.assertEqual(holding, pos)
+        self.assertAlmostEqual(performance.profit + holding * (mark - cost) * 10, cash + pos * mark * 10, places=4)
+
+
+class TestStrategyRuntime(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.main_engine = make_main_engine()
+        self.engine = StrategyEngine(self.main_engine, EventEngine())
+        self.engine.data_path = self.temp_dir.name
+        self.engine.write_log = MagicMock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fill(self, vt_orderid: str, price: float):
+        """按委托请求模拟全部成交"""
+        orderid = vt_orderid.split(".")[1]
+        req = self.requests[vt_orderid]
+        order = OrderData(
+            symbol=req.symbol, exchange=req.exchange, orderid=orderid, direction=req.direction,
+            offset=req.offset, price=req.price, volume=req.volume, traded=req.volume,
+            status=Status.ALLTRADED, gateway_name="CTP"
+        )
+        trade = TradeData(
+            symbol=req.symbol, exchange=req.exchange, orderid=orderid, tradeid=f"t{orderid}",
+            direction=req.direction, offset=req.offset, price=price, volume=req.volume, gateway_name="CTP"
+        )
+        self.engine.process_trade_event(Event(EVENT_TRADE, trade))
+        self.engine.process_order_event(Event(EVENT_ORDER, order))
+
+    @property
+    def requests(self) -> dict:
+        return {
+            f"CTP.{i}": c.args[0] for i, c in enumerate(self.main_engine.send_order.call_args_list, 1)
+        }
+
+    def test_class(self):
+        """测试按类名或参数创建策略类，无法识别时使用空模板"""
+        double_ma = self.engine.add_strategy("ma", "CTA策略", {"fast_ma_period": 2, "slow_ma_period": 3}, ["rb2410"])
+        custom = self.engine.add_strategy("custom", "自定义策略", {"ma_period": 20}, ["rb2410"])
+        rsi = self.engine.add_strategy("rsi", "CTA策略", {}, ["rb2410"], class_name="RsiStrategy")
+        self.assertIsInstance(self.engine.strategies[double_ma], DoubleMaStrategy)
+        self.assertIs(type(self.engine.strategies[custom]), StrategyTemplate)
+        self.assertEqual(type(self.engine.strategies[rsi]).__name__, "RsiStrategy")
+
+        with self.assertRaises(AttributeError):
+            self.engine.strategies[double_ma].unknown = 1
+
+    def test_run(self):
+        """测试行情合成K线驱动策略下单，成交后更新持仓和绩效，停止时撤单"""
+        strategy_id = self.engine.add_strategy(
+            "ma", "CTA策略", {"fast_ma_period": 2, "slow_ma_period": 3, "trade_volume": 2}, ["rb2410"]
+        )
+        strategy = self.engine.strategies[strategy_id]
+
+        start = datetime(2024, 1, 2, 9, 0, 30)
+        prices = [3500, 3490, 3480, 3470, 3520, 3530, 3400, 3390]
+        self.engine.process_tick_event(Event(EVENT_TICK, make_tick("rb2410", prices[0], start)))
+        self.main_engine.send_order.assert_not_called()
+
+        self.engine.start_strategy(strategy_id)
+        for i, price in enumerate(prices):
+            self.engine.process_tick_event(Event(EVENT_TICK, make_tick("rb2410", price, start + timedelta(minutes=i))))
+            for vt_orderid in list(strategy.active_orderids):
+                self.fill(vt_orderid, price)
+
+        # 3520的K线在下一分钟开始时完成，金叉买入2手；3400的K线完成时死叉，先平多再开空
+        requests = list(self.requests.values())
+        self.assertEqual(
+            [(r.direction, r.offset, r.volume, r.price) for r in requests],
+            [
+                (Direction.LONG, Offset.OPEN, 2, 3520),
+                (Direction.SHORT, Offset.CLOSE, 2, 3400),
+                (Direction.SHORT, Offset.OPEN, 2, 3400),
+            ]
+        )
+        self.assertTrue(all(r.reference == f"StrategyEngine_{strategy_id}" for r in requests))
+        self.assertEqual(strategy.pos, {"rb2410.SHFE": -2})
+        self.assertEqual(strategy.active_orderids, set())
+
+        performance = self.engine.get_strategies()[0]["performance"]
+        self.assertEqual(performance["total_trades"], 3)
+        self.assertAlmostEqual(performance["profit"], (3390 - 3530) * 2 * 10)
+        self.assertEqual(performance["win_rate"], 0)
+
+        # 停止时撤销未成交的委托
+        strategy.trading = True
+        strategy.buy("rb2410.SHFE", 3390, 1)
+        self.main_engine.get_order.return_value = OrderData(
+            symbol="rb2410", exchange=Exchange.SHFE, orderid="4", gateway_name="CTP"
+        )
+        self.engine.stop_strategy(strategy_id)
+        self.main_engine.cancel_order.assert_called_once()
+        self.assertEqual(self.engine.get_active_strategies(), [])
+
+    def test_convert(self):
+        """测试委托经开平转换后逐笔发出，返回全部委托号"""
+        strategy_id = self.engine.add_strategy("custom", "自定义策略", {}, ["rb2410"])
+        strategy = self.engine.strategies[strategy_id]
+        self.engine.start_strategy(strategy_id)
+
+        def split(req, gateway_name, lock):
+            today, yesterday = copy(req), copy(req)
+            today.offset, today.volume = Offset.CLOSETODAY, 1
+            yesterday.offset, yesterday.volume = Offset.CLOSEYESTERDAY, req.volume - 1
+            return [today, yesterday]
+
+        self.main_engine.convert_order_request.side_effect = split
+        self.assertEqual(strategy.sell("rb2410.SHFE", 3500, 3), ["CTP.1", "CTP.2"])
+        self.assertEqual(
+            [(r.offset, r.volume) for r in self.requests.values()],
+            [(Offset.CLOSETODAY, 1), (Offset.CLOSEYESTERDAY, 2)]
+        )
+        self.assertEqual(self.main_engine.update_order_request.call_count, 2)
+        self.assertEqual(strategy.active_orderids, {"CTP.1", "CTP.2"})
+        self.assertIs(self.engine.order_strategies["CTP.2"], strategy)
+
+    def test_error(self):
+        """测试策略回调出错时停止该策略，不影响其他策略"""
+        first = self.engine.add_strategy("first", "自定义策略", {}, ["rb2410"])
+        second = self.engine.add_strategy("second", "自定义策略", {}, ["rb2410"])
+        self.engine.strategies[first] = FaultyStrategy(self.engine, first, "first", "自定义策略", {}, ["rb2410"])
+        self.engine.start_strategy(first)
+        self.engine.start_strategy(second)
+
+        self.engine.process_tick_event(Event(EVENT_TICK, make_tick("rb2410")))
+        self.assertEqual(list(self.engine.active_strategies), [second])
+        self.assertEqual(self.engine.get_strategies()[0]["status"], "stopped")
+
+    def test_save(self):
+        """测试策略信息和绩效保存后重新加载"""
+        strategy_id = self.engine.add_strategy("rsi", "CTA策略", {"rsi_period": 6}, ["rb2410.SHFE"])
+        self.engine.strategies[strategy_id].performance.update_trade("rb2410.SHFE", Direction.LONG, 3500, 1, 10)
+        self.engine.strategies[strategy_id].performance.update_trade("rb2410.SHFE", Direction.SHORT, 3510, 1, 10)
+        self.engine.save_strategies()
+
+        engine = StrategyEngine(self.main_engine, EventEngine())
+        engine.data_path = self.temp_dir.name
+        engine.load_strategies()
+        self.assertEqual(engine.get_strategies(), self.engine.get_strategies())
+        self.assertEqual(type(engine.strategies[strategy_id]).__name__, "RsiStrategy")
+
+
+class TestBacktestData(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = StrategyEngine(MagicMock(), EventEngine())
+        self.engine.data_path = self.temp_dir.name
+        self.engine.write_log = MagicMock()
+        self.engine.should_buy = lambda tick, parameters: True
+        self.strategy_id = self.engine.add_strategy("ma", "CTA策略", {}, ["rb2410"])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_datetime(self):
+        """测试CSV和存档两种数据源回测结果中的时间类型和数值一致"""
+        from config.columnar_store import ColumnarStore
+
+        times = [datetime(2024, 1, 2, 9, 0) + timedelta(minutes=i) for i in range(3)]
+        with open(os.path.join(self.temp_dir.name, "rb2410_historical.csv"), "w") as f:
+            f.write("datetime,open,high,low,close,volume\n")
+            for dt in times:
+                f.write(f"{dt.isoformat(sep=' ')},3500,3501,3499,3500,10\n")
+
+        archive = os.path.join(self.temp_dir.name, "archive")
+        ColumnarStore(archive).append_bars("rb2410", "1m", [(dt, 3500, 3501, 3499, 3500, 10, 0, 0) for dt in times])
+
+        csv_result = self.engine.backtest_strategy(self.strategy_id, "2024-01-02", "2024-01-03", "csv")
+        with patch("config.columnar_store.ARCHIVE_DIR", Path(archive)):
+            archive_result = self.engine.backtest_strategy(self.strategy_id, "2024-01-02", "2024-01-03", "archive")
+
+        for result in [csv_result, archive_result]:
+            self.assertEqual((result["start_date"], result["end_date"]), (times[0], times[-1]))
+            self.assertEqual([trade["time"] for trade in result["trades"]], times)
+            self.assertEqual(type(result["start_date"]), type(csv_result["start_date"]))
+            self.assertEqual(type(result["trades"][0]["time"]), type(csv_result["trades"][0]["time"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
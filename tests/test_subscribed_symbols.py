@@ -0,0 +1,115 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.subscribed_symbols import SubscribedSymbols
+
+
+class TestSubscribedSymbols(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "subscribed_symbols.json"
+        self.patcher = mock.patch("config.subscribed_symbols.SUBSCRIBED_SYMBOLS_PATH", self.path)
+        self.patcher.start()
+        self.symbols = SubscribedSymbols(save_delay=0.05)
+
+    def tearDown(self):
+        self.symbols.flush()
+        self.patcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_snapshot(self):
+        """测试快照不可变，变化时生成新快照并递增版本"""
+        snapshot = self.symbols.get_snapshot()
+        version = self.symbols.version
+        self.assertIsInstance(snapshot, frozenset)
+
+        self.symbols.add("rb2410.SHFE")
+        self.assertEqual(snapshot, frozenset())
+        self.assertEqual(self.symbols.get_snapshot(), frozenset({"rb2410.SHFE"}))
+        self.assertEqual(self.symbols.version, version + 1)
+
+        # 未变化时快照和版本保持不变
+        current = self.symbols.get_snapshot()
+        self.symbols.add("rb2410.SHFE")
+        self.symbols.remove("au2412.SHFE")
+        self.assertIs(self.symbols.get_snapshot(), current)
+        self.assertEqual(self.symbols.version, version + 1)
+
+    def test_listener(self):
+        """测试订阅变化通知"""
+        received = []
+        self.symbols.add_listener(received.append)
+        self.symbols.add("rb2410.SHFE")
+        self.symbols.add("au2412.SHFE")
+        self.symbols.remove("rb2410.SHFE")
+        self.symbols.clear()
+        self.assertEqual(received, [
+            frozenset({"rb2410.SHFE"}),
+            frozenset({"rb2410.SHFE", "au2412.SHFE"}),
+            frozenset({"au2412.SHFE"}),
+            frozenset(),
+        ])
+
+        self.symbols.remove_listener(received.append)
+        self.symbols.add("rb2410.SHFE")
+        self.assertEqual(len(received), 4)
+
+    def test_listener_error(self):
+        """测试监听者出错时记录日志，其他监听者照常收到通知"""
+        received = []
+        self.symbols.add_listener(mock.Mock(side_effect=ValueError("坏快照")))
+        self.symbols.add_listener(received.append)
+        with mock.patch("config.subscribed_symbols.log_manager") as log_manager:
+            self.symbols.add("rb2410.SHFE")
+        self.assertEqual(received, [frozenset({"rb2410.SHFE"})])
+        log_manager.log.assert_called_once()
+        self.assertIn("坏快照", log_manager.log.call_args[0][0])
+
+    def test_load(self):
+        """测试重新加载后快照与文件一致"""
+        self.symbols.add("rb2410.SHFE")
+        self.symbols.flush()
+        other = SubscribedSymbols()
+        self.assertEqual(other.get_snapshot(), frozenset({"rb2410.SHFE"}))
+
+    def test_debounced_save(self):
+        """测试延迟时间内的多次修改只写入一次"""
+        with mock.patch.object(self.symbols, "save", wraps=self.symbols.save) as save:
+            self.symbols.add("rb2400.SHFE")
+            timer = self.symbols.save_timer
+            for i in range(1, 100):
+                self.symbols.add(f"rb24{i:02d}.SHFE")
+            self.symbols.remove("rb2400.SHFE")
+            timer.join()
+
+        self.assertEqual(save.call_count, 1)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["symbols"]), 99)
+        self.assertFalse(self.path.with_name(self.path.name + ".tmp").exists())
+
+    def test_batch(self):
+        """测试批量添加和移除只通知一次"""
+        received = []
+        self.symbols.add_listener(received.append)
+        self.symbols.add_many(["rb2410.SHFE", "au2412.SHFE", "rb2410.SHFE"])
+        self.symbols.remove_many(["rb2410.SHFE", "ag2412.SHFE"])
+        self.symbols.remove_many(["ag2412.SHFE"])
+        self.assertEqual(received, [
+            frozenset({"rb2410.SHFE", "au2412.SHFE"}),
+            frozenset({"au2412.SHFE"}),
+        ])
+
+        self.symbols.flush()
+        self.assertIsNone(self.symbols.save_timer)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["symbols"], ["au2412.SHFE"])
+
+if __name__ == '__main__':
+    unittest.main()
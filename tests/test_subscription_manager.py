@@ -0,0 +1,125 @@
+import sys
+import os
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.event import Event
+from vnpy.trader.constant import Exchange
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import TickData
+from config.subscription_manager import SubscriptionManager, EVENT_SUBSCRIPTION
+
+
+class TestSubscriptionManager(unittest.TestCase):
+    def setUp(self):
+        self.main_engine = MagicMock()
+        self.event_engine = MagicMock()
+        self.manager = SubscriptionManager(self.main_engine, self.event_engine, rate=5000, batch_size=50)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def wait_finished(self, timeout: float = 5):
+        deadline = time.perf_counter() + timeout
+        while not self.manager.get_progress()["finished"] and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+    def make_tick(self, symbol: str) -> TickData:
+        return TickData(
+            symbol=symbol,
+            exchange=Exchange.SHFE,
+            datetime=datetime.now(),
+            last_price=3500,
+            gateway_name="CTP"
+        )
+
+    def test_bulk_subscribe(self):
+        """测试批量订阅在后台发送完成"""
+        symbols = [f"rb{i:04d}.SHFE" for i in range(500)]
+        self.assertEqual(self.manager.subscribe(symbols, "CTP"), 500)
+        self.wait_finished()
+
+        progress = self.manager.get_progress()
+        self.assertEqual(progress["acked"], 500)
+        self.assertEqual(progress["pending"], 0)
+        self.assertEqual(self.main_engine.subscribe.call_count, 500)
+
+        req, gateway_name = self.main_engine.subscribe.call_args_list[0][0]
+        self.assertEqual((req.symbol, req.exchange, gateway_name), ("rb0000", Exchange.SHFE, "CTP"))
+
+        # 每批推送一次进度事件（先停止发送线程，确保最后一批的事件已推送）
+        self.manager.close()
+        events = [call[0][0] for call in self.event_engine.put.call_args_list]
+        self.assertEqual(len(events), 10)
+        self.assertTrue(all(event.type == EVENT_SUBSCRIPTION for event in events))
+        self.assertTrue(events[-1].data["finished"])
+
+        self.event_engine.register.assert_called_once_with(EVENT_TICK, self.manager.process_tick_event)
+
+    def test_pacing(self):
+        """测试按速率限制分批发送"""
+        self.manager.rate = 100
+        self.manager.batch_size = 10
+        start = time.perf_counter()
+        self.manager.subscribe([f"rb{i:04d}.SHFE" for i in range(30)], "CTP")
+        self.wait_finished()
+        # 前两批各等待0.1秒，最后一批发送完即完成
+        self.assertGreaterEqual(time.perf_counter() - start, 0.19)
+
+    def test_duplicate_and_failure(self):
+        """测试重复合约跳过，失败合约可以重新加入"""
+        def subscribe(req, gateway_name):
+            if req.symbol == "bad":
+                raise RuntimeError("拒绝")
+
+        self.main_engine.subscribe.side_effect = subscribe
+        self.manager.subscribe(["rb2410.SHFE", "bad.SHFE"], "CTP")
+        self.wait_finished()
+        self.assertEqual(self.manager.subscribe(["rb2410.SHFE"], "CTP"), 0)
+
+        progress = self.manager.get_progress()
+        self.assertEqual((progress["acked"], progress["failed"]), (1, 1))
+        self.assertEqual(self.manager.subscribe(["bad.SHFE"], "CTP"), 1)
+
+        self.manager.reset()
+        self.assertEqual(self.manager.subscribe(["rb2410.SHFE"], "CTP"), 1)
+
+    def test_missing_gateway(self):
+        """测试网关不存在时记为失败，不计为确认"""
+        self.main_engine.get_gateway.return_value = None
+        self.manager.subscribe(["rb2410.SHFE", "hc2410.SHFE"], "CTP")
+        self.wait_finished()
+
+        progress = self.manager.get_progress()
+        self.assertEqual((progress["acked"], progress["failed"]), (0, 2))
+        self.main_engine.subscribe.assert_not_called()
+        self.main_engine.get_gateway.assert_called_once_with("CTP")
+
+    def test_latency(self):
+        """测试确认和首笔行情延迟"""
+        self.manager.subscribe(["rb2410.SHFE", "hc2410.SHFE"], "CTP")
+        self.wait_finished()
+        self.assertEqual(self.manager.get_latency("ag2412.SHFE"), (None, None))
+
+        ack, first_tick = self.manager.get_latency("rb2410.SHFE")
+        self.assertGreaterEqual(ack, 0)
+        self.assertIsNone(first_tick)
+
+        self.event_engine.put.reset_mock()
+        self.manager.process_tick_event(Event(EVENT_TICK, self.make_tick("rb2410")))
+        self.manager.process_tick_event(Event(EVENT_TICK, self.make_tick("rb2410")))
+        self.assertGreaterEqual(self.manager.get_latency("rb2410.SHFE")[1], ack)
+        self.assertEqual(self.manager.get_progress()["ticked"], 1)
+        self.event_engine.put.assert_not_called()
+
+        # 全部收到首笔行情时推送进度
+        self.manager.process_tick_event(Event(EVENT_TICK, self.make_tick("hc2410")))
+        self.assertEqual(self.event_engine.put.call_args[0][0].data["ticked"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
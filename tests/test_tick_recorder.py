@@ -0,0 +1,85 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnpy.event import Event
+from vnpy.trader.constant import Exchange
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import TickData
+from config.database import TradingDatabase
+from config.columnar_store import ColumnarStore
+from config.tick_recorder import TickRecorder
+
+# 行情时间和分区查询使用同一个固定时间，跨零点运行时不会落到不同的日分区
+TICK_TIME = datetime(2024, 1, 2, 9, 30)
+
+
+class TestTickRecorder(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.database = TradingDatabase(Path(self.temp_dir) / "trading.db")
+        self.recorder = TickRecorder(MagicMock(), MagicMock(), self.database,
+            ColumnarStore(Path(self.temp_dir) / "archive"))
+
+    def tearDown(self):
+        self.recorder.close()
+        self.database.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_event(self, symbol: str, price: float) -> Event:
+        tick = TickData(
+            symbol=symbol,
+            exchange=Exchange.SHFE,
+            datetime=TICK_TIME,
+            last_price=price,
+            volume=10,
+            open_interest=100,
+            bid_price_1=price - 1,
+            ask_price_1=price + 1,
+            bid_volume_1=3,
+            ask_volume_1=4,
+            gateway_name="CTP"
+        )
+        return Event(EVENT_TICK, tick)
+
+    def test_record_ticks(self):
+        """测试行情按合约缓存并在关闭时全部落库"""
+        for i in range(50):
+            self.recorder.process_tick_event(self.make_event("rb2410", 3500 + i))
+            self.recorder.process_tick_event(self.make_event("cu2410", 70000 + i))
+        self.recorder.close()
+
+        database = TradingDatabase(self.database.db_path)
+        table = database.get_tick_partition(TICK_TIME)
+        rows = database.get_connection().execute(
+            f"SELECT symbol, COUNT(*), MAX(last_price), MAX(ask_volume) FROM {table} GROUP BY symbol ORDER BY symbol"
+        ).fetchall()
+        self.assertEqual(rows, [("cu2410", 50, 70049.0, 4), ("rb2410", 50, 3549.0, 4)])
+
+        stats = self.recorder.get_statistics()
+        self.assertEqual(stats["received"], 100)
+        self.assertEqual(stats["written"], 100)
+        self.assertEqual(stats["buffered"], 0)
+
+    def test_buffer_limit(self):
+        """测试缓冲区满时丢弃并计数"""
+        self.recorder.max_buffer_size = 0
+        self.recorder.process_tick_event(self.make_event("rb2410", 3500))
+        self.assertEqual(self.recorder.get_statistics()["dropped"], 1)
+
+    def test_shared_database_left_open(self):
+        """测试外部传入的数据库在引擎关闭后仍可使用"""
+        conn = self.database.get_connection()
+        self.recorder.close()
+        self.assertEqual(conn.execute("SELECT 1").fetchone(), (1,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import os
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore, QtWidgets
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+from ui.widgets.tick_table import TickTableModel, COLOR_UP, PLACEHOLDER
+
+
+def make_tick(symbol: str, price: float, volume: float = 1) -> TickData:
+    return TickData(
+        symbol=symbol,
+        exchange=Exchange.SHFE,
+        datetime=datetime(2024, 5, 6, 9, 0),
+        last_price=price,
+        volume=volume,
+        pre_close=3500.0,
+        gateway_name="MockCTP"
+    )
+
+
+class TestTickTableModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    def setUp(self):
+        self.model = TickTableModel(lambda vt_symbol: "螺纹钢" if vt_symbol.startswith("rb") else "")
+        self.changes = []
+        self.model.dataChanged.connect(
+            lambda top, bottom: self.changes.append((top.row(), top.column(), bottom.column()))
+        )
+
+    def test_insert_rows(self):
+        """测试新合约追加行并建立索引"""
+        self.assertTrue(self.model.update_tick(make_tick("rb2410", 3510)))
+        self.assertTrue(self.model.update_tick(make_tick("hc2410", 3600)))
+        self.assertEqual(self.model.rowCount(), 2)
+        self.assertEqual(self.model.get_row("hc2410.SHFE"), 1)
+        self.assertEqual(self.model.data(self.model.index(0, 2)), "螺纹钢")
+        self.assertEqual(self.model.data(self.model.index(1, 2)), "hc2410")
+
+    def test_only_changed_cells(self):
+        """测试只对变化的列发出dataChanged"""
+        for i in range(5):
+            self.model.update_tick(make_tick(f"rb24{i:02d}", 3510))
+        self.changes.clear()
+
+        self.assertFalse(self.model.update_tick(make_tick("rb2402", 3520)))
+        self.assertEqual(self.changes, [(2, 3, 3)])
+
+        self.changes.clear()
+        self.model.update_tick(make_tick("rb2402", 3520))
+        self.assertEqual(self.changes, [])
+
+        self.model.update_tick(make_tick("rb2402", 3530, volume=5))
+        self.assertEqual(self.changes, [(2, 3, 4)])
+
+    def test_remove_symbol(self):
+        """测试删除行后后续行的索引随之更新"""
+        for symbol in ["rb2410", "hc2410", "i2409"]:
+            self.model.update_tick(make_tick(symbol, 3510))
+        self.assertTrue(self.model.remove_symbol("rb2410.SHFE"))
+        self.assertFalse(self.model.remove_symbol("rb2410.SHFE"))
+        self.assertEqual(self.model.get_row("hc2410.SHFE"), 0)
+        self.assertEqual(self.model.get_row("i2409.SHFE"), 1)
+        self.assertEqual(self.model.get_vt_symbol(1), "i2409.SHFE")
+
+    def test_placeholder_row(self):
+        """测试收到行情前的占位行"""
+        row = self.model.add_symbol("rb2410.SHFE")
+        self.assertEqual(self.model.data(self.model.index(row, 2)), "螺纹钢")
+        self.assertEqual(self.model.data(self.model.index(row, 3)), PLACEHOLDER)
+        self.assertFalse(self.model.update_tick(make_tick("rb2410", 3510)))
+        self.assertEqual(self.model.rowCount(), 1)
+
+    def test_price_color(self):
+        """测试最新价相对昨收着色"""
+        self.model.update_tick(make_tick("rb2410", 3510))
+        color = self.model.data(self.model.index(0, 3), QtCore.Qt.ForegroundRole)
+        self.assertEqual(color, COLOR_UP)
+
+
+if __name__ == '__main__':
+    unittest.main()
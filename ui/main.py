@@ -19,18 +19,12 @@ else:
 from ui.market_monitor import MarketMonitor  # 导入行情监控组件
 from ui.position_monitor import PositionMonitor  # 导入持仓监控组件
 from ui.account_monitor import AccountMonitor  # 添加导入
-from ui.widgets.futures_chart import FuturesChartWindow  # 使用 widgets 目录下的版本
 from config.log_manager import log_manager  # 添加导入
 import logging  # 添加日志控制
 from ui.order_monitor import OrderMonitor  # 添加导入
 from ui.trade_monitor import TradeMonitor  # 添加导入
-from ui.risk_manager import RiskManager
 # from config.risk_engine import RiskEngine
-from ui.notification_manager import NotificationManager
 # from config.notification_engine import NotificationEngine
-from ui.strategy_manager import StrategyManager
-from ui.performance_analytics import PerformanceAnalytics
-from config.data_persistence_engine import DataPersistenceEngine
 # from config.strategy_engine import StrategyEngine
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -73,10 +67,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.strategy_engine.init_engine()
         print("[DEBUG] 策略引擎初始化完成")
         
-        print("[DEBUG] 初始化数据持久化引擎...")
-        # 添加数据持久化引擎
-        self.persistence_engine = DataPersistenceEngine(self.main_engine, self.event_engine)
-        print("[DEBUG] 数据持久化引擎初始化完成")
+        # 数据引擎要打开数据库，推迟到窗口显示后的第一次事件循环再创建
+        self.persistence_engine = None
+        self.tick_recorder = None
+        self.bar_aggregator = None
+        QtCore.QTimer.singleShot(0, self.init_data_engines)
         
         print("[DEBUG] 开始初始化UI...")
         # 初始化UI
@@ -360,6 +355,26 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             event.ignore()
         
+    def init_data_engines(self) -> None:
+        """创建数据持久化、行情录制和K线合成引擎（只执行一次）"""
+        if self.persistence_engine is not None:
+            return
+        
+        from config.data_persistence_engine import DataPersistenceEngine
+        from config.tick_recorder import TickRecorder
+        from config.bar_aggregator import BarAggregator
+        
+        print("[DEBUG] 初始化数据持久化引擎...")
+        # 添加数据持久化引擎
+        self.persistence_engine = self.main_engine.add_engine(DataPersistenceEngine)
+        print("[DEBUG] 数据持久化引擎初始化完成")
+        
+        # 添加行情录制引擎
+        self.tick_recorder = self.main_engine.add_engine(TickRecorder)
+        
+        # 添加K线合成引擎
+        self.bar_aggregator = self.main_engine.add_engine(BarAggregator)
+    
     def show_login_dialog(self) -> None:
         """显示登录对话框"""
         from ui.login_dialog import LoginDialog
@@ -377,6 +392,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # 显示对话框
         if dialog.exec_() == dialog.Accepted:
             settings = dialog.get_settings()
+            self.init_data_engines()
             # 连接CTP
             gateway_name = "CTP"
             self.main_engine.connect(settings, gateway_name)
@@ -416,6 +432,7 @@ class MainWindow(QtWidgets.QMainWindow):
             
             # 创建新的图表窗口
             print(f"创建新的图表窗口：{vt_symbol}")
+            from ui.widgets.futures_chart import FuturesChartWindow
             chart_window = FuturesChartWindow(  # 使用新的窗口类
                 main_engine=self.main_engine,
                 event_engine=self.event_engine,
@@ -450,24 +467,28 @@ class MainWindow(QtWidgets.QMainWindow):
     def show_risk_manager(self):
         """显示风险管理窗口"""
         if self.risk_manager_window is None:
+            from ui.risk_manager import RiskManager
             self.risk_manager_window = RiskManager(self.main_engine, self.event_engine)
         self.risk_manager_window.show()
 
     def show_notification_manager(self):
         """显示通知管理窗口"""
         if self.notification_manager_window is None:
+            from ui.notification_manager import NotificationManager
             self.notification_manager_window = NotificationManager(self.main_engine, self.event_engine)
         self.notification_manager_window.show()
 
     def show_strategy_manager(self):
         """显示策略管理窗口"""
         if self.strategy_manager_window is None:
+            from ui.strategy_manager import StrategyManager
             self.strategy_manager_window = StrategyManager(self.main_engine, self.event_engine, self.strategy_engine)
         self.strategy_manager_window.show()
 
     def show_performance_analytics(self):
         """显示业绩分析窗口"""
         if self.performance_analytics_window is None:
+            from ui.performance_analytics import PerformanceAnalytics
             self.performance_analytics_window = PerformanceAnalytics(self.main_engine, self.event_engine)
         self.performance_analytics_window.show()
 
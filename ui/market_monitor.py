@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, FrozenSet, List
 from PyQt5 import QtWidgets, QtCore
 from vnpy.trader.engine import MainEngine, EventEngine
 from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT, EVENT_LOG
@@ -8,9 +8,17 @@ from vnpy.event import Event
 from config.subscribed_symbols import subscribed_symbols
 from config.tick_manager import tick_manager
 from config.log_manager import log_manager
+from config.subscription_manager import SubscriptionManager, APP_NAME as SUBSCRIPTION_APP_NAME, EVENT_SUBSCRIPTION
 from ui.account_monitor import AccountMonitor
 from ui.position_monitor import PositionMonitor
-from ui.widgets.futures_chart import FuturesChartWindow  # 添加这行导入
+from ui.widgets.refresh_scheduler import refresh_scheduler
+from ui.widgets.contract_table import (
+    ContractTableModel, ContractFilterProxyModel, SubscribeButtonDelegate, COLUMN_SUBSCRIBE
+)
+from ui.widgets.contract_search import ContractSearchIndex
+from ui.widgets.tick_table import (
+    TickTableModel, COLUMN_CHART, COLUMN_TRADE, COLUMN_UNSUBSCRIBE, DATA_COLUMN_COUNT
+)
 import csv
 from functools import partial
 
@@ -21,6 +29,7 @@ class MarketMonitor(QtWidgets.QWidget):
     signal_login = QtCore.pyqtSignal()  # 添加登录信号
     signal_md_login = QtCore.pyqtSignal()  # 添加行情登录信号
     signal_query = QtCore.pyqtSignal()  # 添加查询信号
+    signal_subscription = QtCore.pyqtSignal(Event)  # 订阅进度信号
     contract_selected = QtCore.pyqtSignal(object)  # 添加合约选中信号
     
     def __init__(
@@ -38,6 +47,9 @@ class MarketMonitor(QtWidgets.QWidget):
         self.trading_widget = trading_widget  # 保存交易组件引用
         self.contracts: Dict[str, ContractData] = {}
         self.retry_count = 0
+        self.pending_ticks: Dict[str, TickData] = {}  # 等待下一帧刷新的最新tick
+        self.subscription_logged = False  # 是否已记录订阅发送完成
+        self.subscribed: FrozenSet[str] = subscribed_symbols.get_snapshot()  # 订阅快照，变化时由监听更新
         self.trading_widget = trading_widget  # 保存交易组件引用
         
         # 初始化UI
@@ -47,6 +59,11 @@ class MarketMonitor(QtWidgets.QWidget):
         # 连接信号
         self.signal_query.connect(self.do_query_contracts)
         
+        # tick到达时只缓存并标记，由刷新调度器每帧合并刷新
+        refresh_scheduler.register(self.refresh_ticks)
+        refresh_scheduler.register(self.update_position_table)
+        subscribed_symbols.add_listener(self.on_subscription_changed)
+        
         # 添加定时器定期更新行情
         self.timer = QtCore.QTimer(self)
         self.timer.timeout.connect(self.update_tick_table)
@@ -193,14 +210,25 @@ class MarketMonitor(QtWidgets.QWidget):
         right_layout.addWidget(contract_title)
         
         # 创建合约查询表格
-        self.contract_table = QtWidgets.QTableWidget()
-        self.contract_table.setColumnCount(9)  # 增加到9列
-        self.contract_table.setHorizontalHeaderLabels([
-            "合约代码", "代码", "交易所", "名称",
-            "合约类型", "合约乘数", "价格单位", "最小下单量",
-            "订阅"  # 新增订阅列
-        ])
-        self.contract_table.cellDoubleClicked.connect(self.on_contract_clicked)
+        # 模型/视图：只有可见行会生成文本，订阅按钮由委托绘制
+        self.contract_model = ContractTableModel(self)
+        self.contract_proxy = ContractFilterProxyModel(self)
+        self.contract_proxy.setSourceModel(self.contract_model)
+        self.contract_search = ContractSearchIndex()
+        
+        self.contract_table = QtWidgets.QTableView()
+        self.contract_table.setModel(self.contract_proxy)
+        self.contract_table.setMouseTracking(True)
+        self.contract_table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.contract_table.doubleClicked.connect(
+            lambda index: self.on_contract_clicked(self.get_contract_row(index), index.column())
+        )
+        
+        self.subscribe_delegate = SubscribeButtonDelegate(self.contract_table)
+        self.subscribe_delegate.clicked.connect(
+            lambda index: self.subscribe_contract(self.contract_model.get_contract(self.get_contract_row(index)))
+        )
+        self.contract_table.setItemDelegateForColumn(COLUMN_SUBSCRIBE, self.subscribe_delegate)
         
         # 设置列宽
         header = self.contract_table.horizontalHeader()
@@ -237,6 +265,10 @@ class MarketMonitor(QtWidgets.QWidget):
         self.contract_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.contract_table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
         
+        # 点击表头时才排序，加载合约时保持原始顺序
+        header.setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.contract_table.setSortingEnabled(True)
+        
         # 添加合约表格到右侧布局
         right_layout.addWidget(self.contract_table)
         
@@ -255,22 +287,19 @@ class MarketMonitor(QtWidgets.QWidget):
         """)
         right_layout.addWidget(tick_title)
         
-        # 创建行情表格
-        self.tick_table = QtWidgets.QTableWidget()
-        self.tick_table.setColumnCount(17)  # 增加到17列
-        self.tick_table.setHorizontalHeaderLabels([
-            "代码", "交易所", "名称", "最新价", 
-            "成交量", "开盘价", "最高价", "最低价",
-            "买价", "买量", "卖价", "卖量", 
-            "时间", "接口", "K线图", "快速下单", "退订"  # 修改最后一列的名称为"退订"
-        ])
+        # 创建行情表格（模型/视图，tick更新只刷新变化的单元格）
+        self.tick_model = TickTableModel(self._get_contract_name_by_symbol, self)
+        self.tick_table = QtWidgets.QTableView()
+        self.tick_table.setModel(self.tick_model)
         
         # 设置行情表格属性
         self.tick_table.verticalHeader().setVisible(False)
         self.tick_table.setEditTriggers(self.tick_table.NoEditTriggers)
         self.tick_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.tick_table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
-        self.tick_table.cellDoubleClicked.connect(self.on_tick_clicked)  # 添加双击事件
+        self.tick_table.doubleClicked.connect(
+            lambda index: self.on_tick_clicked(index.row(), index.column())
+        )  # 添加双击事件
         
         # 设置行情表格列宽
         self.tick_table.setColumnWidth(0, 80)   # 代码
@@ -305,7 +334,7 @@ class MarketMonitor(QtWidgets.QWidget):
         
         # 设置样式
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #CCCCCC;
                 gridline-color: #CCCCCC;
                 font-size: 12px;
@@ -334,7 +363,7 @@ class MarketMonitor(QtWidgets.QWidget):
     def _setup_table_style(self):
         """设置表格样式"""
         self.tick_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: rgb(20, 28, 40);
                 color: white;
                 gridline-color: rgb(40, 48, 60);
@@ -381,6 +410,8 @@ class MarketMonitor(QtWidgets.QWidget):
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
         # 添加日志事件监听
         self.event_engine.register(EVENT_LOG, self.process_log_event)
+        self.signal_subscription.connect(self.process_subscription_event)
+        self.event_engine.register(EVENT_SUBSCRIPTION, self.signal_subscription.emit)
         # print("[DEBUG] MarketMonitor: 事件监听注册完成")
         
         # 延迟查询合约，确保事件系统已启动
@@ -401,6 +432,10 @@ class MarketMonitor(QtWidgets.QWidget):
         try:
             log_manager.console_log("行情登录成功，开始初始化...")
             
+            # 重新登录后之前的订阅失效，清空订阅管理引擎的记录以便重新发送
+            self.get_subscription_manager().reset()
+            self.subscription_logged = False
+            
             # 立即查询一次合约
             self.query_contracts()
             
@@ -450,7 +485,7 @@ class MarketMonitor(QtWidgets.QWidget):
             from tests.mock_data.mock_tick_generator import mock_tick_generator
             from vnpy.trader.constant import Exchange
             
-            subscribed = subscribed_symbols.get_symbols()
+            subscribed = self.subscribed
             # print(f"[DEBUG] MarketMonitor.generate_forced_ticks: 为 {len(subscribed)} 个合约生成tick数据")
             
             generated_count = 0
@@ -484,24 +519,16 @@ class MarketMonitor(QtWidgets.QWidget):
         """处理行情事件"""
         try:
             tick = event.data
-            vt_symbol = f"{tick.symbol}.{tick.exchange.value}"
+            vt_symbol = tick.vt_symbol
             # log_manager.log(f"[MarketMonitor] Received tick event for {vt_symbol} at price {tick.last_price}")
             
-            subscribed_symbols_set = subscribed_symbols.get_symbols()
-            # log_manager.log(f"[MarketMonitor] Current subscribed symbols: {subscribed_symbols_set}")
-            is_subscribed = vt_symbol in subscribed_symbols_set
-            # log_manager.log(f"[MarketMonitor] Is {vt_symbol} in subscribed list? {is_subscribed}")
-            
-            if is_subscribed:
+            if vt_symbol in self.subscribed:
                 #log_manager.log(f"[MarketMonitor] Processing tick for subscribed symbol: {vt_symbol}")
                 tick_manager.update_tick(tick)
                 #log_manager.log(f"[MarketMonitor] Tick for {vt_symbol} updated in TickManager")
                 
-                self.update_position_pnl(vt_symbol, tick.last_price)
-                
-                # log_manager.log(f"[MarketMonitor] Calling update_tick_table for {vt_symbol}")
-                self.update_tick_table()
-                # log_manager.log(f"[MarketMonitor] update_tick_table finished for {vt_symbol}")
+                self.pending_ticks[vt_symbol] = tick
+                refresh_scheduler.mark_dirty(self.refresh_ticks)
             else:
                 # log_manager.log(f"[MarketMonitor] Skipping tick for unsubscribed symbol: {vt_symbol}")
                 pass
@@ -546,250 +573,134 @@ class MarketMonitor(QtWidgets.QWidget):
             QtCore.QTimer.singleShot(1000, self.do_query_contracts)
 
     def update_tick_table(self) -> None:
-        """更新行情表格"""
+        """同步行情表格与订阅列表：删除已退订的行，更新已订阅合约的最新行情"""
         try:
-            # 获取所有已订阅的合约
-            subscribed = subscribed_symbols.get_symbols()
-            # print(f"[DEBUG] MarketMonitor.update_tick_table: 开始更新行情表格，已订阅合约: {len(subscribed)} 个")
+            subscribed = self.subscribed
             
-            valid_ticks = []
+            for vt_symbol in list(self.tick_model.symbols):
+                if vt_symbol not in subscribed:
+                    self.tick_model.remove_symbol(vt_symbol)
             
-            # 获取每个已订阅合约的最新行情
             for vt_symbol in subscribed:
                 tick = tick_manager.get_tick(vt_symbol)
                 if tick:
-                    valid_ticks.append(tick)
-                    # print(f"[DEBUG] MarketMonitor.update_tick_table: 找到tick数据 - {vt_symbol}, 最新价: {tick.last_price}")
-                # else:
-                #     print(f"[DEBUG] MarketMonitor.update_tick_table: 未找到tick数据 - {vt_symbol}")
-            
-            # print(f"[DEBUG] MarketMonitor.update_tick_table: 有效tick数据数量: {len(valid_ticks)}")
-            
-            # 设置表格行数
-            self.tick_table.setRowCount(len(valid_ticks))
-            
-            # 更新表格数据
-            for row, tick in enumerate(valid_ticks):
-                # print(f"[DEBUG] MarketMonitor.update_tick_table: 正在更新第 {row} 行 - {tick.symbol}.{tick.exchange.value}")
-                # 设置基本信息和行情数据
-                self.tick_table.setItem(row, 0, QtWidgets.QTableWidgetItem(tick.symbol))
-                self.tick_table.setItem(row, 1, QtWidgets.QTableWidgetItem(tick.exchange.value))
-                
-                # 获取合约名称
-                contract = self.contracts.get(tick.vt_symbol)
-                contract_name = contract.name if contract else tick.symbol
-                self.tick_table.setItem(row, 2, QtWidgets.QTableWidgetItem(contract_name))
-                
-                # 设置行情数据
-                self.tick_table.setItem(row, 3, QtWidgets.QTableWidgetItem(str(tick.last_price)))
-                self.tick_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(tick.volume)))
-                self.tick_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(tick.open_price)))
-                self.tick_table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(tick.high_price)))
-                self.tick_table.setItem(row, 7, QtWidgets.QTableWidgetItem(str(tick.low_price)))
-                self.tick_table.setItem(row, 8, QtWidgets.QTableWidgetItem(str(tick.bid_price_1)))
-                self.tick_table.setItem(row, 9, QtWidgets.QTableWidgetItem(str(tick.bid_volume_1)))
-                self.tick_table.setItem(row, 10, QtWidgets.QTableWidgetItem(str(tick.ask_price_1)))
-                self.tick_table.setItem(row, 11, QtWidgets.QTableWidgetItem(str(tick.ask_volume_1)))
-                self.tick_table.setItem(row, 12, QtWidgets.QTableWidgetItem(str(tick.datetime)))
-                self.tick_table.setItem(row, 13, QtWidgets.QTableWidgetItem(tick.gateway_name))
-                
-                # 只在按钮不存在时创建按钮
-                if not self.tick_table.cellWidget(row, 14):
-                    # K线图按钮
-                    chart_button = QtWidgets.QPushButton("K线")
-                    chart_button.setStyleSheet("""
-                        QPushButton {
-                            font-size: 12px;
-                            padding: 2px 5px;
-                            background-color: #f0f0f0;
-                            border: 1px solid #ccc;
-                            border-radius: 2px;
-                        }
-                        QPushButton:hover {
-                            background-color: #e0e0e0;
-                        }
-                    """)
-                    # 使用functools.partial来正确绑定参数
-                    chart_button.clicked.connect(
-                        partial(self.show_chart_from_button, tick.vt_symbol)
-                    )
-                    self.tick_table.setCellWidget(row, 14, chart_button)
-                
-                if not self.tick_table.cellWidget(row, 15):
-                    # 快速下单按钮
-                    trading_widget = QtWidgets.QWidget()
-                    layout = QtWidgets.QHBoxLayout(trading_widget)
-                    
-                    buy_button = QtWidgets.QPushButton("买")
-                    sell_button = QtWidgets.QPushButton("卖")
-                    
-                    # 设置按钮样式
-                    buy_button_style = """
-                        QPushButton {
-                            color: white;
-                            background-color: #ff4d4d;
-                            border: none;
-                            padding: 2px 8px;
-                            font-size: 12px;
-                            min-width: 30px;
-                            max-width: 30px;
-                            min-height: 20px;
-                            max-height: 20px;
-                        }
-                        QPushButton:hover {
-                            background-color: #ff3333;
-                        }
-                    """
-                    
-                    sell_button_style = """
-                        QPushButton {
-                            color: white;
-                            background-color: #00b33c;
-                            border: none;
-                            padding: 2px 8px;
-                            font-size: 12px;
-                            min-width: 30px;
-                            max-width: 30px;
-                            min-height: 20px;
-                            max-height: 20px;
-                        }
-                        QPushButton:hover {
-                            background-color: #009933;
-                        }
-                    """
-                    
-                    buy_button.setStyleSheet(buy_button_style)
-                    sell_button.setStyleSheet(sell_button_style)
-                    
-                    # 保存当前tick的信息
-                    current_symbol = tick.symbol
-                    current_exchange = tick.exchange.value
-                    
-                    # 使用functools.partial来正确绑定参数
-                    buy_button.clicked.connect(
-                        partial(self.on_quick_trade, current_symbol, current_exchange, tick.last_price, True)
-                    )
-                    sell_button.clicked.connect(
-                        partial(self.on_quick_trade, current_symbol, current_exchange, tick.last_price, False)
-                    )
-                    
-                    layout.addWidget(buy_button)
-                    layout.addWidget(sell_button)
-                    layout.setContentsMargins(2, 2, 2, 2)
-                    layout.setSpacing(4)
-                    
-                    self.tick_table.setCellWidget(row, 15, trading_widget)
-                
-                if not self.tick_table.cellWidget(row, 16):
-                    # 退订按钮
-                    unsubscribe_button = QtWidgets.QPushButton("退订")
-                    unsubscribe_button.setStyleSheet("""
-                        QPushButton {
-                            color: white;
-                            background-color: #ff4d4d;
-                            border: none;
-                            padding: 2px 8px;
-                            font-size: 12px;
-                            min-width: 40px;
-                            max-width: 40px;
-                        }
-                        QPushButton:hover {
-                            background-color: #ff3333;
-                        }
-                        QPushButton:pressed {
-                            background-color: #cc0000;
-                        }
-                    """)
-                    # 使用functools.partial来正确绑定参数
-                    unsubscribe_button.clicked.connect(
-                        partial(self.unsubscribe_contract, tick.vt_symbol, row)
-                    )
-                    self.tick_table.setCellWidget(row, 16, unsubscribe_button)
+                    self.update_tick_row(tick)
         
         except Exception as e:
             log_manager.log(f"[MarketMonitor] Error in update_tick_table: {str(e)}")
             import traceback
             log_manager.log(f"[MarketMonitor] Traceback: {traceback.format_exc()}")
 
-    def _update_tick_row(self, row: int, tick: TickData) -> None:
-        """更新特定行的数据"""
-        log_manager.log(f"[MarketMonitor] _update_tick_row: Updating row {row} for {tick.vt_symbol}")
-        self.tick_table.setItem(row, 0, QtWidgets.QTableWidgetItem(tick.symbol))
-        self.tick_table.setItem(row, 1, QtWidgets.QTableWidgetItem(tick.exchange.value))
-        
-        contract = self.contracts.get(tick.vt_symbol)
-        contract_name = contract.name if contract else tick.symbol
-        self.tick_table.setItem(row, 2, QtWidgets.QTableWidgetItem(contract_name))
-        
-        self.tick_table.setItem(row, 3, QtWidgets.QTableWidgetItem(str(tick.last_price)))
-        self.tick_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(tick.volume)))
-        self.tick_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(tick.open_price)))
-        self.tick_table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(tick.high_price)))
-        self.tick_table.setItem(row, 7, QtWidgets.QTableWidgetItem(str(tick.low_price)))
-        self.tick_table.setItem(row, 8, QtWidgets.QTableWidgetItem(str(tick.bid_price_1)))
-        self.tick_table.setItem(row, 9, QtWidgets.QTableWidgetItem(str(tick.bid_volume_1)))
-        self.tick_table.setItem(row, 10, QtWidgets.QTableWidgetItem(str(tick.ask_price_1)))
-        self.tick_table.setItem(row, 11, QtWidgets.QTableWidgetItem(str(tick.ask_volume_1)))
-        self.tick_table.setItem(row, 12, QtWidgets.QTableWidgetItem(str(tick.datetime)))
-        self.tick_table.setItem(row, 13, QtWidgets.QTableWidgetItem(tick.gateway_name))
+    def on_subscription_changed(self, snapshot: FrozenSet[str]) -> None:
+        """订阅列表变化时替换缓存的快照（可能在任意线程回调，只做引用赋值）"""
+        self.subscribed = snapshot
 
-        self._create_buttons(row, tick.vt_symbol)
+    def refresh_ticks(self) -> None:
+        """每帧刷新一次：每个合约只处理这一帧内的最新tick"""
+        ticks = self.pending_ticks
+        self.pending_ticks = {}
+        for vt_symbol, tick in ticks.items():
+            self.update_tick_row(tick)
+            self.update_position_pnl(vt_symbol, tick.last_price)
 
-    def _create_placeholder_row(self, row: int, vt_symbol: str) -> None:
-        """创建等待数据的占位行"""
-        log_manager.log(f"[MarketMonitor] _create_placeholder_row: Creating placeholder for {vt_symbol} at row {row}")
-        symbol, exchange = vt_symbol.split('.')
-        self.tick_table.setItem(row, 0, QtWidgets.QTableWidgetItem(symbol))
-        self.tick_table.setItem(row, 1, QtWidgets.QTableWidgetItem(exchange))
-        self.tick_table.setItem(row, 2, QtWidgets.QTableWidgetItem("加载中..."))
-        for col in range(3, 14):
-            self.tick_table.setItem(row, col, QtWidgets.QTableWidgetItem("--"))
-        
-        self._create_buttons(row, vt_symbol)
+    def update_tick_row(self, tick: TickData) -> None:
+        """更新单个合约的行情行，新增行时创建按钮"""
+        if self.tick_model.update_tick(tick):
+            self._create_buttons(self.tick_model.get_row(tick.vt_symbol), tick.vt_symbol)
 
     def _create_buttons(self, row: int, vt_symbol: str) -> None:
         """创建K线图、交易和退订按钮"""
         # K线图按钮
-        if not self.tick_table.cellWidget(row, 14):
+        index = self.tick_model.index(row, COLUMN_CHART)
+        if not self.tick_table.indexWidget(index):
             chart_button = QtWidgets.QPushButton("K线")
+            chart_button.setStyleSheet("""
+                QPushButton {
+                    font-size: 12px;
+                    padding: 2px 5px;
+                    background-color: #f0f0f0;
+                    border: 1px solid #ccc;
+                    border-radius: 2px;
+                }
+                QPushButton:hover {
+                    background-color: #e0e0e0;
+                }
+            """)
             chart_button.clicked.connect(partial(self.show_chart_from_button, vt_symbol))
-            self.tick_table.setCellWidget(row, 14, chart_button)
+            self.tick_table.setIndexWidget(index, chart_button)
 
         # 快速下单按钮
-        if not self.tick_table.cellWidget(row, 15):
+        index = self.tick_model.index(row, COLUMN_TRADE)
+        if not self.tick_table.indexWidget(index):
             trading_widget = QtWidgets.QWidget()
             layout = QtWidgets.QHBoxLayout(trading_widget)
             buy_button = QtWidgets.QPushButton("买")
             sell_button = QtWidgets.QPushButton("卖")
-            buy_button.setStyleSheet("color: white; background-color: #ff4d4d;")
-            sell_button.setStyleSheet("color: white; background-color: #00b33c;")
             
-            symbol, exchange = vt_symbol.split('.')
-            buy_button.clicked.connect(partial(self.on_quick_trade, symbol, exchange, 0.0, True))
-            sell_button.clicked.connect(partial(self.on_quick_trade, symbol, exchange, 0.0, False))
+            button_style = """
+                QPushButton {
+                    color: white;
+                    background-color: %s;
+                    border: none;
+                    padding: 2px 8px;
+                    font-size: 12px;
+                    min-width: 30px;
+                    max-width: 30px;
+                    min-height: 20px;
+                    max-height: 20px;
+                }
+                QPushButton:hover {
+                    background-color: %s;
+                }
+            """
+            buy_button.setStyleSheet(button_style % ("#ff4d4d", "#ff3333"))
+            sell_button.setStyleSheet(button_style % ("#00b33c", "#009933"))
+            
+            # 点击时再读取最新价，避免使用创建按钮时的旧价格
+            buy_button.clicked.connect(partial(self.quick_trade_from_button, vt_symbol, True))
+            sell_button.clicked.connect(partial(self.quick_trade_from_button, vt_symbol, False))
             
             layout.addWidget(buy_button)
             layout.addWidget(sell_button)
             layout.setContentsMargins(2, 2, 2, 2)
             layout.setSpacing(4)
-            self.tick_table.setCellWidget(row, 15, trading_widget)
+            self.tick_table.setIndexWidget(index, trading_widget)
 
         # 退订按钮
-        if not self.tick_table.cellWidget(row, 16):
+        index = self.tick_model.index(row, COLUMN_UNSUBSCRIBE)
+        if not self.tick_table.indexWidget(index):
             unsubscribe_button = QtWidgets.QPushButton("退订")
-            unsubscribe_button.setStyleSheet("color: white; background-color: #ff4d4d;")
-            unsubscribe_button.clicked.connect(partial(self.unsubscribe_contract, vt_symbol, row))
-            self.tick_table.setCellWidget(row, 16, unsubscribe_button)
+            unsubscribe_button.setStyleSheet("""
+                QPushButton {
+                    color: white;
+                    background-color: #ff4d4d;
+                    border: none;
+                    padding: 2px 8px;
+                    font-size: 12px;
+                    min-width: 40px;
+                    max-width: 40px;
+                }
+                QPushButton:hover {
+                    background-color: #ff3333;
+                }
+                QPushButton:pressed {
+                    background-color: #cc0000;
+                }
+            """)
+            unsubscribe_button.clicked.connect(partial(self.unsubscribe_contract, vt_symbol))
+            self.tick_table.setIndexWidget(index, unsubscribe_button)
 
-    def _set_price_color(self, item: QtWidgets.QTableWidgetItem, price: float, pre_close: float) -> None:
-        """设置价格颜色"""
-        if not pre_close:  # 如果没有收价，不设置颜色
-            return
-        
-        if price > pre_close:  # 上涨显示红色
-            item.setForeground(QtCore.Qt.red)
-        elif price < pre_close:  # 下跌显示绿色
-            item.setForeground(QtCore.Qt.green)
+    def quick_trade_from_button(self, vt_symbol: str, is_buy: bool) -> None:
+        """行情表格中的快速下单按钮"""
+        symbol, exchange = vt_symbol.split('.')
+        tick = tick_manager.get_tick(vt_symbol)
+        price = tick.last_price if tick else 0.0
+        self.on_quick_trade(symbol, exchange, price, is_buy)
+
+    def _get_contract_name_by_symbol(self, vt_symbol: str) -> str:
+        """获取合约名称，未收到合约信息时返回空字符串"""
+        contract = self.contracts.get(vt_symbol)
+        return contract.name if contract else ""
 
     def _get_contract_name(self, tick: TickData) -> str:
         """获取合约名称"""
@@ -800,271 +711,54 @@ class MarketMonitor(QtWidgets.QWidget):
     def query_contracts(self) -> None:
         """查询合约"""
         try:
-            # print("[DEBUG] MarketMonitor: 开始查询合约...")
-            self.contract_table.clearContents()
-            self.contract_table.setRowCount(0)
-            search_text = self.search_line.text().strip().upper()
-            
-            # print("[DEBUG] MarketMonitor: 正在获取所有合约...")
             contracts = list(self.main_engine.get_all_contracts())
-            # print(f"[DEBUG] MarketMonitor: 查询到 {len(contracts)} 个合约")
             
             if not contracts:
-                # print("[DEBUG] MarketMonitor: 主引擎未返回合约，使用本地缓存...")
                 try:
                     contracts = list(self.main_engine.contracts.values())
-                    # print(f"[DEBUG] MarketMonitor: 从主引擎合约字典获取 {len(contracts)} 个合约")
                 except AttributeError:
                     contracts = list(self.main_engine.get_all_contracts())
-                    # print(f"[DEBUG] MarketMonitor: 从主引擎get_all_contracts获取 {len(contracts)} 个合约")
             
             if not contracts:
-                # print("[DEBUG] MarketMonitor: 仍然没有合约，检查网关...")
                 # 直接从网关获取
                 gateway = self.main_engine.get_gateway(self.gateway_name)
                 if gateway and hasattr(gateway, 'get_all_contracts'):
                     contracts = gateway.get_all_contracts()
-                    # print(f"[DEBUG] MarketMonitor: 从网关获取 {len(contracts)} 个合约")
                     
-                    # 注册到主引擎和本地缓存
+                    # 注册到主引擎
                     for contract in contracts:
                         try:
                             if hasattr(self.main_engine, 'contracts'):
                                 self.main_engine.contracts[contract.vt_symbol] = contract
                         except AttributeError:
                             pass  # 主引擎可能使用内部管理
-                        self.contracts[contract.vt_symbol] = contract
             
             if not contracts:
-                # print("[ERROR] MarketMonitor: 无法获取任何合约")
                 return
             
-            # print("[DEBUG] MarketMonitor: 开始添加合约到表格...")
-            
-            # 预先设置表格行数，避免频繁插入
-            self.contract_table.setRowCount(len(contracts))
-            
-            # 禁用表格排序，提高性能
-            self.contract_table.setSortingEnabled(False)
-            
-            # 暂停界面更新
-            self.contract_table.setUpdatesEnabled(False)
-            
-            # 批量处理合约
-            for row, contract in enumerate(contracts):
+            for contract in contracts:
                 self.contracts[contract.vt_symbol] = contract
-                
-                # 设置合约信息
-                self.contract_table.setItem(row, 0, QtWidgets.QTableWidgetItem(contract.vt_symbol))
-                self.contract_table.setItem(row, 1, QtWidgets.QTableWidgetItem(contract.symbol))
-                self.contract_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(contract.exchange)))
-                self.contract_table.setItem(row, 3, QtWidgets.QTableWidgetItem(contract.name))
-                self.contract_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(contract.product)))
-                self.contract_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(contract.size)))
-                self.contract_table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(contract.pricetick)))
-                self.contract_table.setItem(row, 7, QtWidgets.QTableWidgetItem(str(contract.min_volume)))
-                
-                # 创建订阅按钮
-                subscribe_button = QtWidgets.QPushButton("订阅")
-                subscribe_button.setStyleSheet("""
-                    QPushButton {
-                        color: white;
-                        background-color: #4CAF50;
-                        border: none;
-                        padding: 2px 8px;
-                        font-size: 12px;
-                    }
-                    QPushButton:hover {
-                        background-color: #45a049;
-                    }
-                    QPushButton:pressed {
-                        background-color: #3d8b40;
-                    }
-                """)
-                subscribe_button.clicked.connect(
-                    lambda checked, c=contract: self.subscribe_contract(c)
-                )
-                self.contract_table.setCellWidget(row, 8, subscribe_button)
-            
-            # 恢复界面更新
-            self.contract_table.setUpdatesEnabled(True)
-            
-            # 恢复表格排序
-            self.contract_table.setSortingEnabled(True)
             
-            # print(f"[DEBUG] MarketMonitor: 合约信息加载完成，共 {len(contracts)} 个合约")
+            # 整体替换模型数据，不为每行创建表格项和按钮
+            self.contract_model.set_contracts(contracts)
+            self.contract_search.set_contracts(self.contract_model.contracts)
+            self.filter_contracts(self.search_line.text())
             
             # 如果查询到合约，则开始订阅
-            if contracts:
-                # print("[DEBUG] MarketMonitor: 开始订阅已保存的合约...")
-                self.load_and_subscribe_saved_contracts()
+            self.load_and_subscribe_saved_contracts()
             
         except Exception as e:
             print(f"[DEBUG] MarketMonitor: 查询合约出错: {str(e)}")
             import traceback
             print(f"[DEBUG] 错误详情: {traceback.format_exc()}")
-            
-            # 过滤合约
-            if search_text:
-                print(f"正在过滤合约，搜索文本: {search_text}")
-                contracts = [c for c in contracts if search_text in c.symbol.upper()]
-                print(f"过滤后剩余 {len(contracts)} 个合约")
-            
-            print("开始添加合约到表格...")
-            
-            # 预先设置表格行数，避免频繁插入
-            self.contract_table.setRowCount(len(contracts))
-            
-            # 禁用表格排序，提高性能
-            self.contract_table.setSortingEnabled(False)
-            
-            # 暂停界面更新
-            self.contract_table.setUpdatesEnabled(False)
-            
-            # 批量处理合约，每500个合约为一批
-            BATCH_SIZE = 500
-            for i in range(0, len(contracts), BATCH_SIZE):
-                batch = contracts[i:i + BATCH_SIZE]
-                print(f"正在处理第 {i}-{i+len(batch)}/{len(contracts)} 个合约...")
-                
-                # 处理这一批合约
-                for j, contract in enumerate(batch):
-                    row = i + j
-                    self.contracts[contract.vt_symbol] = contract
-                    
-                    # 设置合约信息
-                    self.contract_table.setItem(row, 0, QtWidgets.QTableWidgetItem(contract.vt_symbol))
-                    self.contract_table.setItem(row, 1, QtWidgets.QTableWidgetItem(contract.symbol))
-                    self.contract_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(contract.exchange)))
-                    self.contract_table.setItem(row, 3, QtWidgets.QTableWidgetItem(contract.name))
-                    self.contract_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(contract.product)))
-                    self.contract_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(contract.size)))
-                    self.contract_table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(contract.pricetick)))
-                    self.contract_table.setItem(row, 7, QtWidgets.QTableWidgetItem(str(contract.min_volume)))
-                    
-                    # 创建订阅按钮
-                    subscribe_button = QtWidgets.QPushButton("订阅")
-                    subscribe_button.setStyleSheet("""
-                        QPushButton {
-                            color: white;
-                            background-color: #4CAF50;
-                            border: none;
-                            padding: 2px 8px;
-                            font-size: 12px;
-                        }
-                        QPushButton:hover {
-                            background-color: #45a049;
-                        }
-                        QPushButton:pressed {
-                            background-color: #3d8b40;
-                        }
-                    """)
-                    subscribe_button.clicked.connect(
-                        lambda checked, c=contract: self.subscribe_contract(c)
-                    )
-                    self.contract_table.setCellWidget(row, 8, subscribe_button)
-                
-                # 每批次处理完后，让界面有机会响应
-                QtWidgets.QApplication.processEvents()
-            
-            # 恢复界面更新
-            self.contract_table.setUpdatesEnabled(True)
-            
-            # 恢复表格排序
-            self.contract_table.setSortingEnabled(True)
-            
-            print(f"合约信息加载完成，共 {len(contracts)} 个合约")
-            
-            # 如果查询到合约，则开始订阅
-            if contracts:
-                print("开始订阅已保存的合约...")
-                self.load_and_subscribe_saved_contracts()
-            
-        except Exception as e:
-            print(f"查询合约出错: {str(e)}")
-            import traceback
-            print(f"错误详情: {traceback.format_exc()}")
-            
-            # 过滤合约
-            if search_text:
-                print(f"正在过滤合约，搜索文本: {search_text}")
-                contracts = [c for c in contracts if search_text in c.symbol.upper()]
-                print(f"过滤后剩余 {len(contracts)} 个合约")
-            
-            print("开始添加合约到表格...")
-            
-            # 预先设置表格行数，避免频繁插入
-            self.contract_table.setRowCount(len(contracts))
-            
-            # 禁用表格排序，提高性能
-            self.contract_table.setSortingEnabled(False)
-            
-            # 暂停界面更新
-            self.contract_table.setUpdatesEnabled(False)
-            
-            # 批量处理���约，每500个合约为一批
-            BATCH_SIZE = 500
-            for i in range(0, len(contracts), BATCH_SIZE):
-                batch = contracts[i:i + BATCH_SIZE]
-                print(f"正在处理第 {i}-{i+len(batch)}/{len(contracts)} 个合约...")
-                
-                # 处理这一批合约
-                for j, contract in enumerate(batch):
-                    row = i + j
-                    self.contracts[contract.vt_symbol] = contract
-                    
-                    # 设置合约信息
-                    self.contract_table.setItem(row, 0, QtWidgets.QTableWidgetItem(contract.vt_symbol))
-                    self.contract_table.setItem(row, 1, QtWidgets.QTableWidgetItem(contract.symbol))
-                    self.contract_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(contract.exchange)))
-                    self.contract_table.setItem(row, 3, QtWidgets.QTableWidgetItem(contract.name))
-                    self.contract_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(contract.product)))
-                    self.contract_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(contract.size)))
-                    self.contract_table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(contract.pricetick)))
-                    self.contract_table.setItem(row, 7, QtWidgets.QTableWidgetItem(str(contract.min_volume)))
-                    
-                    # 创建订阅按钮
-                    subscribe_button = QtWidgets.QPushButton("订阅")
-                    subscribe_button.setStyleSheet("""
-                        QPushButton {
-                            color: white;
-                            background-color: #4CAF50;
-                            border: none;
-                            padding: 2px 8px;
-                            font-size: 12px;
-                        }
-                        QPushButton:hover {
-                            background-color: #45a049;
-                        }
-                        QPushButton:pressed {
-                            background-color: #3d8b40;
-                        }
-                    """)
-                    subscribe_button.clicked.connect(
-                        lambda checked, c=contract: self.subscribe_contract(c)
-                    )
-                    self.contract_table.setCellWidget(row, 8, subscribe_button)
-                
-                # 每批次处理完后，让界面有机会响应
-                QtWidgets.QApplication.processEvents()
-            
-            # 恢复界面更新
-            self.contract_table.setUpdatesEnabled(True)
-            
-            # 恢复表格排序
-            self.contract_table.setSortingEnabled(True)
-            
-            print(f"合约信息加载完成，共 {len(contracts)} 个合约")
-            
-            # 如果查询到合约，则开始订阅
-            if contracts:
-                print("开始订阅已保存的合约...")
-                self.load_and_subscribe_saved_contracts()
-            
-        except Exception as e:
-            print(f"查询合约出错: {str(e)}")
-            import traceback
-            print(f"错误详情: {traceback.format_exc()}")
+
+    def get_contract_row(self, index: QtCore.QModelIndex) -> int:
+        """把视图中的索引转换为合约模型的行号"""
+        if not index.isValid():
+            return -1
+        if index.model() is self.contract_proxy:
+            index = self.contract_proxy.mapToSource(index)
+        return index.row()
 
     def load_and_subscribe_saved_contracts(self) -> None:
         """加载并订阅已保存的合约"""
@@ -1086,6 +780,33 @@ class MarketMonitor(QtWidgets.QWidget):
         print("[DEBUG] load_and_subscribe_saved_contracts: 启动手动tick推送...")
         self.start_tick_pushing()
     
+    def get_subscription_manager(self) -> SubscriptionManager:
+        """获取订阅管理引擎，未添加时添加到主引擎"""
+        manager = self.main_engine.engines.get(SUBSCRIPTION_APP_NAME)
+        if not manager:
+            manager = self.main_engine.add_engine(SubscriptionManager)
+        return manager
+    
+    def process_subscription_event(self, event: Event) -> None:
+        """订阅进度：全部发送完成和全部收到首笔行情时记录日志"""
+        progress = event.data
+        if not progress["finished"]:
+            return
+        
+        if not self.subscription_logged:
+            self.subscription_logged = True
+            log_manager.log(
+                f"订阅请求发送完成：成功 {progress['acked']} 个，失败 {progress['failed']} 个，"
+                f"平均确认延迟 {progress['avg_ack_latency'] * 1000:.0f} ms"
+            )
+        
+        if progress["acked"] and progress["ticked"] == progress["acked"]:
+            log_manager.log(
+                f"已收到全部 {progress['ticked']} 个订阅合约的行情，"
+                f"首笔行情平均延迟 {progress['avg_tick_latency'] * 1000:.0f} ms，"
+                f"最大 {progress['max_tick_latency'] * 1000:.0f} ms"
+            )
+    
     def start_tick_pushing(self):
         """启动tick推送"""
         # log_manager.log(f"[MarketMonitor] Attempting to start tick pushing on gateway: {self.gateway_name}")
@@ -1146,38 +867,8 @@ class MarketMonitor(QtWidgets.QWidget):
             # log_manager.log(f"有效合约: {valid_symbols}")
             # log_manager.log(f"无效合约: {invalid_symbols}")
             
-            # 订阅有效合约
-            subscribed_count = 0
-            for vt_symbol in valid_symbols:
-                try:
-                    symbol, exchange_str = vt_symbol.split('.')
-                    exchange = Exchange(exchange_str)
-                    
-                    req = SubscribeRequest(
-                        symbol=symbol,
-                        exchange=exchange
-                    )
-                    # log_manager.log(f"正在订阅: {vt_symbol}")
-                    result = self.main_engine.subscribe(req, self.gateway_name)
-                    # log_manager.log(f"订阅结果: {vt_symbol} - {result}")
-                    subscribed_count += 1
-                    
-                    # 立即为订阅的合约生成初始tick数据
-                    # print(f"[DEBUG] 立即为 {vt_symbol} 生成初始tick数据...")
-                    from tests.mock_data.mock_tick_generator import mock_tick_generator
-                    tick = mock_tick_generator.generate_tick(symbol, exchange)
-                    if tick:
-                        # print(f"[DEBUG] 生成了初始tick: {vt_symbol}, 价格: {tick.last_price}")
-                        tick_manager.update_tick(tick)
-                        # print(f"[DEBUG] 已将tick数据存入tick管理器")
-                    
-                except Exception as e:
-                    # log_manager.log(f"订阅失败 {vt_symbol}: {str(e)}")
-                    # import traceback
-                    # log_manager.log(f"错误详情: {traceback.format_exc()}")
-                    pass
-            
-            # log_manager.log(f"成功订阅 {subscribed_count} 个合约")
+            # 订阅有效合约：交给订阅管理引擎在后台线程分批限速发送，不阻塞界面
+            self.get_subscription_manager().subscribe(valid_symbols, self.gateway_name)
             
             # 同步订阅到网关
             gateway = self.main_engine.get_gateway(self.gateway_name)
@@ -1188,16 +879,12 @@ class MarketMonitor(QtWidgets.QWidget):
                         actual_gateway.subscribed_symbols.add(vt_symbol)
                     # log_manager.log(f"已同步订阅到网关: {len(actual_gateway.subscribed_symbols)} 个合约")
             
-            # 移除无效合约
+            # 移除无效合约，批量移除只写一次文件
             if invalid_symbols:
-                for symbol in invalid_symbols:
-                    subscribed_symbols.remove(symbol)
+                subscribed_symbols.remove_many(invalid_symbols)
                 # log_manager.log(f"移除无效合约: {invalid_symbols}")
                 # log_manager.log(f"最终订阅合约: {subscribed_symbols.get_symbols()}")
             
-            # 保存最终订阅列表
-            subscribed_symbols.save()
-            
         except Exception as e:
             # log_manager.log(f"订阅合约时发生错误: {str(e)}")
             # import traceback
@@ -1206,8 +893,10 @@ class MarketMonitor(QtWidgets.QWidget):
 
     def subscribe_selected(self) -> None:
         """订阅选中的合约"""
-        selected_rows = self.contract_table.selectedItems()
-        if not selected_rows:
+        contract = self.contract_model.get_contract(
+            self.get_contract_row(self.contract_table.currentIndex())
+        )
+        if not contract:
             QtWidgets.QMessageBox.warning(
                 self,
                 "订阅失",
@@ -1217,11 +906,10 @@ class MarketMonitor(QtWidgets.QWidget):
             return
             
         # 取选中合约
-        row = self.contract_table.currentRow()
-        vt_symbol = self.contract_table.item(row, 0).text()
+        vt_symbol = contract.vt_symbol
         
         # 检查是否已经订阅
-        if vt_symbol in subscribed_symbols.get_symbols():
+        if vt_symbol in self.subscribed:
             log_manager.log(f"合约已订阅：{vt_symbol}")
             return
 
@@ -1266,13 +954,11 @@ class MarketMonitor(QtWidgets.QWidget):
             if row < 0 or column < 0:
                 return
             
-            item = self.contract_table.item(row, 0)
-            if not item:
+            contract = self.contract_model.get_contract(row)
+            if not contract:
                 return
             
-            vt_symbol = item.text()
-            if not vt_symbol:
-                return
+            vt_symbol = contract.vt_symbol
             
             # 获取合约信息
             contract = self.contracts.get(vt_symbol)
@@ -1287,7 +973,7 @@ class MarketMonitor(QtWidgets.QWidget):
                 return
             
             # 检查是否已订阅
-            if vt_symbol not in subscribed_symbols.get_symbols():
+            if vt_symbol not in self.subscribed:
                 # 自动订阅合约
                 req = SubscribeRequest(
                     symbol=contract.symbol,
@@ -1347,6 +1033,7 @@ class MarketMonitor(QtWidgets.QWidget):
             log_manager.log(f"准备显示图表：{contract.vt_symbol}")
             
             # 创建并显示期货窗口
+            from ui.widgets.futures_chart import FuturesChartWindow
             chart_window = FuturesChartWindow(
                 main_engine=self.main_engine,
                 event_engine=self.event_engine,
@@ -1385,20 +1072,12 @@ class MarketMonitor(QtWidgets.QWidget):
             log_manager.log(f"双击事件触发 - 行：{row}，列：{column}")
             
             # 检查行是否有效
-            if row < 0 or row >= self.tick_table.rowCount():
+            vt_symbol = self.tick_model.get_vt_symbol(row)
+            if not vt_symbol:
                 log_manager.log(f"无效的行索引：{row}")
                 return
             
-            # 获取合约代码和交易所
-            symbol_item = self.tick_table.item(row, 0)
-            exchange_item = self.tick_table.item(row, 1)
-            if not symbol_item or not exchange_item:
-                log_manager.log(f"第{row}行数据不完整")
-                return
-                
-            symbol = symbol_item.text()  # 获取合约代码
-            exchange = exchange_item.text()  # 获取交易所
-            vt_symbol = f"{symbol}.{exchange}"  # 构造完整的vt_symbol
+            symbol, exchange = vt_symbol.split('.')
             log_manager.log(f"双击行情表格：{symbol}，交易所：{exchange}，完整vt_symbol：{vt_symbol}")
             
             # 获取合约信息
@@ -1455,8 +1134,8 @@ class MarketMonitor(QtWidgets.QWidget):
                 position.pnl = pnl
                 position.last_price = last_price
                 
-                # 更新持仓表格
-                self.update_position_table()
+                # 标记持仓表格需要刷新，同一帧内只重绘一次
+                refresh_scheduler.mark_dirty(self.update_position_table)
                 
                 log_manager.log(f"更新持仓盈亏：{vt_symbol} - 最新价：{last_price:.2f} - 盈亏：{pnl:.2f}")
                 
@@ -1524,15 +1203,8 @@ class MarketMonitor(QtWidgets.QWidget):
             log_manager.log(f"更新持仓表格失败：{str(e)}")
         
     def filter_contracts(self, text: str) -> None:
-        """过滤合约"""
-        for row in range(self.contract_table.rowCount()):
-            should_show = False
-            for col in range(self.contract_table.columnCount()):
-                item = self.contract_table.item(row, col)
-                if item and text.lower() in item.text().lower():
-                    should_show = True
-                    break
-            self.contract_table.setRowHidden(row, not should_show)
+        """过滤合约：匹配代码、交易所、名称、合约类型或名称拼音首字母"""
+        self.contract_proxy.set_rows(self.contract_search.search(text))
         
     def export_data(self) -> None:
         """导出数据到CSV"""
@@ -1545,18 +1217,15 @@ class MarketMonitor(QtWidgets.QWidget):
             with open(path, 'w', newline='') as f:
                 writer = csv.writer(f)
                 # 写入表头
-                headers = []
-                for i in range(self.tick_table.columnCount()):
-                    headers.append(self.tick_table.horizontalHeaderItem(i).text())
+                model = self.tick_model
+                headers = [
+                    model.headerData(i, QtCore.Qt.Horizontal) for i in range(DATA_COLUMN_COUNT)
+                ]
                 writer.writerow(headers)
                 
                 # 写入数据
-                for row in range(self.tick_table.rowCount()):
-                    row_data = []
-                    for col in range(self.tick_table.columnCount()):
-                        item = self.tick_table.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
+                for values in model.values:
+                    writer.writerow(values)
                 
             log_manager.log(f"数据已导出到：{path}")
             
@@ -1570,10 +1239,15 @@ class MarketMonitor(QtWidgets.QWidget):
             self.event_engine.unregister(EVENT_TICK, self.signal_tick.emit)
             self.event_engine.unregister(EVENT_CONTRACT, self.process_contract_event)
             self.event_engine.unregister(EVENT_LOG, self.process_log_event)
+            self.event_engine.unregister(EVENT_SUBSCRIPTION, self.signal_subscription.emit)
             
             # 停止定时器
             if self.timer:
                 self.timer.stop()
+            refresh_scheduler.unregister(self.refresh_ticks)
+            refresh_scheduler.unregister(self.update_position_table)
+            subscribed_symbols.remove_listener(self.on_subscription_changed)
+            subscribed_symbols.flush()
                 
         except Exception as e:
             log_manager.log(f"关闭窗口失败：{str(e)}")
@@ -1607,7 +1281,9 @@ class MarketMonitor(QtWidgets.QWidget):
         """取消订阅合约"""
         try:
             # 获取合约代码
-            vt_symbol = self.tick_table.item(row, 0).text()
+            vt_symbol = self.tick_model.get_vt_symbol(row)
+            if not vt_symbol:
+                return
             
             # 确认对话框
             reply = QtWidgets.QMessageBox.question(
@@ -1694,42 +1370,11 @@ class MarketMonitor(QtWidgets.QWidget):
         
     def add_contract_to_table(self, contract: ContractData) -> None:
         """添加合约到表格"""
-        # 获取行数
-        row = self.contract_table.rowCount()
-        self.contract_table.insertRow(row)
-        
-        # 设置合约信息
-        self.contract_table.setItem(row, 0, QtWidgets.QTableWidgetItem(contract.vt_symbol))
-        self.contract_table.setItem(row, 1, QtWidgets.QTableWidgetItem(contract.symbol))
-        self.contract_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(contract.exchange)))
-        self.contract_table.setItem(row, 3, QtWidgets.QTableWidgetItem(contract.name))
-        self.contract_table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(contract.product)))
-        self.contract_table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(contract.size)))
-        self.contract_table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(contract.pricetick)))
-        self.contract_table.setItem(row, 7, QtWidgets.QTableWidgetItem(str(contract.min_volume)))
-        
-        # 创建订阅按钮
-        subscribe_button = QtWidgets.QPushButton("订阅")
-        subscribe_button.setStyleSheet("""
-            QPushButton {
-                color: white;
-                background-color: #4CAF50;
-                border: none;
-                padding: 2px 8px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            QPushButton:pressed {
-                background-color: #3d8b40;
-            }
-        """)
-        # 使用lambda传递合约信息给订阅函数
-        subscribe_button.clicked.connect(
-            lambda: self.subscribe_contract(contract)
-        )
-        self.contract_table.setCellWidget(row, 8, subscribe_button)
+        self.contracts[contract.vt_symbol] = contract
+        row = self.contract_model.add_contract(contract)
+        self.contract_search.add(row, contract)
+        if self.search_line.text():
+            self.filter_contracts(self.search_line.text())
 
     def subscribe_contract(self, contract: ContractData) -> None:
         """订阅合约"""
@@ -1745,7 +1390,7 @@ class MarketMonitor(QtWidgets.QWidget):
             
             # 添加到已订阅列表
             vt_symbol = contract.vt_symbol
-            if vt_symbol not in subscribed_symbols.get_symbols():  # 使用 get_symbols() 方法
+            if vt_symbol not in self.subscribed:
                 subscribed_symbols.add(vt_symbol)  # 使用 add 方法添加
                 
                 # 加到行情表格
@@ -1781,135 +1426,18 @@ class MarketMonitor(QtWidgets.QWidget):
     def add_tick_to_table(self, vt_symbol: str) -> None:
         """在行情表格中添加新的合约行"""
         try:
-            # 获取当前行数
-            row = self.tick_table.rowCount()
-            self.tick_table.insertRow(row)
-            
-            # 分解vt_symbol获取合约代码和交易所
-            symbol, exchange = vt_symbol.split('.')
-            
-            # 获取合约信息
-            contract = self.contracts.get(vt_symbol)
-            contract_name = contract.name if contract else symbol
-            
-            # 设置基本信息
-            self.tick_table.setItem(row, 0, QtWidgets.QTableWidgetItem(symbol))
-            self.tick_table.setItem(row, 1, QtWidgets.QTableWidgetItem(exchange))
-            self.tick_table.setItem(row, 2, QtWidgets.QTableWidgetItem(contract_name))
-            
-            # 添加K线图按钮
-            chart_button = QtWidgets.QPushButton("K线")
-            chart_button.setStyleSheet("""
-                QPushButton {
-                    font-size: 12px;
-                    padding: 2px 5px;
-                    background-color: #f0f0f0;
-                    border: 1px solid #ccc;
-                    border-radius: 2px;
-                }
-                QPushButton:hover {
-                    background-color: #e0e0e0;
-                }
-            """)
-            chart_button.clicked.connect(
-                lambda: self.show_chart_from_button(vt_symbol)
-            )
-            self.tick_table.setCellWidget(row, 14, chart_button)
-            
-            # 添加快速下单按钮
-            trading_widget = QtWidgets.QWidget()
-            layout = QtWidgets.QHBoxLayout(trading_widget)
-            
-            buy_button = QtWidgets.QPushButton("买")
-            sell_button = QtWidgets.QPushButton("卖")
-            
-            # 设置按钮样式
-            buy_button_style = """
-                QPushButton {
-                    color: white;
-                    background-color: #ff4d4d;
-                    border: none;
-                    padding: 2px 8px;
-                    font-size: 12px;
-                    min-width: 30px;
-                    max-width: 30px;
-                    min-height: 20px;
-                    max-height: 20px;
-                }
-                QPushButton:hover {
-                    background-color: #ff3333;
-                }
-            """
-            
-            sell_button_style = """
-                QPushButton {
-                    color: white;
-                    background-color: #00b33c;
-                    border: none;
-                    padding: 2px 8px;
-                    font-size: 12px;
-                    min-width: 30px;
-                    max-width: 30px;
-                    min-height: 20px;
-                    max-height: 20px;
-                }
-                QPushButton:hover {
-                    background-color: #009933;
-                }
-            """
-            
-            buy_button.setStyleSheet(buy_button_style)
-            sell_button.setStyleSheet(sell_button_style)
-            
-            # 设置按钮点击事件
-            buy_button.clicked.connect(
-                lambda: self.on_quick_trade(symbol, exchange, 0.0, True)
-            )
-            sell_button.clicked.connect(
-                lambda: self.on_quick_trade(symbol, exchange, 0.0, False)
-            )
-            
-            layout.addWidget(buy_button)
-            layout.addWidget(sell_button)
-            layout.setContentsMargins(2, 2, 2, 2)
-            layout.setSpacing(4)
-            
-            self.tick_table.setCellWidget(row, 15, trading_widget)
-            
-            # 记录日志
+            # 收到行情前先显示占位行
+            row = self.tick_model.add_symbol(vt_symbol)
+            self._create_buttons(row, vt_symbol)
             log_manager.log(f"已加合约到行情表格：{vt_symbol}")
             
-            # 添加解除订阅按钮
-            unsubscribe_button = QtWidgets.QPushButton("退订")
-            unsubscribe_button.setStyleSheet("""
-                QPushButton {
-                    color: white;
-                    background-color: #ff4d4d;
-                    border: none;
-                    padding: 2px 8px;
-                    font-size: 12px;
-                    min-width: 40px;
-                    max-width: 40px;
-                }
-                QPushButton:hover {
-                    background-color: #ff3333;
-                }
-                QPushButton:pressed {
-                    background-color: #cc0000;
-                }
-            """)
-            unsubscribe_button.clicked.connect(
-                lambda: self.unsubscribe_contract(vt_symbol, row)
-            )
-            self.tick_table.setCellWidget(row, 16, unsubscribe_button)
-            
         except Exception as e:
             log_manager.log(f"添加合约到行情表格失败：{str(e)}")
         
-    def unsubscribe_contract(self, vt_symbol: str, row: int) -> None:
+    def unsubscribe_contract(self, vt_symbol: str) -> None:
         """解除订阅合约"""
         try:
-            log_manager.log(f"开始解除订阅合约：{vt_symbol}, 行号：{row}")
+            log_manager.log(f"开始解除订阅合约：{vt_symbol}")
             
             # 先确认是否要退订
             reply = QtWidgets.QMessageBox.question(
@@ -1929,7 +1457,7 @@ class MarketMonitor(QtWidgets.QWidget):
             log_manager.log(f"解析合约信息 - 代码：{symbol}, 交易所：{exchange}")
             
             # 检查是否在已订阅列表中
-            if vt_symbol in subscribed_symbols.get_symbols():
+            if vt_symbol in self.subscribed:
                 log_manager.log(f"从订阅列表中移除：{vt_symbol}")
                 subscribed_symbols.remove(vt_symbol)
             else:
@@ -1943,12 +1471,11 @@ class MarketMonitor(QtWidgets.QWidget):
             else:
                 log_manager.log(f"未找到tick数据：{vt_symbol}")
             
-            # 检查行号是否有效
-            if 0 <= row < self.tick_table.rowCount():
-                log_manager.log(f"从行情表格中移除第 {row} 行")
-                self.tick_table.removeRow(row)
+            # 按合约找到所在行后移除，其他行的行号随之更新
+            if self.tick_model.remove_symbol(vt_symbol):
+                log_manager.log(f"从行情表格中移除：{vt_symbol}")
             else:
-                log_manager.log(f"无效的行号：{row}, 当前表格行数：{self.tick_table.rowCount()}")
+                log_manager.log(f"行情表格中没有该合约：{vt_symbol}")
             
             # 记录日志
             log_manager.log(f"已完成解除订阅合约：{vt_symbol}")
@@ -11,7 +11,6 @@ import os
 from vnpy.trader.engine import MainEngine, EventEngine
 from vnpy.trader.event import EVENT_LOG, EVENT_ACCOUNT, EVENT_POSITION
 from vnpy.event import Event
-from config.data_persistence_engine import DataPersistenceEngine
 from ui.new_login_dialog import NewLoginDialog
 
 # 配置PyQt5中文字体
@@ -445,10 +444,39 @@ class NewMainWindow(QtWidgets.QMainWindow):
         except ImportError as e:
             print(f"[ERROR] init_engines: CTP网关未安装: {e}")
         
-        print("[DEBUG] init_engines: 添加数据持久化引擎...")
+        # 数据引擎要打开数据库，推迟到窗口显示后的第一次事件循环再创建
+        self.persistence_engine = None
+        self.tick_recorder = None
+        self.bar_aggregator = None
+        self.trading_db = None
+        QTimer.singleShot(0, self.init_data_engines)
+    
+    def init_data_engines(self):
+        """创建数据持久化、行情录制和K线合成引擎（只执行一次）"""
+        if self.persistence_engine is not None:
+            return
+        
+        from functools import partial
+        from config.database import get_trading_db
+        from config.data_persistence_engine import DataPersistenceEngine
+        from config.tick_recorder import TickRecorder
+        from config.bar_aggregator import BarAggregator
+        
+        # 三个引擎共用同一个数据库实例（连接、分表缓存共享），由主窗口在退出时关闭
+        self.trading_db = get_trading_db()
+        
+        print("[DEBUG] init_data_engines: 添加数据持久化引擎...")
         # 添加数据持久化引擎
-        self.persistence_engine = DataPersistenceEngine(self.main_engine, self.event_engine)
-        print("[DEBUG] init_engines: 数据持久化引擎添加完成")
+        self.persistence_engine = self.main_engine.add_engine(
+            partial(DataPersistenceEngine, database=self.trading_db)
+        )
+        print("[DEBUG] init_data_engines: 数据持久化引擎添加完成")
+        
+        # 添加行情录制引擎
+        self.tick_recorder = self.main_engine.add_engine(partial(TickRecorder, database=self.trading_db))
+        
+        # 添加K线合成引擎
+        self.bar_aggregator = self.main_engine.add_engine(partial(BarAggregator, database=self.trading_db))
     
     def init_ui(self):
         """初始化界面"""
@@ -594,6 +622,8 @@ class NewMainWindow(QtWidgets.QMainWindow):
     
     def connect_to_gateway(self, settings):
         """连接到网关"""
+        # 连接前确保数据引擎已创建，不漏记成交和行情
+        self.init_data_engines()
         try:
             from tests.mock_data.mock_launcher import is_mock_enabled
             if is_mock_enabled():
@@ -781,6 +811,9 @@ class NewMainWindow(QtWidgets.QMainWindow):
         
         if reply == QtWidgets.QMessageBox.Yes:
             self.main_engine.close()
+            # 各数据引擎关闭时已写完数据，最后关闭共用的数据库
+            if self.trading_db is not None:
+                self.trading_db.close()
             event.accept()
         else:
             event.ignore()
@@ -3,6 +3,7 @@ from vnpy.trader.engine import MainEngine, EventEngine
 from vnpy.trader.event import EVENT_POSITION
 from vnpy.event import Event
 from vnpy.trader.object import PositionData
+from ui.widgets.refresh_scheduler import refresh_scheduler
 
 class PositionMonitor(QtWidgets.QTableWidget):
     """持仓监控组件"""
@@ -18,6 +19,11 @@ class PositionMonitor(QtWidgets.QTableWidget):
         # 初始化界面
         self.init_ui()
         
+        # 持仓 -> 行号，以及等待下一帧刷新的最新持仓
+        self.rows = {}
+        self.pending_positions = {}
+        refresh_scheduler.register(self.refresh_positions)
+        
         # 连接信号到处理函数
         self.signal_position.connect(self.process_position_event)
         
@@ -64,6 +70,7 @@ class PositionMonitor(QtWidgets.QTableWidget):
         positions = self.main_engine.get_all_positions()
         self.setRowCount(len(positions))
         for row, position in enumerate(positions):
+            self.rows[(position.symbol, position.direction.value)] = row
             self.process_position_data(position, row)
     
     def process_position_data(self, position: PositionData, row: int):
@@ -104,20 +111,28 @@ class PositionMonitor(QtWidgets.QTableWidget):
             print(f"处理持仓数据出错：{str(e)}")
     
     def process_position_event(self, event: Event):
-        """处理持仓事件"""
+        """处理持仓事件：只保存最新持仓，由刷新调度器每帧合并刷新"""
         position = event.data
-        
-        # 查找是否已存在该合约的持仓
-        for row in range(self.rowCount()):
-            symbol = self.item(row, 0).text()
-            direction = self.item(row, 1).text()
-            if symbol == position.symbol and direction == position.direction.value:
-                self.process_position_data(position, row)
-                break
-        else:
-            # 不存在则添加新行
-            self.insertRow(self.rowCount())
-            self.process_position_data(position, self.rowCount() - 1)
+        self.pending_positions[(position.symbol, position.direction.value)] = position
+        refresh_scheduler.mark_dirty(self.refresh_positions)
+    
+    def refresh_positions(self):
+        """刷新这一帧内有变化的持仓"""
+        positions = self.pending_positions
+        self.pending_positions = {}
+        for key, position in positions.items():
+            row = self.rows.get(key)
+            if row is None:
+                # 不存在则添加新行
+                row = self.rowCount()
+                self.insertRow(row)
+                self.rows[key] = row
+            self.process_position_data(position, row)
+    
+    def closeEvent(self, event):
+        """关闭事件"""
+        refresh_scheduler.unregister(self.refresh_positions)
+        super().closeEvent(event)
     
     def _create_item(self, text: str) -> QtWidgets.QTableWidgetItem:
         """创建表格项"""
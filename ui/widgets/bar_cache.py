@@ -0,0 +1,216 @@
+"""
+图表K线缓存
+进程内按(vt_symbol, 周期)共享K线缓冲区：历史数据每个合约只查询一次，
+1分钟K线由行情实时合成，更高周期从1分钟K线用NumPy重采样得到
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from PyQt5 import QtCore
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import BarData, TickData
+from config.bar_aggregator import TIMEFRAMES
+from ui.widgets.chart_buffer import (
+    BarBuffer, HIGH, LOW, CLOSE, VOLUME, TIMESTAMP, get_bar_values, merge_bars
+)
+
+TICK = "tick"
+MINUTE = "1m"
+
+# 图表可选周期 -> 显示名称，周期名称与K线合成引擎一致
+CHART_TIMEFRAMES: Dict[str, str] = {
+    TICK: "Tick",
+    "1m": "1分钟",
+    "5m": "5分钟",
+    "15m": "15分钟",
+    "1h": "1小时",
+    "d": "日线",
+}
+
+MAX_BARS = 100000       # 每个缓冲区最多保留的K线数量（约一年的1分钟K线）
+MAX_TICKS = 20000       # 每个合约最多保留的tick数量
+HISTORY_DAYS = 3        # 首次打开图表时查询的历史天数
+
+
+def get_utc_offset(dt: datetime) -> float:
+    """时间所在时区相对UTC的偏移秒数，不带时区的时间按本地时区计算"""
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return dt.utcoffset().total_seconds()
+
+
+def resample(data: np.ndarray, seconds: int, offset: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按周期合并K线数组
+
+    周期按当地时间对齐（offset为时区偏移秒数），返回合并后的数组（时间戳为周期起点）
+    和每组第一根K线在data中的序号。
+    """
+    keys = np.floor((data[TIMESTAMP] + offset) / seconds)
+    starts = np.flatnonzero(np.diff(keys, prepend=np.nan))
+    result = merge_bars(data, starts)
+    result[TIMESTAMP] = keys[starts] * seconds - offset
+    return result, starts
+
+
+class DerivedBars:
+    """从1分钟K线重采样得到的周期K线
+
+    只在1分钟缓冲区整体变化时全量重采样，否则从最后一根周期K线对应的1分钟K线开始增量重算。
+    """
+
+    __slots__ = ("buffer", "seconds", "generation", "start")
+
+    def __init__(self, seconds: int):
+        self.buffer: BarBuffer = BarBuffer(MAX_BARS)
+        self.seconds: int = seconds
+        self.generation: int = -1       # 对应的1分钟缓冲区generation
+        self.start: int = 0             # 最后一根周期K线的第一根1分钟K线序号
+
+    def update(self, source: BarBuffer) -> BarBuffer:
+        """与1分钟缓冲区同步"""
+        if not len(source):
+            if len(self.buffer):
+                self.buffer.clear()
+            self.generation = source.generation
+            return self.buffer
+
+        offset = get_utc_offset(source.get_datetime(len(source) - 1))
+        self.buffer.tzinfo = source.tzinfo
+
+        if source.generation != self.generation or not len(self.buffer):
+            data, starts = resample(source.view(), self.seconds, offset)
+            self.buffer.set_data(data)
+            self.generation = source.generation
+            self.start = int(starts[-1])
+            return self.buffer
+
+        # 最后一根周期K线可能还在变化，从它开始重算
+        data, starts = resample(source.view(self.start), self.seconds, offset)
+        self.buffer.update_last(data[:, 0])
+        for i in range(1, data.shape[1]):
+            self.buffer.append(data[:, i])
+        self.start += int(starts[-1])
+        return self.buffer
+
+
+class SymbolBars:
+    """单个合约的缓存"""
+
+    __slots__ = ("minute", "ticks", "derived", "loaded", "last_volume")
+
+    def __init__(self):
+        self.minute: BarBuffer = BarBuffer(MAX_BARS)
+        self.ticks: BarBuffer = BarBuffer(MAX_TICKS)
+        self.derived: Dict[str, DerivedBars] = {}
+        self.loaded: bool = False
+        self.last_volume: Optional[float] = None
+
+
+class BarCache(QtCore.QObject):
+    """图表K线缓存
+
+    多个图表窗口共享同一合约的缓冲区：重新打开图表或切换周期时直接使用已有数据，不再查询历史。
+    watch过的合约在图表关闭后继续合成K线，再次打开时数据是连续的。
+    除watch外的方法都在GUI线程中调用，行情通过信号转到GUI线程处理。
+    """
+
+    signal_tick = QtCore.pyqtSignal(Event)
+
+    def __init__(self):
+        super().__init__()
+        self.symbols: Dict[str, SymbolBars] = {}
+        self.watched: Set[str] = set()
+        self.signal_tick.connect(self.process_tick_event)
+
+    def watch(self, vt_symbol: str, event_engine: EventEngine) -> None:
+        """开始用行情事件更新合约的缓存，重复调用无效"""
+        if vt_symbol in self.watched:
+            return
+        self.watched.add(vt_symbol)
+        event_engine.register(EVENT_TICK + vt_symbol, self.signal_tick.emit)
+
+    def process_tick_event(self, event: Event) -> None:
+        self.update_tick(event.data)
+
+    def get_symbol(self, vt_symbol: str) -> SymbolBars:
+        state = self.symbols.get(vt_symbol)
+        if state is None:
+            state = self.symbols[vt_symbol] = SymbolBars()
+        return state
+
+    def is_loaded(self, vt_symbol: str) -> bool:
+        """是否已经加载过历史数据"""
+        return self.get_symbol(vt_symbol).loaded
+
+    def load_history(self, vt_symbol: str, query: Callable[[], Optional[List[BarData]]]) -> int:
+        """第一次调用时用query查询1分钟历史K线并合并到缓存中，返回查询到的数量
+
+        查询前已由行情合成的K线保留，只补入更早的历史K线。
+        """
+        state = self.get_symbol(vt_symbol)
+        if state.loaded:
+            return 0
+
+        history = query()
+        state.loaded = True
+        if not history:
+            return 0
+
+        minute = state.minute
+        data = np.array([get_bar_values(bar) for bar in history]).T
+        if len(minute):
+            data = data[:, data[TIMESTAMP] < minute.data[TIMESTAMP, 0]]
+            data = np.hstack([data, minute.view()])
+        minute.tzinfo = history[-1].datetime.tzinfo
+        minute.set_data(data)
+        return len(history)
+
+    def get_buffer(self, vt_symbol: str, timeframe: str) -> BarBuffer:
+        """获取合约某个周期的缓冲区，高周期在调用时与1分钟K线同步"""
+        state = self.get_symbol(vt_symbol)
+        if timeframe == TICK:
+            return state.ticks
+        if timeframe == MINUTE:
+            return state.minute
+
+        derived = state.derived.get(timeframe)
+        if derived is None:
+            derived = state.derived[timeframe] = DerivedBars(TIMEFRAMES[timeframe][1] * 60)
+        return derived.update(state.minute)
+
+    def update_tick(self, tick: TickData) -> None:
+        """用行情更新tick序列和1分钟K线"""
+        if not tick.last_price:
+            return
+        state = self.get_symbol(tick.vt_symbol)
+
+        if state.last_volume is None:
+            volume = 0.0
+        else:
+            volume = max(tick.volume - state.last_volume, 0)
+        state.last_volume = tick.volume
+
+        price = tick.last_price
+        timestamp = tick.datetime.timestamp()
+        state.ticks.tzinfo = tick.datetime.tzinfo
+        state.ticks.append((price, price, price, price, volume, timestamp))
+
+        minute = state.minute
+        start = timestamp // 60 * 60
+        last = minute.get_last_timestamp()
+        if last is not None and start == last:
+            values = minute.data[:, len(minute) - 1]
+            values[HIGH] = max(values[HIGH], price)
+            values[LOW] = min(values[LOW], price)
+            values[CLOSE] = price
+            values[VOLUME] += volume
+        elif last is None or start > last:
+            minute.tzinfo = tick.datetime.tzinfo
+            minute.append((price, price, price, price, volume, start))
+
+
+bar_cache = BarCache()
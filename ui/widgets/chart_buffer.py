@@ -0,0 +1,136 @@
+"""
+图表数据缓冲区
+预分配的列式数组保存K线和价格序列，追加为均摊O(1)，绘制时直接读取数组视图而不复制
+"""
+
+from datetime import datetime, tzinfo
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from vnpy.trader.object import BarData
+
+# K线缓冲区的行
+OPEN, HIGH, LOW, CLOSE, VOLUME, TIMESTAMP = range(6)
+BAR_FIELDS = 6
+
+TRIM_RATIO = 0.1        # 写满后一次丢弃的比例
+
+
+class ArrayBuffer:
+    """定长列式缓冲区
+
+    每个字段占数组的一行，每条记录占一列。在capacity之外预留capacity * TRIM_RATIO列余量，
+    写满后一次丢弃最旧的余量部分并把保留的记录前移，拷贝开销均摊到每次追加为O(1)。
+    与首尾相接的环形数组不同，记录始终连续存放，view返回的切片不需要拼接复制。
+
+    丢弃、清空或整体替换时generation加一，此时记录的序号整体变化，依赖序号的缓存需要重建；
+    dropped累计写满丢弃的记录数，可据此把按序号保存的位置前移。
+    """
+
+    def __init__(self, fields: int, capacity: int):
+        self.capacity: int = capacity
+        self.data: np.ndarray = np.zeros((fields, capacity + max(int(capacity * TRIM_RATIO), 1)))
+        self.count: int = 0
+        self.generation: int = 0
+        self.dropped: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, values: Sequence[float]) -> None:
+        """追加一条记录"""
+        if self.count == self.data.shape[1]:
+            self.trim()
+        self.data[:, self.count] = values
+        self.count += 1
+
+    def update_last(self, values: Sequence[float]) -> None:
+        """覆盖最后一条记录"""
+        self.data[:, self.count - 1] = values
+
+    def set_data(self, data: np.ndarray) -> None:
+        """整体替换为data（每行一个字段），超过capacity时只保留最新的部分"""
+        data = data[:, -self.capacity:]
+        self.count = data.shape[1]
+        self.data[:, :self.count] = data
+        self.generation += 1
+
+    def trim(self) -> None:
+        """丢弃超出capacity的最旧记录"""
+        drop = self.count - self.capacity
+        self.data[:, :self.capacity] = self.data[:, drop:self.count]
+        self.count = self.capacity
+        self.dropped += drop
+        self.generation += 1
+
+    def clear(self) -> None:
+        """清空"""
+        self.count = 0
+        self.generation += 1
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """[start, end)区间记录的数组视图，不复制数据"""
+        end = self.count if end is None else min(end, self.count)
+        return self.data[:, max(start, 0):end]
+
+
+def merge_bars(data: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """把K线数组按起始序号starts分组合并：开取首、高低取极值、收取尾、量求和，时间戳（如有）取首"""
+    ends = np.append(starts[1:], data.shape[1]) - 1
+    rows = [
+        data[OPEN, starts],
+        np.maximum.reduceat(data[HIGH], starts),
+        np.minimum.reduceat(data[LOW], starts),
+        data[CLOSE, ends],
+        np.add.reduceat(data[VOLUME], starts),
+    ]
+    if data.shape[0] > TIMESTAMP:
+        rows.append(data[TIMESTAMP, starts])
+    return np.vstack(rows)
+
+
+def get_bar_values(bar: BarData) -> tuple:
+    """K线在缓冲区中的一列：开高低收量和时间戳"""
+    return (
+        bar.open_price, bar.high_price, bar.low_price, bar.close_price,
+        bar.volume, bar.datetime.timestamp()
+    )
+
+
+class BarBuffer(ArrayBuffer):
+    """K线缓冲区，行依次为开高低收量和时间戳（秒）"""
+
+    def __init__(self, capacity: int):
+        super().__init__(BAR_FIELDS, capacity)
+        self.tzinfo: Optional[tzinfo] = None
+
+    def append_bar(self, bar: BarData) -> None:
+        """追加一根K线"""
+        self.tzinfo = bar.datetime.tzinfo
+        self.append(get_bar_values(bar))
+
+    def update_bar(self, bar: BarData) -> None:
+        """用bar覆盖最后一根K线"""
+        self.update_last(get_bar_values(bar))
+
+    def set_bars(self, bars: Iterable[BarData]) -> None:
+        """整体替换K线"""
+        bars = list(bars)
+        if bars:
+            self.tzinfo = bars[-1].datetime.tzinfo
+            self.set_data(np.array([get_bar_values(bar) for bar in bars]).T)
+        else:
+            self.clear()
+
+    def get_datetime(self, ix: int) -> Optional[datetime]:
+        """第ix根K线的时间，超出范围时为None"""
+        if 0 <= ix < self.count:
+            return datetime.fromtimestamp(self.data[TIMESTAMP, ix], self.tzinfo)
+        return None
+
+    def get_last_timestamp(self) -> Optional[float]:
+        """最后一根K线的时间戳"""
+        if self.count:
+            return float(self.data[TIMESTAMP, self.count - 1])
+        return None
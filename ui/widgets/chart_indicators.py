@@ -0,0 +1,376 @@
+"""
+图表技术指标
+K线图上的均线、布林带和副图MACD：切换数据时在后台线程用NumPy批量计算全部历史，
+之后每完成一根K线O(1)流式更新，正在形成的K线用peek计算而不改变状态
+"""
+
+from threading import Thread
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+import numpy as np
+import pyqtgraph as pg
+
+from config.indicators import SMA, BOLL, MACD
+from ui.widgets.chart_buffer import ArrayBuffer, BarBuffer, CLOSE
+from ui.widgets.chart_items import UP_COLOR, DOWN_COLOR
+
+MAIN_PANE = "main"      # 叠加在K线图上
+MACD_PANE = "macd"      # MACD副图
+
+HIST_BRUSH_ALPHA = 160  # MACD柱填充的不透明度
+
+
+class ChartIndicator:
+    """图表指标
+
+    由若干流式指标对象组成，各输出按行保存在与K线序号对齐的ArrayBuffer中：
+    前面是已完成K线的值，最后一列是正在形成的K线的值。子类定义名称、所在副图、各行的标签和颜色。
+    """
+
+    name: str = ""
+    pane: str = MAIN_PANE
+    hist_row: Optional[int] = None      # 画成柱状的行
+
+    def __init__(self, lines: List[Tuple[str, tuple]]):
+        self.lines: List[Tuple[str, tuple]] = lines
+        self.enabled: bool = True
+
+        self.updaters: list = []
+        self.values: Optional[ArrayBuffer] = None
+        self.curves: List[pg.PlotDataItem] = []
+        self.pens: List[QtGui.QPen] = [pg.mkPen(color=color, width=1) for _, color in lines]
+
+    def create(self) -> list:
+        """创建流式指标对象"""
+        raise NotImplementedError
+
+    def load(self, close: np.ndarray) -> Tuple[list, np.ndarray]:
+        """批量计算，在后台线程中调用，返回新的流式指标对象和各行的值"""
+        updaters = self.create()
+        rows = []
+        for updater in updaters:
+            result = updater.load(close)
+            rows.extend(result if isinstance(result, tuple) else [result])
+        return updaters, np.array(rows).reshape(len(self.lines), len(close))
+
+    def calculate(self, close: float, finished: bool) -> List[float]:
+        """已完成的K线用update更新状态，正在形成的K线用peek计算"""
+        values = []
+        for updater in self.updaters:
+            result = updater.update(close) if finished else updater.peek(close)
+            values.extend(result if isinstance(result, tuple) else [result])
+        return values
+
+    def create_curves(self, plot: pg.PlotItem) -> None:
+        """创建已完成部分的曲线，柱状的行拆成红绿两条填充到0轴的曲线"""
+        for row, pen in enumerate(self.pens):
+            if row == self.hist_row:
+                for color in [UP_COLOR, DOWN_COLOR]:
+                    self.curves.append(pg.PlotDataItem(
+                        pen=None, fillLevel=0, brush=pg.mkBrush(*color, HIST_BRUSH_ALPHA)
+                    ))
+            else:
+                self.curves.append(pg.PlotDataItem(pen=pen))
+
+        for curve in self.curves:
+            curve.setVisible(self.enabled)
+            plot.addItem(curve)
+            # addItem会用PlotItem自身的设置覆盖抽稀选项，需要在添加之后设置
+            curve.setDownsampling(auto=True, method="peak")
+            curve.setClipToView(True)
+
+    def draw_finished(self, finished: int) -> None:
+        """重设已完成部分的曲线，只在有K线完成时调用"""
+        data = self.values.data[:, :finished]
+        curves = iter(self.curves)
+        for row in range(len(self.lines)):
+            if row == self.hist_row:
+                next(curves).setData(y=np.fmax(data[row], 0))
+                next(curves).setData(y=np.fmin(data[row], 0))
+            else:
+                next(curves).setData(y=data[row])
+
+    def clear(self) -> None:
+        """清空数据和曲线"""
+        self.updaters = []
+        self.values = None
+        for curve in self.curves:
+            curve.clear()
+
+    def get_tail(self) -> Tuple[list, list]:
+        """最后一根已完成K线到正在形成的K线之间的线段和柱状多边形"""
+        count = len(self.values) if self.values else 0
+        if count < 2:
+            return [], []
+
+        x0, x1 = count - 2, count - 1
+        lines = []
+        polygons = []
+        for row, (pen, (y0, y1)) in enumerate(zip(self.pens, self.values.view(x0)[:, :2].tolist())):
+            if y0 != y0 or y1 != y1:
+                continue
+            if row == self.hist_row:
+                color = UP_COLOR if y1 >= 0 else DOWN_COLOR
+                polygon = QtGui.QPolygonF([
+                    QtCore.QPointF(x0, 0), QtCore.QPointF(x0, y0), QtCore.QPointF(x1, y1), QtCore.QPointF(x1, 0)
+                ])
+                polygons.append((pg.mkBrush(*color, HIST_BRUSH_ALPHA), polygon))
+            else:
+                lines.append((pen, QtCore.QLineF(x0, y0, x1, y1)))
+        return lines, polygons
+
+
+class MaIndicator(ChartIndicator):
+    """均线"""
+
+    name = "MA"
+
+    def __init__(self, windows: Sequence[int] = (5, 10, 20, 60)):
+        colors = [(255, 255, 255), (255, 215, 0), (255, 0, 255), (0, 191, 255)]
+        super().__init__([(f"MA{window}", color) for window, color in zip(windows, colors)])
+        self.windows: Sequence[int] = windows
+
+    def create(self) -> list:
+        return [SMA(window) for window in self.windows]
+
+
+class BollIndicator(ChartIndicator):
+    """布林带"""
+
+    name = "BOLL"
+
+    def __init__(self, window: int = 20, dev: float = 2):
+        super().__init__([("BOLL", (255, 165, 0)), ("UB", (160, 160, 160)), ("LB", (160, 160, 160))])
+        self.window: int = window
+        self.dev: float = dev
+
+    def create(self) -> list:
+        return [BOLL(self.window, self.dev)]
+
+
+class MacdIndicator(ChartIndicator):
+    """MACD"""
+
+    name = "MACD"
+    pane = MACD_PANE
+    hist_row = 2
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__([("DIF", (255, 255, 255)), ("DEA", (255, 215, 0)), ("MACD", (255, 0, 255))])
+        self.fast: int = fast
+        self.slow: int = slow
+        self.signal: int = signal
+
+    def create(self) -> list:
+        return [MACD(self.fast, self.slow, self.signal)]
+
+
+class TailItem(pg.GraphicsObject):
+    """各指标正在形成的最后一段，每帧只重绘这一个图形项，已完成部分的曲线不变"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines: List[Tuple[QtGui.QPen, QtCore.QLineF]] = []
+        self.polygons: List[Tuple[QtGui.QBrush, QtGui.QPolygonF]] = []
+        self.bounding_rect: QtCore.QRectF = QtCore.QRectF()
+
+    def set_data(self, lines: list, polygons: list) -> None:
+        self.lines = lines
+        self.polygons = polygons
+
+        rect = QtCore.QRectF()
+        for _, line in lines:
+            rect = rect.united(QtCore.QRectF(line.p1(), line.p2()).normalized())
+        for _, polygon in polygons:
+            rect = rect.united(polygon.boundingRect())
+
+        self.prepareGeometryChange()
+        self.bounding_rect = rect
+        self.update()
+
+    def boundingRect(self) -> QtCore.QRectF:
+        return self.bounding_rect
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionGraphicsItem, widget=None) -> None:
+        painter.setPen(QtCore.Qt.NoPen)
+        for brush, polygon in self.polygons:
+            painter.setBrush(brush)
+            painter.drawPolygon(polygon)
+        for pen, line in self.lines:
+            painter.setPen(pen)
+            painter.drawLine(line)
+
+
+class ChartIndicators(QtCore.QObject):
+    """图表指标管理
+
+    K线缓冲区整体变化（切换周期、加载历史、丢弃旧K线）时在后台线程批量计算，结果通过信号回到GUI线程；
+    之后update每帧只对新完成的K线逐根update、对最后一根peek，已完成部分的曲线只在有K线完成时重设。
+    十字光标读数直接按序号读取保存的指标值。除后台计算外的方法都在GUI线程中调用。
+    """
+
+    signal_loaded = QtCore.pyqtSignal(object)
+    signal_updated = QtCore.pyqtSignal()
+
+    def __init__(self, plots: Dict[str, pg.PlotItem]):
+        super().__init__()
+        self.indicators: List[ChartIndicator] = [MaIndicator(), BollIndicator(), MacdIndicator()]
+        self.tails: Dict[str, TailItem] = {}
+        for pane, plot in plots.items():
+            for indicator in self.indicators:
+                if indicator.pane == pane:
+                    indicator.create_curves(plot)
+            tail = self.tails[pane] = TailItem()
+            plot.addItem(tail)
+
+        self.buffer: Optional[BarBuffer] = None
+        self.generation: int = 0
+        self.finished: int = 0          # 已流式更新到的K线数量
+        self.loading: int = 0           # 最近一次批量计算的编号，旧的结果到达时丢弃
+        self.ready: bool = False
+
+        self.signal_loaded.connect(self.process_loaded)
+
+    def get_indicator(self, name: str) -> Optional[ChartIndicator]:
+        for indicator in self.indicators:
+            if indicator.name == name:
+                return indicator
+        return None
+
+    def set_enabled(self, name: str, enabled: bool) -> None:
+        """显示或隐藏指标，隐藏的指标不计算，重新显示时重新批量计算"""
+        indicator = self.get_indicator(name)
+        if not indicator or indicator.enabled == enabled:
+            return
+
+        indicator.enabled = enabled
+        for curve in indicator.curves:
+            curve.setVisible(enabled)
+        if enabled and self.buffer is not None:
+            self.reload()
+        elif not enabled:
+            indicator.clear()
+            self.update_tails()
+
+    def update(self, buffer: BarBuffer) -> None:
+        """与K线缓冲区同步"""
+        if buffer is not self.buffer or buffer.generation != self.generation:
+            self.buffer = buffer
+            self.reload()
+        elif self.ready:
+            self.update_bars()
+
+    def reload(self) -> None:
+        """清空指标，在后台线程批量计算已完成的K线"""
+        self.generation = self.buffer.generation
+        self.ready = False
+        for indicator in self.indicators:
+            indicator.clear()
+        self.update_tails()
+
+        self.loading += 1
+        finished = max(len(self.buffer) - 1, 0)
+        close = self.buffer.view(0, finished)[CLOSE].copy()
+        indicators = [indicator for indicator in self.indicators if indicator.enabled]
+        Thread(target=self.run_load, args=(self.loading, close, indicators), daemon=True).start()
+
+    def run_load(self, loading: int, close: np.ndarray, indicators: List[ChartIndicator]) -> None:
+        """后台线程：批量计算，只读取传入的数组副本"""
+        results = [(indicator, indicator.load(close)) for indicator in indicators]
+        self.signal_loaded.emit((loading, len(close), results))
+
+    def process_loaded(self, payload: tuple) -> None:
+        """GUI线程：采用批量计算结果，并补上计算期间新完成的K线"""
+        loading, finished, results = payload
+        if loading != self.loading or self.buffer is None or self.buffer.generation != self.generation:
+            return
+
+        capacity = self.buffer.data.shape[1]
+        for indicator, (updaters, values) in results:
+            if not indicator.enabled:
+                continue
+            indicator.updaters = updaters
+            indicator.values = ArrayBuffer(len(indicator.lines), capacity)
+            indicator.values.set_data(values)
+
+        self.finished = finished
+        self.ready = True
+        self.update_bars(redraw=True)
+        self.signal_updated.emit()
+
+    def update_bars(self, redraw: bool = False) -> None:
+        """逐根更新新完成的K线，重算正在形成的K线"""
+        count = len(self.buffer)
+        finished = max(count - 1, 0)
+        close = self.buffer.data[CLOSE]
+        indicators = [indicator for indicator in self.indicators if indicator.values is not None]
+
+        for indicator in indicators:
+            values = indicator.values
+            # 上一帧正在形成的K线占最后一列，完成后用update的结果覆盖
+            for ix in range(self.finished, count):
+                result = indicator.calculate(close[ix], ix < finished)
+                if ix < len(values):
+                    values.update_last(result)
+                else:
+                    values.append(result)
+
+            if redraw or finished != self.finished:
+                indicator.draw_finished(finished)
+
+        self.finished = finished
+        self.update_tails()
+
+    def update_tails(self) -> None:
+        for pane, tail in self.tails.items():
+            lines = []
+            polygons = []
+            for indicator in self.indicators:
+                if indicator.pane == pane and indicator.values is not None:
+                    indicator_lines, indicator_polygons = indicator.get_tail()
+                    lines.extend(indicator_lines)
+                    polygons.extend(indicator_polygons)
+            tail.set_data(lines, polygons)
+
+    def clear(self) -> None:
+        """清空全部指标，不再更新直到下一次update"""
+        if self.buffer is None:
+            return
+        self.buffer = None
+        self.loading += 1
+        self.ready = False
+        for indicator in self.indicators:
+            indicator.clear()
+        self.update_tails()
+
+    def get_y_range(self, pane: str, start: int, end: int) -> Optional[Tuple[float, float]]:
+        """[start, end)区间内某个副图上指标值的范围，没有有效值时为None"""
+        lows = []
+        highs = []
+        for indicator in self.indicators:
+            if indicator.pane != pane or indicator.values is None:
+                continue
+            data = indicator.values.view(start, end)
+            if data.size:
+                # fmin/fmax忽略预热期的NaN，不复制数组
+                lows.append(np.fmin.reduce(data, axis=None))
+                highs.append(np.fmax.reduce(data, axis=None))
+
+        low = np.fmin.reduce(lows) if lows else np.nan
+        high = np.fmax.reduce(highs) if highs else np.nan
+        if np.isnan(low):
+            return None
+        return float(low), float(high)
+
+    def get_readouts(self, ix: int) -> List[Tuple[str, float, tuple]]:
+        """第ix根K线的指标读数：(标签, 值, 颜色)"""
+        readouts = []
+        for indicator in self.indicators:
+            values = indicator.values
+            if values is None or not 0 <= ix < len(values):
+                continue
+            for (label, color), value in zip(indicator.lines, values.data[:, ix].tolist()):
+                if value == value:
+                    readouts.append((label, value, color))
+        return readouts
@@ -0,0 +1,366 @@
+"""
+K线图形项
+已完成的K线按块录制到QPicture中缓存，每次刷新只重绘最后一根正在形成的K线；
+缩小到每个像素列超过一根K线时，按像素列合并K线后绘制
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+import numpy as np
+import pyqtgraph as pg
+
+from ui.widgets.chart_buffer import BarBuffer, OPEN, HIGH, LOW, CLOSE, VOLUME, merge_bars
+
+CHUNK_SIZE = 128            # 每个缓存块包含的K线数量（合并显示时为合并后的K线数量）
+
+UP_COLOR = (255, 0, 0)      # 上涨红色
+DOWN_COLOR = (0, 255, 0)    # 下跌绿色
+CANDLE_WIDTH = 0.4          # K线实体宽度
+VOLUME_WIDTH = 0.6          # 成交量柱宽度
+
+
+class ChartItem(pg.GraphicsObject):
+    """K线序列图形项基类
+
+    K线直接从BarBuffer的数组视图读取，第i根K线画在x=i处。除最后一根外的K线视为已完成：每满CHUNK_SIZE根为一个固定的块，
+    块第一次需要绘制时录制为QPicture；不满一块的部分录制为尾块，只在有新K线完成时重录；
+    最后一根K线每次绘制时直接画。绘制时只回放与可见区域相交的块，K线数量增加时单帧开销基本不变。
+
+    每个像素列超过一根K线时，按2的幂n把从0开始对齐的每n根K线用NumPy合并为一根（开取首、收取尾、
+    高低取极值、成交量求和），每个像素列约一根。合并后的K线同样按块缓存：每个缩放级别的块在第一次
+    进入可见区域时合并并录制，平移时只处理新出现的块；包含最后一根K线的组每次绘制时直接画。
+
+    子类实现draw_bar和get_array_range，录制缓存时按颜色批量绘制的draw_bars可选覆盖。
+    """
+
+    def __init__(self):
+        super().__init__()
+        # 使option.exposedRect为实际需要重绘的区域
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        self.buffer: Optional[BarBuffer] = None
+        self.generation: int = 0        # 缓存对应的缓冲区generation
+        self.finished_count: int = 0    # 已录制到缓存中的K线数量
+
+        self.chunks: List[Optional[QtGui.QPicture]] = []     # 未绘制过的块为None
+        self.chunk_ranges: List[Tuple[float, float]] = []
+        self.tail: QtGui.QPicture = QtGui.QPicture()
+        self.tail_range: Optional[Tuple[float, float]] = None
+
+        # 合并K线缓存：合并根数 -> {块号: 图片}，以及各级别的尾块（尾块覆盖的组数, 图片）
+        self.lod_chunks: Dict[int, Dict[int, QtGui.QPicture]] = {}
+        self.lod_tails: Dict[int, Tuple[int, QtGui.QPicture]] = {}
+
+        self.bounding_rect: QtCore.QRectF = QtCore.QRectF()
+
+        self.up_pen: QtGui.QPen = pg.mkPen(color=UP_COLOR, width=1)
+        self.up_brush: QtGui.QBrush = pg.mkBrush(color=UP_COLOR)
+        self.down_pen: QtGui.QPen = pg.mkPen(color=DOWN_COLOR, width=1)
+        self.down_brush: QtGui.QBrush = pg.mkBrush(color=DOWN_COLOR)
+
+    def draw_bar(
+        self,
+        painter: QtGui.QPainter,
+        x: float,
+        scale: int,
+        values: Sequence[float]
+    ) -> None:
+        """绘制中心在x处的一根K线，scale为合并的根数，values按OPEN、HIGH、LOW、CLOSE、VOLUME取值"""
+        raise NotImplementedError
+
+    def draw_bars(self, painter: QtGui.QPainter, x: np.ndarray, scale: int, data: np.ndarray) -> None:
+        """绘制中心在x数组处的一组K线，data为对应的K线数组，默认逐根调用draw_bar"""
+        for ix, values in zip(x.tolist(), data.T.tolist()):
+            self.draw_bar(painter, ix, scale, values)
+
+    def get_array_range(self, data: np.ndarray) -> Tuple[float, float]:
+        """K线数组在Y轴上的范围"""
+        raise NotImplementedError
+
+    def iter_colors(self, data: np.ndarray):
+        """按涨跌拆分数组，依次产生(画笔, 画刷, 该颜色K线的掩码)"""
+        rise = data[CLOSE] >= data[OPEN]
+        yield self.up_pen, self.up_brush, rise
+        yield self.down_pen, self.down_brush, ~rise
+
+    def set_pen(self, painter: QtGui.QPainter, open_price: float, close_price: float) -> None:
+        """按涨跌设置画笔和画刷"""
+        if close_price >= open_price:
+            painter.setPen(self.up_pen)
+            painter.setBrush(self.up_brush)
+        else:
+            painter.setPen(self.down_pen)
+            painter.setBrush(self.down_brush)
+
+    def update_bars(self, buffer: BarBuffer) -> None:
+        """同步K线数据
+
+        buffer与上次相同且只在末尾追加或修改最后一根时增量更新，丢弃旧K线或整体替换后重建缓存。
+        """
+        finished = len(buffer) - 1
+        if buffer is not self.buffer or buffer.generation != self.generation or finished < self.finished_count:
+            self.buffer = buffer
+            self.generation = buffer.generation
+            self.clear_cache()
+
+        if finished > self.finished_count:
+            self.record(finished)
+
+        self.prepareGeometryChange()
+        self.bounding_rect = self.calculate_bounding_rect()
+        self.update()
+
+    def clear_cache(self) -> None:
+        """清空缓存"""
+        self.finished_count = 0
+        self.chunks = []
+        self.chunk_ranges = []
+        self.tail = QtGui.QPicture()
+        self.tail_range = None
+        self.clear_lod()
+
+    def clear_lod(self) -> None:
+        """清空合并K线缓存"""
+        self.lod_chunks = {}
+        self.lod_tails = {}
+
+    def record(self, finished: int) -> None:
+        """把新完成的K线录制到缓存中"""
+        data = self.buffer.data
+        start = len(self.chunks) * CHUNK_SIZE
+        while start + CHUNK_SIZE <= finished:
+            self.chunks.append(None)
+            self.chunk_ranges.append(self.get_array_range(data[:, start:start + CHUNK_SIZE]))
+            start += CHUNK_SIZE
+
+        if start < finished:
+            self.tail = self.record_picture(start, finished)
+            self.tail_range = self.get_array_range(data[:, start:finished])
+        else:
+            self.tail, self.tail_range = QtGui.QPicture(), None
+
+        self.finished_count = finished
+
+    def record_picture(self, start: int, end: int) -> QtGui.QPicture:
+        """把[start, end)的已完成K线录制为QPicture"""
+        picture = QtGui.QPicture()
+        painter = QtGui.QPainter(picture)
+        self.draw_bars(painter, np.arange(start, end, dtype=float), 1, self.buffer.data[:, start:end])
+        painter.end()
+        return picture
+
+    def calculate_bounding_rect(self) -> QtCore.QRectF:
+        """由各块的Y轴范围和最后一根K线计算外接矩形"""
+        count = len(self.buffer)
+        if not count:
+            return QtCore.QRectF()
+
+        ranges = list(self.chunk_ranges)
+        if self.tail_range:
+            ranges.append(self.tail_range)
+        ranges.append(self.get_array_range(self.get_values(count - 1, count)))
+
+        low = min(r[0] for r in ranges)
+        high = max(r[1] for r in ranges)
+        return QtCore.QRectF(-0.5, low, count, high - low)
+
+    def get_values(self, start: int, end: int) -> np.ndarray:
+        """[start, end)区间K线的数组视图，包含最后一根正在形成的K线"""
+        return self.buffer.view(start, end)
+
+    def get_lod_size(self) -> int:
+        """当前缩放下每组合并的K线数量，每个像素列不超过一根K线时为1"""
+        view = self.getViewBox()
+        if not isinstance(view, pg.ViewBox) or view.width() <= 0:
+            return 1
+
+        # 直接用视图范围计算，范围变化信号中调用时变换矩阵可能还未更新
+        x_min, x_max = view.viewRange()[0]
+        bars_per_pixel = (x_max - x_min) / view.width()
+        if bars_per_pixel <= 1:
+            return 1
+        return 1 << math.ceil(math.log2(bars_per_pixel))
+
+    def get_y_range(self, start: int, end: int) -> Optional[Tuple[float, float]]:
+        """[start, end)区间内K线的Y轴范围，完整覆盖的块直接使用缓存的范围"""
+        start = max(start, 0)
+        end = min(end, len(self.buffer))
+        if start >= end:
+            return None
+
+        # 合并显示时按合并后的K线计算（成交量求和后会变大）
+        size = self.get_lod_size()
+        if size > 1:
+            start = start // size * size
+            end = min(-(-end // size) * size, len(self.buffer))
+            return self.get_array_range(aggregate(self.get_values(start, end), size))
+
+        ranges = []
+        ix = start
+        while ix < end:
+            chunk_index = ix // CHUNK_SIZE
+            chunk_end = (chunk_index + 1) * CHUNK_SIZE
+            if ix % CHUNK_SIZE == 0 and chunk_end <= end and chunk_index < len(self.chunks):
+                ranges.append(self.chunk_ranges[chunk_index])
+                ix = chunk_end
+            else:
+                ranges.append(self.get_array_range(self.get_values(ix, ix + 1)))
+                ix += 1
+
+        return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+    def boundingRect(self) -> QtCore.QRectF:
+        return self.bounding_rect
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionGraphicsItem, widget=None) -> None:
+        """回放可见的缓存块和尾块，再画最后一根K线"""
+        if not self.buffer or not len(self.buffer):
+            return
+
+        rect = option.exposedRect
+        size = self.get_lod_size()
+        if size > 1:
+            self.paint_lod(painter, rect, size)
+            return
+
+        first = max(int(rect.left()), 0) // CHUNK_SIZE
+        last = min(int(rect.right()) // CHUNK_SIZE, len(self.chunks) - 1)
+        for i in range(first, last + 1):
+            picture = self.chunks[i]
+            if picture is None:
+                picture = self.chunks[i] = self.record_picture(i * CHUNK_SIZE, (i + 1) * CHUNK_SIZE)
+            picture.play(painter)
+
+        self.tail.play(painter)
+        count = len(self.buffer)
+        self.draw_bar(painter, count - 1, 1, self.get_values(count - 1, count)[:, 0].tolist())
+
+    def paint_lod(self, painter: QtGui.QPainter, rect: QtCore.QRectF, size: int) -> None:
+        """合并显示：回放可见的已完成块和尾块，再画包含最后一根K线的组"""
+        last_group = (len(self.buffer) - 1) // size     # 包含最后一根K线的组
+        full_chunks = last_group // CHUNK_SIZE          # 全部组都已完成的块数
+
+        chunks = self.lod_chunks.setdefault(size, {})
+        first = max(int(rect.left()), 0) // size // CHUNK_SIZE
+        last = min(int(rect.right()) // size // CHUNK_SIZE, full_chunks - 1)
+        for i in range(first, last + 1):
+            picture = chunks.get(i)
+            if picture is None:
+                start = i * CHUNK_SIZE
+                picture = chunks[i] = self.record_lod(size, start, start + CHUNK_SIZE)
+            picture.play(painter)
+
+        # 尾块：最后一个不满的块中已完成的组，组数变化时重录
+        tail_start = full_chunks * CHUNK_SIZE
+        tail = self.lod_tails.get(size)
+        if not tail or tail[0] != last_group:
+            tail = self.lod_tails[size] = (last_group, self.record_lod(size, tail_start, last_group))
+        tail[1].play(painter)
+
+        start = last_group * size
+        values = aggregate(self.get_values(start, len(self.buffer)), size)
+        self.draw_bar(painter, start + (size - 1) / 2, size, values[:, 0].tolist())
+
+    def record_lod(self, size: int, first: int, end: int) -> QtGui.QPicture:
+        """合并[first, end)组的K线并录制为图片，这些组的K线都已完成"""
+        data = aggregate(self.buffer.data[:, first * size:end * size], size)
+
+        picture = QtGui.QPicture()
+        painter = QtGui.QPainter(picture)
+        x = np.arange(first, first + data.shape[1]) * size + (size - 1) / 2
+        self.draw_bars(painter, x, size, data)
+        painter.end()
+        return picture
+
+
+def aggregate(data: np.ndarray, size: int) -> np.ndarray:
+    """把K线数组每size根合并为一根，最后不满size根的部分单独合并"""
+    count = data.shape[1]
+    if size <= 1 or not count:
+        return data
+    return merge_bars(data, np.arange(0, count, size))
+
+
+class CandleItem(ChartItem):
+    """K线实体和影线"""
+
+    def draw_bar(
+        self,
+        painter: QtGui.QPainter,
+        x: float,
+        scale: int,
+        values: Sequence[float]
+    ) -> None:
+        open_price, high_price, low_price, close_price = values[OPEN], values[HIGH], values[LOW], values[CLOSE]
+        self.set_pen(painter, open_price, close_price)
+
+        # 影线
+        if high_price != low_price:
+            painter.drawLine(QtCore.QPointF(x, low_price), QtCore.QPointF(x, high_price))
+
+        # 实体，开收相等时画一字线
+        width = CANDLE_WIDTH * scale
+        half = width / 2
+        if open_price == close_price:
+            painter.drawLine(QtCore.QPointF(x - half, open_price), QtCore.QPointF(x + half, open_price))
+        else:
+            painter.drawRect(QtCore.QRectF(x - half, open_price, width, close_price - open_price))
+
+    def draw_bars(self, painter: QtGui.QPainter, x: np.ndarray, scale: int, data: np.ndarray) -> None:
+        """每种颜色的影线和实体各用一次drawLines/drawRects，回放时的绘制操作数量不随K线数量增加"""
+        width = CANDLE_WIDTH * scale
+        half = width / 2
+        for pen, brush, mask in self.iter_colors(data):
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            lines = []
+            rects = []
+            for ix, open_price, high_price, low_price, close_price in zip(
+                x[mask].tolist(), *data[[OPEN, HIGH, LOW, CLOSE]][:, mask].tolist()
+            ):
+                if high_price != low_price:
+                    lines.append(QtCore.QLineF(ix, low_price, ix, high_price))
+                if open_price == close_price:
+                    lines.append(QtCore.QLineF(ix - half, open_price, ix + half, open_price))
+                else:
+                    rects.append(QtCore.QRectF(ix - half, open_price, width, close_price - open_price))
+            if lines:
+                painter.drawLines(lines)
+            if rects:
+                painter.drawRects(rects)
+
+    def get_array_range(self, data: np.ndarray) -> Tuple[float, float]:
+        return float(data[LOW].min()), float(data[HIGH].max())
+
+
+class VolumeItem(ChartItem):
+    """成交量柱"""
+
+    def draw_bar(
+        self,
+        painter: QtGui.QPainter,
+        x: float,
+        scale: int,
+        values: Sequence[float]
+    ) -> None:
+        self.set_pen(painter, values[OPEN], values[CLOSE])
+        width = VOLUME_WIDTH * scale
+        painter.drawRect(QtCore.QRectF(x - width / 2, 0, width, values[VOLUME]))
+
+    def draw_bars(self, painter: QtGui.QPainter, x: np.ndarray, scale: int, data: np.ndarray) -> None:
+        """每种颜色的成交量柱用一次drawRects"""
+        width = VOLUME_WIDTH * scale
+        for pen, brush, mask in self.iter_colors(data):
+            rects = [
+                QtCore.QRectF(left, 0, width, volume)
+                for left, volume in zip((x[mask] - width / 2).tolist(), data[VOLUME, mask].tolist())
+            ]
+            if rects:
+                painter.setPen(pen)
+                painter.setBrush(brush)
+                painter.drawRects(rects)
+
+    def get_array_range(self, data: np.ndarray) -> Tuple[float, float]:
+        return 0.0, float(data[VOLUME].max())
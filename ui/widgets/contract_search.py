@@ -0,0 +1,166 @@
+"""
+合约搜索索引
+对合约代码、交易所、名称、合约类型及名称拼音首字母建立双字倒排索引，支持逐字输入时增量收窄
+"""
+
+import bisect
+from typing import Dict, Iterable, List, Optional, Set
+from vnpy.trader.object import ContractData
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+FIELD_SEPARATOR = "\x00"
+
+# GB2312一级汉字按拼音排序，每个声母对应的起始编码
+GB2312_INITIALS = [
+    (0xB0A1, "a"), (0xB0C5, "b"), (0xB2C1, "c"), (0xB4EE, "d"), (0xB6EA, "e"),
+    (0xB7A2, "f"), (0xB8C1, "g"), (0xB9FE, "h"), (0xBBF7, "j"), (0xBFA6, "k"),
+    (0xC0AC, "l"), (0xC2E8, "m"), (0xC4C3, "n"), (0xC5B6, "o"), (0xC5BE, "p"),
+    (0xC6DA, "q"), (0xC8BB, "r"), (0xC8F6, "s"), (0xCBFA, "t"), (0xCDDA, "w"),
+    (0xCEF4, "x"), (0xD1B9, "y"), (0xD4D1, "z"),
+]
+GB2312_CODES = [code for code, _ in GB2312_INITIALS]
+GB2312_LEVEL1_END = 0xD7F9
+
+INITIAL_CACHE: Dict[str, str] = {}
+
+
+def get_initials(text: str) -> str:
+    """获取拼音首字母，非汉字原样保留（小写）
+
+    安装了pypinyin时使用pypinyin，否则按GB2312一级汉字编码区间查表，二级汉字被忽略。
+    """
+    if lazy_pinyin:
+        return "".join(lazy_pinyin(text, style=Style.FIRST_LETTER)).lower()
+
+    initials = []
+    for char in text:
+        initial = INITIAL_CACHE.get(char)
+        if initial is None:
+            initial = INITIAL_CACHE[char] = get_char_initial(char)
+        initials.append(initial)
+    return "".join(initials)
+
+
+def get_char_initial(char: str) -> str:
+    """按GB2312编码区间查单个字符的声母，非一级汉字返回空字符串"""
+    if char.isascii():
+        return char.lower()
+    try:
+        data = char.encode("gb2312")
+    except UnicodeEncodeError:
+        return ""
+    code = data[0] << 8 | data[1]
+    if GB2312_CODES[0] <= code <= GB2312_LEVEL1_END:
+        return GB2312_INITIALS[bisect.bisect_right(GB2312_CODES, code) - 1][1]
+    return ""
+
+
+def get_search_text(contract: ContractData) -> str:
+    """拼接参与搜索的字段（vt_symbol已包含代码和交易所），字段之间用分隔符隔开"""
+    fields = [
+        contract.vt_symbol,
+        contract.name,
+        contract.product.value if contract.product else "",
+        get_initials(contract.name),
+    ]
+    return FIELD_SEPARATOR.join(fields).lower()
+
+
+def get_bigrams(text: str) -> Set[str]:
+    """双字片段，跨字段的片段含分隔符，查询中不会出现，保留也不影响结果"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class ContractSearchIndex:
+    """合约搜索索引
+
+    按行号索引，search返回匹配的行号集合，与合约表格模型的行号一致。
+    双字及以上的查询先用双字倒排表求交集得到候选行，单字查询直接扫描；
+    新的查询包含上一次的查询时，只在上一次的结果中继续筛选。
+    """
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.grams: Dict[str, Set[int]] = {}        # 双字片段 -> 行号集合
+
+        self.last_query: str = ""
+        self.last_result: Optional[Set[int]] = None
+
+    def set_contracts(self, contracts: Iterable[ContractData]) -> None:
+        """按行号顺序重建索引"""
+        self.texts = []
+        self.grams = {}
+        for row, contract in enumerate(contracts):
+            self.add(row, contract)
+
+    def add(self, row: int, contract: ContractData) -> None:
+        """添加或替换某一行的合约"""
+        text = get_search_text(contract)
+        grams = self.grams
+        if row < len(self.texts):
+            for gram in get_bigrams(self.texts[row]):
+                grams[gram].discard(row)
+            self.texts[row] = text
+        else:
+            self.texts.append(text)
+
+        for gram in get_bigrams(text):
+            rows = grams.get(gram)
+            if rows is None:
+                grams[gram] = {row}
+            else:
+                rows.add(row)
+
+        self.last_query = ""
+        self.last_result = None
+
+    def search(self, text: str) -> Optional[Set[int]]:
+        """查询包含text的合约行号，text为空时返回None表示不过滤"""
+        query = text.strip().lower()
+        if not query:
+            self.last_query = ""
+            self.last_result = None
+            return None
+
+        if self.last_result is not None and self.last_query in query:
+            if query == self.last_query:
+                return self.last_result
+            candidates = self.last_result
+            exact = False
+        else:
+            candidates = self.lookup(query)
+            exact = len(query) == 2     # 双字查询直接命中索引，无需再核对
+
+        if exact:
+            result = set(candidates)
+        else:
+            texts = self.texts
+            result = {row for row in candidates if query in texts[row]}
+
+        self.last_query = query
+        self.last_result = result
+        return result
+
+    def lookup(self, query: str) -> Set[int]:
+        """通过倒排索引取候选行（可能多于实际匹配）"""
+        if len(query) == 1:
+            return range(len(self.texts))
+
+        postings = []
+        for i in range(len(query) - 1):
+            rows = self.grams.get(query[i:i + 2])
+            if not rows:
+                return set()
+            postings.append(rows)
+
+        postings.sort(key=len)
+        result = set(postings[0])
+        for rows in postings[1:]:
+            result &= rows
+            if not result:
+                break
+        return result
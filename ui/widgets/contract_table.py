@@ -0,0 +1,166 @@
+"""
+合约表格模型
+全市场合约只保存ContractData列表，单元格文本在绘制时按需生成，订阅按钮由委托绘制
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+from PyQt5 import QtCore, QtGui, QtWidgets
+from vnpy.trader.object import ContractData
+
+CONTRACT_HEADERS = [
+    "合约代码", "代码", "交易所", "名称",
+    "合约类型", "合约乘数", "价格单位", "最小下单量",
+    "订阅"
+]
+COLUMN_SUBSCRIBE = 8
+
+BUTTON_TEXT = "订阅"
+BUTTON_COLOR = QtGui.QColor("#4CAF50")
+BUTTON_HOVER_COLOR = QtGui.QColor("#45a049")
+BUTTON_PRESSED_COLOR = QtGui.QColor("#3d8b40")
+BUTTON_MARGIN = 2
+
+
+def format_contract(contract: ContractData, column: int) -> str:
+    """生成单元格文本"""
+    if column == 0:
+        return contract.vt_symbol
+    if column == 1:
+        return contract.symbol
+    if column == 2:
+        return str(contract.exchange)
+    if column == 3:
+        return contract.name
+    if column == 4:
+        return str(contract.product)
+    if column == 5:
+        return str(contract.size)
+    if column == 6:
+        return str(contract.pricetick)
+    return str(contract.min_volume)
+
+
+class ContractTableModel(QtCore.QAbstractTableModel):
+    """合约表格模型
+
+    不为每个单元格创建对象，视图只对可见行调用data，加载开销与合约数量近似线性且很小。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.contracts: List[ContractData] = []
+        self.rows: Dict[str, int] = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.contracts)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(CONTRACT_HEADERS)
+
+    def headerData(self, section: int, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return CONTRACT_HEADERS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid() and index.column() < COLUMN_SUBSCRIBE:
+            return format_contract(self.contracts[index.row()], index.column())
+        return None
+
+    def set_contracts(self, contracts: Iterable[ContractData]) -> None:
+        """整体替换合约列表"""
+        self.beginResetModel()
+        self.contracts = list(contracts)
+        self.rows = {contract.vt_symbol: row for row, contract in enumerate(self.contracts)}
+        self.endResetModel()
+
+    def add_contract(self, contract: ContractData) -> int:
+        """添加或更新单个合约，返回所在行"""
+        row = self.rows.get(contract.vt_symbol)
+        if row is not None:
+            self.contracts[row] = contract
+            self.dataChanged.emit(self.index(row, 0), self.index(row, COLUMN_SUBSCRIBE - 1))
+            return row
+
+        row = len(self.contracts)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.contracts.append(contract)
+        self.rows[contract.vt_symbol] = row
+        self.endInsertRows()
+        return row
+
+    def get_contract(self, row: int) -> Optional[ContractData]:
+        """获取行对应的合约"""
+        if 0 <= row < len(self.contracts):
+            return self.contracts[row]
+        return None
+
+
+class ContractFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """合约筛选代理模型：只按搜索索引给出的行号集合过滤，不读取单元格文本"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows: Optional[Set[int]] = None
+
+    def set_rows(self, rows: Optional[Set[int]]) -> None:
+        """设置可见的源模型行号，None表示显示全部"""
+        if rows == self.rows:
+            return
+        self.rows = rows
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QtCore.QModelIndex) -> bool:
+        return self.rows is None or source_row in self.rows
+
+
+class SubscribeButtonDelegate(QtWidgets.QStyledItemDelegate):
+    """订阅按钮委托：绘制按钮外观并处理点击，不为每行创建控件"""
+
+    clicked = QtCore.pyqtSignal(QtCore.QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pressed_index = QtCore.QPersistentModelIndex()
+
+    def get_button_rect(self, option: QtWidgets.QStyleOptionViewItem) -> QtCore.QRect:
+        return option.rect.adjusted(BUTTON_MARGIN, BUTTON_MARGIN, -BUTTON_MARGIN, -BUTTON_MARGIN)
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex):
+        if QtCore.QPersistentModelIndex(index) == self.pressed_index:
+            color = BUTTON_PRESSED_COLOR
+        elif option.state & QtWidgets.QStyle.State_MouseOver:
+            color = BUTTON_HOVER_COLOR
+        else:
+            color = BUTTON_COLOR
+
+        painter.save()
+        painter.fillRect(self.get_button_rect(option), color)
+        painter.setPen(QtCore.Qt.white)
+        painter.drawText(option.rect, QtCore.Qt.AlignCenter, BUTTON_TEXT)
+        painter.restore()
+
+    def editorEvent(self, event: QtCore.QEvent, model, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> bool:
+        event_type = event.type()
+        if event_type == QtCore.QEvent.MouseButtonPress:
+            if event.button() == QtCore.Qt.LeftButton and self.get_button_rect(option).contains(event.pos()):
+                self.pressed_index = QtCore.QPersistentModelIndex(index)
+                return True
+        elif event_type == QtCore.QEvent.MouseButtonRelease:
+            pressed = self.pressed_index
+            self.pressed_index = QtCore.QPersistentModelIndex()
+            if (
+                pressed.isValid()
+                and QtCore.QPersistentModelIndex(index) == pressed
+                and self.get_button_rect(option).contains(event.pos())
+            ):
+                self.clicked.emit(index)
+                return True
+        elif event_type == QtCore.QEvent.MouseButtonDblClick:
+            # 按钮列的双击不传给视图
+            return True
+        return False
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 
 from PyQt5 import QtWidgets, QtCore, QtGui
@@ -9,9 +9,23 @@ from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import MainEngine
 from vnpy.trader.object import BarData, TickData, HistoryRequest, ContractData
 from vnpy.trader.constant import Interval, Direction, Exchange
-from vnpy.trader.utility import BarGenerator
 from vnpy.trader.event import EVENT_TICK
 from config.log_manager import log_manager
+from ui.widgets.refresh_scheduler import refresh_scheduler
+from ui.widgets.chart_items import CandleItem, VolumeItem
+from ui.widgets.chart_buffer import ArrayBuffer, BarBuffer, CLOSE, VOLUME
+from ui.widgets.bar_cache import bar_cache, CHART_TIMEFRAMES, HISTORY_DAYS, MINUTE, TICK
+from ui.widgets.chart_indicators import ChartIndicators, MAIN_PANE, MACD_PANE
+
+VISIBLE_BARS = 100      # 跟随最新K线时显示的K线数量
+MAX_POINTS = 10000      # 分时价格曲线最多保留的点数
+
+# 各周期时间轴和十字光标的时间格式
+DATETIME_FORMATS: Dict[str, str] = {
+    TICK: "%H:%M:%S",
+    "d": "%Y-%m-%d",
+}
+DEFAULT_DATETIME_FORMAT = "%m-%d %H:%M"
 
 # 设置pyqtgraph的全局样式
 pg.setConfigOptions(
@@ -26,6 +40,9 @@ class CustomAxisItem(pg.AxisItem):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setStyle(tickFont=QtGui.QFont("Arial", 8))
+        # 时间轴按K线序号显示时间时设置，返回序号对应的时间
+        self.get_datetime: Optional[Callable[[int], Optional[datetime]]] = None
+        self.datetime_format: str = "%H:%M:%S"
         
     def tickStrings(self, values, scale, spacing):
         """重写刻度字符串格式化方法"""
@@ -33,6 +50,12 @@ class CustomAxisItem(pg.AxisItem):
             # 价格轴显示两位小数
             return [f"{value:.2f}" for value in values]
         elif self.orientation == "bottom":
+            if self.get_datetime:
+                strings = []
+                for value in values:
+                    dt = self.get_datetime(int(round(value)))
+                    strings.append(dt.strftime(self.datetime_format) if dt else "")
+                return strings
             try:
                 # 时间轴显示时分秒
                 return [datetime.fromtimestamp(value).strftime("%H:%M:%S") if value > 0 else "" for value in values]
@@ -66,8 +89,9 @@ class FuturesChart(QtWidgets.QWidget):
             # 添加活动状态标志
             self.is_active = True
             
-            # 初始化数据
-            self.bars: List[BarData] = []
+            # 初始化数据，K线缓冲区由K线缓存按周期提供，多个图表共享
+            self.timeframe: str = MINUTE
+            self.buffer: BarBuffer = bar_cache.get_buffer(contract.vt_symbol, self.timeframe)
             self.ticks: List[TickData] = []
             self.vt_symbol = contract.vt_symbol
             
@@ -75,19 +99,8 @@ class FuturesChart(QtWidgets.QWidget):
             print("连接信号...", flush=True)
             self.signal_tick.connect(self._process_tick_event)
             
-            # 创建K线生成器
-            print("创建K线生成器...", flush=True)
-            self.bg = BarGenerator(
-                on_bar=self.on_bar,
-                window=1,
-                on_window_bar=None,  # 移除window_bar回调
-                interval=Interval.MINUTE  # 使用分钟K线
-            )
-            
-            # 设置K线更新间隔（秒）
-            self.update_interval = 5  # 5秒一根K线
-            self.last_tick_time = None
-            self.current_bar = None  # 用于存储当前正在更新的K线
+            # 1分钟K线由K线缓存用行情合成，关闭图表后继续更新
+            bar_cache.watch(self.vt_symbol, event_engine)
             
             # 初始化价格数据列表
             self.prices = []
@@ -101,10 +114,14 @@ class FuturesChart(QtWidgets.QWidget):
             print("注册事件监听...", flush=True)
             self.register_event()
             
+            # tick只标记需要重绘，由刷新调度器每帧合并重绘一次
+            refresh_scheduler.register(self.update_chart)
+            
             print("初始化完成，准备加载历史数据...", flush=True)
             
-            # 延迟加载历史数据
-            QtCore.QTimer.singleShot(100, self.load_history)  # 增加延迟到100ms
+            # 延迟加载历史数据，缓存中已有时直接绘制
+            delay = 0 if bar_cache.is_loaded(self.vt_symbol) else 100
+            QtCore.QTimer.singleShot(delay, self.load_history)
             
             # 添加数据缓存标志
             self.need_update = False
@@ -174,13 +191,50 @@ class FuturesChart(QtWidgets.QWidget):
         self.volume_plot.getAxis('left').setPen((255, 255, 255, 30))
         self.volume_plot.getAxis('bottom').setPen((255, 255, 255, 30))
         
+        # 创建MACD副图
+        self.macd_plot = self.canvas.addPlot(
+            row=2, col=0,
+            axisItems={
+                'bottom': CustomAxisItem(orientation='bottom'),
+                'left': CustomAxisItem(orientation='left')
+            }
+        )
+        
         # 设置图表比例
         self.canvas.ci.layout.setRowStretchFactor(0, 4)  # K线图占4份
         self.canvas.ci.layout.setRowStretchFactor(1, 1)  # 成交量图占1份
+        self.canvas.ci.layout.setRowStretchFactor(2, 1)  # MACD副图占1份
         self.canvas.ci.layout.setSpacing(0)  # 减小图表间距
         
         # 关联X轴
         self.volume_plot.setXLink(self.kline_plot)
+        self.macd_plot.setXLink(self.kline_plot)
+        
+        # K线和成交量图形项只创建一次，之后增量更新
+        self.candle_item = CandleItem()
+        self.volume_item = VolumeItem()
+        self.kline_plot.addItem(self.candle_item)
+        self.volume_plot.addItem(self.volume_item)
+        
+        # Tick周期显示价格曲线，按可见范围抽稀
+        self.tick_curve = pg.PlotDataItem(pen=pg.mkPen('w', width=1))
+        self.tick_curve.hide()
+        self.kline_plot.addItem(self.tick_curve)
+        # addItem会用PlotItem自身的设置覆盖抽稀选项，需要在添加之后设置
+        self.tick_curve.setDownsampling(auto=True, method="peak")
+        self.tick_curve.setClipToView(True)
+        self.drawn_count = 0    # 上次绘制时的K线数量
+        self.drawn_dropped = 0  # 上次绘制时缓冲区累计丢弃的K线数量
+        
+        # 技术指标：均线和布林带叠加在K线图上，MACD在副图，历史部分在后台线程计算
+        self.indicators = ChartIndicators({MAIN_PANE: self.kline_plot, MACD_PANE: self.macd_plot})
+        self.indicators.signal_updated.connect(self.update_y_range)
+        
+        # Y轴随可见区间内的K线调整
+        for plot in [self.kline_plot, self.volume_plot, self.macd_plot]:
+            plot.enableAutoRange(x=False, y=False)
+            plot.getAxis('bottom').get_datetime = self.get_bar_datetime
+        self.kline_plot.sigXRangeChanged.connect(self.update_y_range)
         
         # 添加十字光标
         self.vLine = pg.InfiniteLine(
@@ -227,7 +281,7 @@ class FuturesChart(QtWidgets.QWidget):
         )
         
         # 设置坐标样式
-        for plot in [self.kline_plot, self.volume_plot]:
+        for plot in [self.kline_plot, self.volume_plot, self.macd_plot]:
             # 设置左轴样式
             left_axis = plot.getAxis('left')
             left_axis.setStyle(tickFont=QtGui.QFont("Arial", 10))
@@ -244,38 +298,39 @@ class FuturesChart(QtWidgets.QWidget):
             plot.showGrid(True, True, alpha=0.2)
         
     def load_history(self) -> None:
-        """加载历史数据"""
+        """加载历史数据，每个合约只在第一次打开图表时查询，之后直接使用K线缓存"""
         try:
-            print(f"开始加载历史数据：{self.vt_symbol}")
-            
-            end = datetime.now()
-            start = end - timedelta(days=3)  # 加载3天数据
-            
-            req = HistoryRequest(
-                symbol=self.contract.symbol,
-                exchange=self.contract.exchange,
-                start=start,
-                end=end,
-                interval=Interval.MINUTE
-            )
-            
-            print(f"查询历史数据：{start} - {end}")
-            history = self.main_engine.query_history(req, self.contract.gateway_name)
+            if not bar_cache.is_loaded(self.vt_symbol):
+                print(f"开始加载历史数据：{self.vt_symbol}")
+                count = bar_cache.load_history(self.vt_symbol, self.query_history)
+                if count:
+                    print(f"获取到历史数据：{count} 条")
+                else:
+                    print("未获取到历史数据，等待实时数据...")
             
-            if history:
-                print(f"获取到历史数据：{len(history)} 条")
-                self.bars = history  # 直接赋值，而不是extend
-                self.update_chart()
-            else:
-                print("未获取到历史数据，等待实时数据...")
-                # 不再生成测试数据，而是等待实时数据
-                self.bars = []
+            self.update_chart()
                 
         except Exception as e:
             print(f"加载历史数据失败：{str(e)}")
             import traceback
             print(f"错误详情：{traceback.format_exc()}")
 
+    def query_history(self) -> Optional[List[BarData]]:
+        """查询1分钟历史K线"""
+        end = datetime.now()
+        start = end - timedelta(days=HISTORY_DAYS)
+        
+        req = HistoryRequest(
+            symbol=self.contract.symbol,
+            exchange=self.contract.exchange,
+            start=start,
+            end=end,
+            interval=Interval.MINUTE
+        )
+        
+        print(f"查询历史数据：{start} - {end}")
+        return self.main_engine.query_history(req, self.contract.gateway_name)
+
     def generate_test_data(self) -> None:
         """生成测试数据"""
         print("生成测试数据")
@@ -296,6 +351,7 @@ class FuturesChart(QtWidgets.QWidget):
         
         print(f"使用基准价格：{base_price}")
         price = base_price  # 起始价格
+        bars = []
         
         for i in range(100):  # 生成100条数据
             time = current_time - timedelta(minutes=i)
@@ -329,172 +385,113 @@ class FuturesChart(QtWidgets.QWidget):
                 gateway_name=self.contract.gateway_name
             )
             
-            self.bars.append(bar)
+            bars.append(bar)
             price = close
         
         # 反转数据列表，使时间正序
-        self.bars.reverse()
+        bars.reverse()
+        bar_cache.get_buffer(self.vt_symbol, MINUTE).set_bars(bars)
         
-        print(f"生成测试数据完成：{len(self.bars)} 条")
+        print(f"生成测试数据完成：{len(bars)} 条")
         self.update_chart()
         
     def update_chart(self) -> None:
-        """更新图表"""
+        """更新图表：已完成的K线使用缓存，只重绘最后一根"""
         try:
-            if not self.bars:
+            # 高周期K线在取缓冲区时与1分钟K线同步；切换周期后缓冲区变化，重新跟随最新K线
+            buffer = bar_cache.get_buffer(self.vt_symbol, self.timeframe)
+            if buffer is not self.buffer:
+                self.buffer = buffer
+                self.drawn_count = 0
+                self.drawn_dropped = buffer.dropped
+            
+            self.candle_item.update_bars(self.buffer)
+            self.volume_item.update_bars(self.buffer)
+            count = len(self.buffer)
+            if self.timeframe == TICK:
+                self.tick_curve.setData(np.arange(count), self.buffer.view()[CLOSE])
+                self.indicators.clear()
+            else:
+                self.indicators.update(self.buffer)
+            if not count:
                 return
             
-            print(f"\n开始更新图表，当前K线数量: {len(self.bars)}")
-            
-            # 清除现有图形
-            self.kline_plot.clear()
-            self.volume_plot.clear()
-            
-            # 准备数据
-            x = np.arange(len(self.bars))
-            open_prices = np.array([bar.open_price for bar in self.bars])
-            high_prices = np.array([bar.high_price for bar in self.bars])
-            low_prices = np.array([bar.low_price for bar in self.bars])
-            close_prices = np.array([bar.close_price for bar in self.bars])
-            volumes = np.array([bar.volume for bar in self.bars])
-            
-            # 计算合适的价格和成交量刻度
-            price_range = high_prices.max() - low_prices.min()
-            price_tick = self.contract.pricetick
-            price_step = max(price_tick * 10, price_range / 10)  # 确保至少显示10个刻度
-            
-            volume_max = volumes.max()
-            volume_step = volume_max / 5  # 显示5个成交量刻度
-            
-            # 设置Y轴刻度
-            self.kline_plot.getAxis('left').setTickSpacing(price_step, price_step/2)
-            self.volume_plot.getAxis('left').setTickSpacing(volume_step, volume_step/2)
-            
-            # 绘制K线和成交量
-            rise = close_prices >= open_prices
-            fall = ~rise
-            
-            if np.any(rise):
-                self._draw_candle(x[rise], open_prices[rise], high_prices[rise], 
-                                low_prices[rise], close_prices[rise], 'r')
-            if np.any(fall):
-                self._draw_candle(x[fall], open_prices[fall], high_prices[fall], 
-                                low_prices[fall], close_prices[fall], 'g')
-            
-            self._draw_volume(x, volumes, rise)
-            
-            # 更新显示范围
-            visible_range = (max(0, len(self.bars)-100), len(self.bars))
-            self.kline_plot.setXRange(*visible_range)
-            self.volume_plot.setXRange(*visible_range)
-            
-            # 更新时间轴
-            times = [bar.datetime.strftime('%H:%M:%S') for bar in self.bars]
-            xdict = dict(enumerate(times))
-            axis_ticks = [(i, xdict[i]) for i in range(len(times)) if i % 5 == 0]  # 每5个显示一个时间
-            self.kline_plot.getAxis('bottom').setTicks([axis_ticks])
-            self.volume_plot.getAxis('bottom').setTicks([axis_ticks])
-
-            # 设置时间刻度
-            self.kline_plot.getAxis('bottom').setTickFont(QtGui.QFont("Arial", 10))
-            self.volume_plot.getAxis('bottom').setTickFont(QtGui.QFont("Arial", 10))
+            # 之前显示到最新一根K线时，继续跟随最新K线
+            left, right = self.kline_plot.viewRange()[0]
+            follow = not self.drawn_count or right >= self.drawn_count - 1
             
-            # 设置时间轴标签
-            self.kline_plot.getAxis('bottom').setLabel(text='时间', font=QtGui.QFont("Arial", 10))
-            self.volume_plot.getAxis('bottom').setLabel(text='时间', font=QtGui.QFont("Arial", 10))
+            # 缓冲区丢弃旧K线后序号整体前移，查看历史时视图随之平移
+            shift = self.buffer.dropped - self.drawn_dropped
             
-            # # 设置时间轴标签颜色
-            # self.kline_plot.getAxis('bottom').setLabelPen(pg.mkPen('white', width=1))
-            # self.volume_plot.getAxis('bottom').setLabelPen(pg.mkPen('white', width=1))
-            
-            # 设置时间轴标签位置
-            # self.kline_plot.getAxis('bottom').setLabelOffset(10)
-            # self.volume_plot.getAxis('bottom').setLabelOffset(10)
-            
-            # 设置时间轴标签对齐方式
-            # self.kline_plot.getAxis('bottom').setLabelAlignment(QtCore.Qt.AlignLeft)
-            # self.volume_plot.getAxis('bottom').setLabelAlignment(QtCore.Qt.AlignLeft)
-            
-            print("图表更新完成\n")
+            if follow and count != self.drawn_count:
+                self.kline_plot.setXRange(max(0, count - VISIBLE_BARS) - 0.5, count - 0.5, padding=0)
+            elif shift:
+                self.kline_plot.setXRange(left - shift, right - shift, padding=0)
+            else:
+                self.update_y_range()
+            self.drawn_count = count
+            self.drawn_dropped = self.buffer.dropped
             
         except Exception as e:
             print(f"更新图表失败：{str(e)}")
 
-    def _draw_candle(self, x, open, high, low, close, color) -> None:
-        """绘制K线"""
-        try:
-            # 设置K线宽度
-            width = 0.4  # K线宽度
-            
-            # 设置画笔和画刷颜色
-            if color == 'r':  # 红色
-                pen = pg.mkPen('r', width=1)
-                brush = pg.mkBrush('r')
-            else:  # 绿色
-                pen = pg.mkPen('g', width=1)
-                brush = pg.mkBrush('g')  # 改为绿色填充
-            
-            # 绘制K线实体
-            for i, (x_, o, h, l, c) in enumerate(zip(x, open, high, low, close)):
-                # 绘制上下影线
-                self.kline_plot.plot(
-                    [x_, x_],
-                    [l, h],
-                    pen=pen
-                )
-                
-                # 创建K线实体
-                rect = QtWidgets.QGraphicsRectItem(
-                    x_ - width/2,  # 左边界
-                    min(o, c),     # 下边界
-                    width,         # 宽度
-                    abs(o - c)     # 高度
-                )
-                
-                # 设置画笔和画刷
-                rect.setPen(pen)
-                rect.setBrush(brush)  # 直接使用对应颜色的画刷
-                
-                # 添加到图表
-                self.kline_plot.addItem(rect)
-                
-        except Exception as e:
-            print(f"绘制K线失败：{str(e)}")
-            import traceback
-            print(f"错误详情：{traceback.format_exc()}")
+    def update_y_range(self) -> None:
+        """按可见区间内K线的最高最低价设置Y轴范围"""
+        x_min, x_max = self.kline_plot.viewRange()[0]
+        start, end = int(x_min + 0.5), int(x_max + 0.5) + 1
+        
+        # 均线和布林带超出K线范围时一并显示
+        ranges = [
+            self.candle_item.get_y_range(start, end),
+            self.indicators.get_y_range(MAIN_PANE, start, end)
+        ]
+        ranges = [r for r in ranges if r]
+        if ranges:
+            low = min(r[0] for r in ranges)
+            high = max(r[1] for r in ranges)
+            margin = (high - low) * 0.05 or self.contract.pricetick
+            self.kline_plot.setYRange(low - margin, high + margin, padding=0)
+        
+        volume_range = self.volume_item.get_y_range(start, end)
+        if volume_range:
+            self.volume_plot.setYRange(0, volume_range[1] * 1.05 or 1, padding=0)
+        
+        macd_range = self.indicators.get_y_range(MACD_PANE, start, end)
+        if macd_range:
+            low, high = macd_range
+            margin = (high - low) * 0.05 or self.contract.pricetick
+            self.macd_plot.setYRange(low - margin, high + margin, padding=0)
 
-    def _draw_volume(self, x, volume, rise):
-        """绘制成交量"""
-        try:
-            # 设置成交量柱状图宽度
-            width = 0.6
-            
-            # 计算下跌标记
-            fall = ~rise  # 添加这行来定义 fall
-            
-            # 分别绘制上涨和下跌的成交量柱
-            volume_rise = pg.BarGraphItem(
-                x=x[rise],
-                height=volume[rise],
-                width=width,
-                brush='r',
-                pen=pg.mkPen('r', width=0.5)
-            )
-            volume_fall = pg.BarGraphItem(
-                x=x[fall],
-                height=volume[fall],
-                width=width,
-                brush='g',
-                pen=pg.mkPen('g', width=0.5)
-            )
-            
-            self.volume_plot.addItem(volume_rise)
-            self.volume_plot.addItem(volume_fall)
-            
-        except Exception as e:
-            print(f"绘制成交量���败：{str(e)}")
-            import traceback
-            print(f"错误详情：{traceback.format_exc()}")
+    def get_bar_datetime(self, ix: int) -> Optional[datetime]:
+        """时间轴使用：当前周期K线序号对应的时间"""
+        return self.buffer.get_datetime(ix)
+
+    def set_timeframe(self, timeframe: str) -> None:
+        """切换周期，数据直接取自K线缓存，不查询历史"""
+        if timeframe == self.timeframe or timeframe not in CHART_TIMEFRAMES:
+            return
+        self.timeframe = timeframe
+        
+        # Tick周期用价格曲线代替K线
+        tick_mode = timeframe == TICK
+        self.candle_item.setVisible(not tick_mode)
+        self.tick_curve.setVisible(tick_mode)
+        if not tick_mode:
+            self.tick_curve.clear()
+        
+        datetime_format = DATETIME_FORMATS.get(timeframe, DEFAULT_DATETIME_FORMAT)
+        for plot in [self.kline_plot, self.volume_plot, self.macd_plot]:
+            plot.getAxis('bottom').datetime_format = datetime_format
+        
+        self.update_chart()
+
+    def set_indicator_visible(self, name: str, visible: bool) -> None:
+        """显示或隐藏技术指标（MA、BOLL、MACD），隐藏MACD时同时隐藏副图"""
+        self.indicators.set_enabled(name, visible)
+        if name == "MACD":
+            self.macd_plot.setVisible(visible)
+            self.canvas.ci.layout.setRowStretchFactor(2, 1 if visible else 0)
+        self.update_y_range()
 
     def mouse_moved(self, evt):
         """处理鼠标移动事件"""
@@ -505,36 +502,46 @@ class FuturesChart(QtWidgets.QWidget):
                 mouse_point = self.kline_plot.vb.mapSceneToView(pos)
                 index = int(mouse_point.x())
                 
-                if 0 <= index < len(self.bars):
-                    bar = self.bars[index]
+                if 0 <= index < len(self.buffer):
+                    data = self.buffer.data
+                    open_price, high_price, low_price, close_price, volume = data[:VOLUME + 1, index].tolist()
                     
                     # 更新十字光标
                     self.vLine.setPos(mouse_point.x())
                     self.hLine.setPos(mouse_point.y())
                     
                     # 计算涨跌幅
-                    pre_close = self.bars[index-1].close_price if index > 0 else bar.open_price
-                    change = bar.close_price - pre_close
+                    pre_close = data[CLOSE, index - 1] if index > 0 else open_price
+                    change = close_price - pre_close
                     change_percent = (change / pre_close * 100) if pre_close != 0 else 0
                     
+                    # 指标读数按序号直接读取已计算的值
+                    indicator_html = "".join(
+                        f"<span style='color:rgb{color}'>{label}：{value:.2f}</span><br>"
+                        for label, value, color in self.indicators.get_readouts(index)
+                    )
+                    
                     # 更新标签
                     self.label.setHtml(
                         f"""
                         <div style='background-color:rgba(17, 17, 17, 0.8);color:white;padding:5px;border:1px solid gray'>
                             <div style='color:white;font-weight:bold'>
-                                时间：{bar.datetime.strftime("%H:%M:%S")}
+                                时间：{self.buffer.get_datetime(index).strftime(self.kline_plot.getAxis('bottom').datetime_format)}
                             </div>
-                            <div style='color:{"red" if bar.close_price >= bar.open_price else "green"}'>
-                                开盘：{bar.open_price:.2f}<br>
-                                最高：{bar.high_price:.2f}<br>
-                                最低：{bar.low_price:.2f}<br>
-                                收盘：{bar.close_price:.2f}
+                            <div style='color:{"red" if close_price >= open_price else "green"}'>
+                                开盘：{open_price:.2f}<br>
+                                最高：{high_price:.2f}<br>
+                                最低：{low_price:.2f}<br>
+                                收盘：{close_price:.2f}
                             </div>
                             <div style='color:{"red" if change >= 0 else "green"}'>
                                 涨跌：{change:+.2f} ({change_percent:+.2f}%)
                             </div>
                             <div style='color:white'>
-                                成交量：{bar.volume}
+                                成交量：{volume:g}
+                            </div>
+                            <div>
+                                {indicator_html}
                             </div>
                         </div>
                         """
@@ -571,106 +578,20 @@ class FuturesChart(QtWidgets.QWidget):
         self.event_engine.register(EVENT_TICK + self.vt_symbol, self.signal_tick.emit)
 
     def _process_tick_event(self, event: Event) -> None:
-        """处理TICK事件"""
+        """处理TICK事件：K线由K线缓存合成，这里只标记需要重绘"""
         try:
             if not self.is_active:
                 return
             
             tick = event.data
             if tick.vt_symbol == self.vt_symbol:
-                print(f"收到TICK数据: {tick.vt_symbol}, 最新价: {tick.last_price}, 时间: {tick.datetime}")
-                
-                current_time = tick.datetime
-                
-                # 如果是第一个tick或者已经过了更新间隔
-                if (not self.last_tick_time or 
-                    (current_time - self.last_tick_time).total_seconds() >= self.update_interval):
-                    
-                    # 创建新的K线
-                    self.current_bar = BarData(
-                        symbol=tick.symbol,
-                        exchange=tick.exchange,
-                        datetime=current_time.replace(microsecond=0),
-                        interval=Interval.MINUTE,  # 仍然使用分钟级别
-                        volume=tick.volume,
-                        turnover=tick.turnover,
-                        open_price=tick.last_price,
-                        high_price=tick.last_price,
-                        low_price=tick.last_price,
-                        close_price=tick.last_price,
-                        gateway_name=tick.gateway_name
-                    )
-                    
-                    if not self.bars:
-                        print(f"创建第一根K线: {self.current_bar.datetime}, 开:{self.current_bar.open_price}")
-                    else:
-                        print(f"创建新K线: {self.current_bar.datetime}, 开:{self.current_bar.open_price}")
-                    
-                    self.bars.append(self.current_bar)
-                    self.last_tick_time = current_time
-                    
-                    # 保持最近100根K线
-                    if len(self.bars) > 100:
-                        self.bars = self.bars[-100:]
-                    
-                    # 更新图表
-                    self.update_chart()
-                else:
-                    # 更新当前K线
-                    if self.current_bar:
-                        self.current_bar.high_price = max(self.current_bar.high_price, tick.last_price)
-                        self.current_bar.low_price = min(self.current_bar.low_price, tick.last_price)
-                        self.current_bar.close_price = tick.last_price
-                        self.current_bar.volume = tick.volume
-                        self.current_bar.turnover = tick.turnover
-                        
-                        print(f"更新K线: {self.current_bar.datetime}, 高:{self.current_bar.high_price}, 低:{self.current_bar.low_price}, 收:{self.current_bar.close_price}")
-                        self.update_chart()
+                refresh_scheduler.mark_dirty(self.update_chart)
             
         except Exception as e:
             print(f"处理TICK事件失败：{str(e)}")
             import traceback
             print(f"错误详情：{traceback.format_exc()}")
 
-    def on_bar(self, bar: BarData) -> None:
-        """K线更新回调"""
-        try:
-            print(f"收到K线更新: {bar.datetime}, 开:{bar.open_price}, 高:{bar.high_price}, 低:{bar.low_price}, 收:{bar.close_price}")
-            
-            # 更新最新一根K线或添加新K线
-            if self.bars and bar.datetime == self.bars[-1].datetime:
-                print(f"更新最新一根K线: {bar.datetime}")
-                self.bars[-1] = bar
-            else:
-                print(f"添加新K线: {bar.datetime}")
-                self.bars.append(bar)
-                # 保持最近1000根K线
-                if len(self.bars) > 1000:
-                    self.bars = self.bars[-1000:]
-            
-            # 立即更新图表
-            QtCore.QTimer.singleShot(0, self.update_chart)
-            
-        except Exception as e:
-            print(f"K线更新失败：{str(e)}")
-            import traceback
-            print(f"错误详情：{traceback.format_exc()}")
-
-    def on_window_bar(self, bar: BarData) -> None:
-        """K线周期更新回调"""
-        try:
-            # 更新最新一根K线
-            if self.bars and bar.datetime == self.bars[-1].datetime:
-                self.bars[-1] = bar
-            else:
-                self.bars.append(bar)
-            
-            # 使用 QTimer 延迟更新图表
-            QtCore.QTimer.singleShot(0, self.update_chart)
-            
-        except Exception as e:
-            print(f"K线周期更新失败：{str(e)}")
-
     def closeEvent(self, event) -> None:
         """关闭窗口事件"""
         try:
@@ -679,10 +600,13 @@ class FuturesChart(QtWidgets.QWidget):
             
             # 停止更新
             self.is_active = False
+            refresh_scheduler.unregister(self.update_chart)
+            self.indicators.clear()
             
             # 清除图项
             self.kline_plot.clear()
             self.volume_plot.clear()
+            self.macd_plot.clear()
             
             # 移除十字光标
             if hasattr(self, 'vLine'):
@@ -700,8 +624,7 @@ class FuturesChart(QtWidgets.QWidget):
             # 取消事件注册
             self.event_engine.unregister(EVENT_TICK + self.vt_symbol, self.signal_tick.emit)
             
-            # 清理数据
-            self.bars = []
+            # 清理数据，K线缓冲区属于K线缓存，留给之后打开的图表使用
             self.ticks = []
             
             # 强制清理内存
@@ -811,10 +734,24 @@ class FuturesChartWindow(QtWidgets.QMainWindow):
         # 添加周期选择
         period_label = QtWidgets.QLabel("周期：")
         period_combo = QtWidgets.QComboBox()
-        period_combo.addItems(["1分钟", "5分钟", "15分钟", "30分钟", "1小时", "日线"])
+        for timeframe, name in CHART_TIMEFRAMES.items():
+            period_combo.addItem(name, timeframe)
+        period_combo.setCurrentIndex(period_combo.findData(self.chart.timeframe))
+        period_combo.currentIndexChanged.connect(
+            lambda index: self.chart.set_timeframe(period_combo.itemData(index))
+        )
         info_layout.addWidget(period_label)
         info_layout.addWidget(period_combo)
         
+        # 添加指标开关
+        for name in ["MA", "BOLL", "MACD"]:
+            check_box = QtWidgets.QCheckBox(name)
+            check_box.setChecked(True)
+            check_box.toggled.connect(
+                lambda checked, name=name: self.chart.set_indicator_visible(name, checked)
+            )
+            info_layout.addWidget(check_box)
+        
         info_layout.addStretch()
         info_group.setLayout(info_layout)
         main_layout.addWidget(info_group)
@@ -844,17 +781,24 @@ class FuturesChartWindow(QtWidgets.QMainWindow):
         status_bar.addPermanentWidget(self.volume_label)
         status_bar.addPermanentWidget(self.open_interest_label)
         
-        # 注册TICK事件，用更新状态栏
+        # 注册TICK事件，事件线程只保存最新tick，状态栏由刷新调度器在GUI线程每帧更新一次
+        self.status_tick: TickData = None
+        refresh_scheduler.register(self.update_status_bar)
         self.event_engine.register(
             EVENT_TICK + self.contract.vt_symbol, 
-            self.update_status_bar
+            self.process_status_tick
         )
 
-    def update_status_bar(self, event: Event) -> None:
+    def process_status_tick(self, event: Event) -> None:
+        """保存最新tick并标记状态栏需要刷新"""
+        self.status_tick = event.data
+        refresh_scheduler.mark_dirty(self.update_status_bar)
+
+    def update_status_bar(self) -> None:
         """更新状态栏"""
         try:
-            tick = event.data
-            if tick.vt_symbol == self.contract.vt_symbol:
+            tick = self.status_tick
+            if tick and tick.vt_symbol == self.contract.vt_symbol:
                 self.price_label.setText(f"最新价：{tick.last_price:.2f}")
                 
                 # 计算涨跌
@@ -878,61 +822,45 @@ class FuturesChartWindow(QtWidgets.QMainWindow):
         except Exception as e:
             print(f"更新状态栏失败：{str(e)}")
 
+    def closeEvent(self, event) -> None:
+        """关闭窗口事件"""
+        self.event_engine.unregister(EVENT_TICK + self.contract.vt_symbol, self.process_status_tick)
+        refresh_scheduler.unregister(self.update_status_bar)
+        self.chart.close()
+        super().closeEvent(event)
+
     def update_chart(self, tick: TickData) -> None:
         """更新图表数据"""
         try:
-            # 更新最新价格
-            self.prices.append(tick.last_price)
-            self.times.append(tick.datetime)
-            
-            # 保持固定数量的数据点
-            if len(self.prices) > self.max_points:
-                self.prices = self.prices[-self.max_points:]
-                self.times = self.times[-self.max_points:]
-            
-            # 清除旧数据
-            self.price_curve.clear()
-            
-            # 设置X轴为时间
-            timestamps = [t.timestamp() for t in self.times]
-            self.plot_widget.getAxis('bottom').setTicks([
-                [
-                    (idx, t.strftime('%H:%M:%S')) 
-                    for idx, t in zip(timestamps, self.times)
-                ]
-            ])
-            
-            # 绘制价格曲线
-            self.price_curve.setData(
-                x=timestamps,
-                y=self.prices,
-                pen=self.price_pen
-            )
+            # 更新最新价格，超过MAX_POINTS时缓冲区自动丢弃最旧的点
+            self.price_buffer.append((tick.datetime.timestamp(), tick.last_price))
+            timestamps, prices = self.price_buffer.view()
+            
+            # 绘制价格曲线，直接使用缓冲区的数组视图，时间刻度由DateAxisItem按需生成
+            self.price_curve.setData(x=timestamps, y=prices)
             
             # 自动调整Y轴范围
-            if self.prices:
-                min_price = min(self.prices)
-                max_price = max(self.prices)
-                price_range = max_price - min_price
-                
-                # 设置一定的边距
-                margin = price_range * 0.1 if price_range > 0 else 0.1
-                self.plot_widget.setYRange(
-                    min_price - margin,
-                    max_price + margin
-                )
+            min_price = prices.min()
+            max_price = prices.max()
+            price_range = max_price - min_price
+            
+            # 设置一定的边距
+            margin = price_range * 0.1 if price_range > 0 else 0.1
+            self.plot_widget.setYRange(
+                min_price - margin,
+                max_price + margin
+            )
             
             # 更新最新价格标签
-            if self.prices:
-                self.price_label.setText(f"最新价：{self.prices[-1]:.2f}")
+            self.price_label.setText(f"最新价：{prices[-1]:.2f}")
             
         except Exception as e:
             print(f"更新图表失败：{str(e)}")
 
     def init_chart(self) -> None:
         """初始化图表"""
-        # 创建绘图窗口
-        self.plot_widget = pg.PlotWidget()
+        # 创建绘图窗口，X轴为时间戳
+        self.plot_widget = pg.PlotWidget(axisItems={'bottom': pg.DateAxisItem()})
         self.plot_widget.showGrid(True, True)
         self.plot_widget.setBackground('w')
         
@@ -955,7 +883,13 @@ class FuturesChartWindow(QtWidgets.QMainWindow):
             pen=self.price_pen,
             name="价格"
         )
+        # 价格序列：时间戳和最新价两行
+        self.price_buffer = ArrayBuffer(2, MAX_POINTS)
         
+        # 按可见范围抽稀：只处理可见区间，每个像素列保留最高和最低点
+        self.price_curve.setDownsampling(auto=True, method="peak")
+        self.price_curve.setClipToView(True)
+
         # 创建最新价格标签
         self.price_label = QtWidgets.QLabel()
         self.price_label.setStyleSheet("""
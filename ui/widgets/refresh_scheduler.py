@@ -0,0 +1,129 @@
+"""
+界面刷新调度器
+行情驱动的控件收到事件时只标记脏，由调度器按固定帧率每帧合并执行一次刷新
+"""
+
+from threading import Lock
+from typing import Any, Callable, Dict, List, Set
+import time
+from PyQt5 import QtCore
+from config.log_manager import log_manager
+
+DEFAULT_FPS = 20
+MIN_FPS = 10
+MAX_FPS = 30
+
+
+class RefreshScheduler(QtCore.QObject):
+    """帧率上限刷新调度器
+
+    mark_dirty可以在任意线程调用，只把回调加入脏集合；GUI线程的定时器每帧取出脏集合，
+    每个回调最多执行一次。同一帧内重复标记的次数计为合并次数，单帧执行超过帧间隔时
+    被挤掉的帧计为丢帧次数。
+    """
+
+    def __init__(self, fps: int = DEFAULT_FPS):
+        super().__init__()
+        self.fps: int = DEFAULT_FPS
+        self.interval: float = 1 / DEFAULT_FPS
+        self.timer: QtCore.QTimer = None
+
+        self.callbacks: Set[Callable[[], Any]] = set()
+        self.dirty: Dict[Callable[[], Any], None] = {}     # 按标记顺序保存
+        self.lock = Lock()
+
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "coalesced": 0,
+            "frames": 0,
+            "refreshes": 0,
+            "dropped": 0,
+            "errors": 0,
+            "last_frame_time": 0.0,
+            "max_frame_time": 0.0,
+        }
+
+        self.set_fps(fps)
+
+    def set_fps(self, fps: int) -> None:
+        """设置帧率，限制在MIN_FPS~MAX_FPS之间"""
+        self.fps = max(MIN_FPS, min(MAX_FPS, int(fps)))
+        self.interval = 1 / self.fps
+        if self.timer:
+            self.timer.setInterval(round(self.interval * 1000))
+
+    def register(self, callback: Callable[[], Any]) -> None:
+        """注册刷新回调（在GUI线程调用）"""
+        if self.timer is None:
+            self.timer = QtCore.QTimer(self)
+            self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+            self.timer.setInterval(round(self.interval * 1000))
+            self.timer.timeout.connect(self.refresh)
+
+        with self.lock:
+            self.callbacks.add(callback)
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def unregister(self, callback: Callable[[], Any]) -> None:
+        """注销刷新回调，没有回调时停止定时器"""
+        with self.lock:
+            self.callbacks.discard(callback)
+            self.dirty.pop(callback, None)
+            empty = not self.callbacks
+
+        if empty and self.timer:
+            self.timer.stop()
+
+    def mark_dirty(self, callback: Callable[[], Any]) -> None:
+        """标记需要刷新，下一帧执行"""
+        with self.lock:
+            if callback not in self.callbacks:
+                return
+            self.stats["requests"] += 1
+            if callback in self.dirty:
+                self.stats["coalesced"] += 1
+            else:
+                self.dirty[callback] = None
+
+    def refresh(self) -> None:
+        """执行一帧：调用所有脏回调"""
+        with self.lock:
+            if not self.dirty:
+                return
+            callbacks: List[Callable[[], Any]] = list(self.dirty)
+            self.dirty = {}
+
+        start = time.perf_counter()
+        errors = 0
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                errors += 1
+                log_manager.log(f"[RefreshScheduler] 刷新失败：{str(e)}")
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            stats = self.stats
+            stats["frames"] += 1
+            stats["refreshes"] += len(callbacks)
+            stats["errors"] += errors
+            stats["last_frame_time"] = elapsed
+            if elapsed > stats["max_frame_time"]:
+                stats["max_frame_time"] = elapsed
+            if elapsed > self.interval:
+                stats["dropped"] += int(elapsed / self.interval)
+
+    def get_statistics(self) -> Dict[str, float]:
+        """获取刷新统计：请求、合并、实际刷新、丢帧次数与帧耗时"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self.dirty)
+        stats["fps"] = self.fps
+        return stats
+
+
+# 全局刷新调度器
+refresh_scheduler = RefreshScheduler()
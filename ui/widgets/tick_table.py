@@ -0,0 +1,185 @@
+"""
+行情表格模型
+按vt_symbol索引行，tick更新时只对发生变化的单元格发出dataChanged
+"""
+
+from typing import Callable, Dict, List, Optional
+from PyQt5 import QtCore, QtGui
+from vnpy.trader.object import TickData
+
+# 表头，前14列为行情数据，后3列由视图放置按钮
+TICK_HEADERS = [
+    "代码", "交易所", "名称", "最新价",
+    "成交量", "开盘价", "最高价", "最低价",
+    "买价", "买量", "卖价", "卖量",
+    "时间", "接口", "K线图", "快速下单", "退订"
+]
+DATA_COLUMN_COUNT = 14
+
+COLUMN_CHART = 14
+COLUMN_TRADE = 15
+COLUMN_UNSUBSCRIBE = 16
+COLUMN_LAST_PRICE = 3
+
+PLACEHOLDER = "--"
+
+COLOR_UP = QtGui.QColor(QtCore.Qt.red)
+COLOR_DOWN = QtGui.QColor(QtCore.Qt.darkGreen)
+
+
+def format_tick(tick: TickData, name: str) -> List[str]:
+    """把tick转换为一行显示文本"""
+    return [
+        tick.symbol,
+        tick.exchange.value,
+        name,
+        str(tick.last_price),
+        str(tick.volume),
+        str(tick.open_price),
+        str(tick.high_price),
+        str(tick.low_price),
+        str(tick.bid_price_1),
+        str(tick.bid_volume_1),
+        str(tick.ask_price_1),
+        str(tick.ask_volume_1),
+        str(tick.datetime),
+        tick.gateway_name,
+    ]
+
+
+class TickTableModel(QtCore.QAbstractTableModel):
+    """行情表格模型
+
+    每行缓存一份显示文本，tick到来时逐列比较，只对变化的列区间发出一次dataChanged，
+    单个tick的开销与订阅合约数量无关。
+    """
+
+    def __init__(self, get_name: Callable[[str], Optional[str]] = None, parent=None):
+        super().__init__(parent)
+        self.get_name = get_name
+
+        self.symbols: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.values: List[List[str]] = []
+        self.pre_closes: List[float] = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.symbols)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(TICK_HEADERS)
+
+    def headerData(self, section: int, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return TICK_HEADERS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, column = index.row(), index.column()
+        if column >= DATA_COLUMN_COUNT:
+            return None
+
+        if role == QtCore.Qt.DisplayRole:
+            return self.values[row][column]
+
+        if role == QtCore.Qt.ForegroundRole and column == COLUMN_LAST_PRICE:
+            # 相对昨收涨红跌绿
+            pre_close = self.pre_closes[row]
+            try:
+                price = float(self.values[row][column])
+            except ValueError:
+                return None
+            if not pre_close:
+                return None
+            if price > pre_close:
+                return COLOR_UP
+            if price < pre_close:
+                return COLOR_DOWN
+        return None
+
+    def get_row(self, vt_symbol: str) -> int:
+        """获取合约所在行，不存在时返回-1"""
+        return self.rows.get(vt_symbol, -1)
+
+    def get_vt_symbol(self, row: int) -> str:
+        """获取行对应的合约"""
+        if 0 <= row < len(self.symbols):
+            return self.symbols[row]
+        return ""
+
+    def get_name_text(self, vt_symbol: str, default: str) -> str:
+        if self.get_name:
+            name = self.get_name(vt_symbol)
+            if name:
+                return name
+        return default
+
+    def add_symbol(self, vt_symbol: str, values: List[str] = None) -> int:
+        """在末尾添加一行，已存在时直接返回行号"""
+        row = self.rows.get(vt_symbol)
+        if row is not None:
+            return row
+
+        if values is None:
+            symbol, exchange = vt_symbol.split(".", 1)
+            values = [symbol, exchange, self.get_name_text(vt_symbol, symbol)]
+            values += [PLACEHOLDER] * (DATA_COLUMN_COUNT - len(values))
+
+        row = len(self.symbols)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.symbols.append(vt_symbol)
+        self.rows[vt_symbol] = row
+        self.values.append(values)
+        self.pre_closes.append(0.0)
+        self.endInsertRows()
+        return row
+
+    def update_tick(self, tick: TickData) -> bool:
+        """更新合约行情，返回是否新增了一行"""
+        vt_symbol = tick.vt_symbol
+        values = format_tick(tick, self.get_name_text(vt_symbol, tick.symbol))
+
+        row = self.rows.get(vt_symbol)
+        if row is None:
+            row = self.add_symbol(vt_symbol, values)
+            self.pre_closes[row] = tick.pre_close
+            return True
+
+        old = self.values[row]
+        first = last = -1
+        for column in range(DATA_COLUMN_COUNT):
+            if values[column] != old[column]:
+                if first < 0:
+                    first = column
+                last = column
+
+        self.pre_closes[row] = tick.pre_close
+        if first < 0:
+            return False
+
+        self.values[row] = values
+        self.dataChanged.emit(self.index(row, first), self.index(row, last))
+        return False
+
+    def remove_symbol(self, vt_symbol: str) -> bool:
+        """删除合约所在行"""
+        row = self.rows.get(vt_symbol)
+        if row is None:
+            return False
+
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.symbols[row]
+        del self.values[row]
+        del self.pre_closes[row]
+        del self.rows[vt_symbol]
+        for i in range(row, len(self.symbols)):
+            self.rows[self.symbols[i]] = i
+        self.endRemoveRows()
+        return True